@@ -0,0 +1,253 @@
+"""Synthetic FerreTlap catalogs for the stand-in database."""
+
+from __future__ import annotations
+
+import random
+
+from benchmarks.standin import StandIn, _columns, now, table
+
+COMPANY = "FerreTlap"
+ABBR = "FT"
+ROOT_WAREHOUSE = f"All Warehouses - {ABBR}"
+WAREHOUSES = (
+	"FerreTlap Central Warehouse",
+	"FerreTlap Norte Warehouse",
+	"FerreTlap Sur Warehouse",
+	"FerreTlap Oriente Warehouse",
+)
+ITEM_GROUPS = 25
+BRANDS = ("Truper", "Pretul", "Urrea", "Surtek", "Foset", "Volteck")
+
+
+def build_catalog(
+	size: int,
+	seed: int = 42,
+	priced_ratio: float = 0.9,
+	published_ratio: float = 0.5,
+	disabled_ratio: float = 0.02,
+	bins_per_item: tuple[int, int] = (1, 3),
+	with_pos_profile: bool = False,
+) -> StandIn:
+	"""
+	Build a catalog of `size` Items with Item Prices, Bins and existing Website Items.
+
+	- About `priced_ratio` of Items have a `FerreTlap Retail` Item Price; all have a standard rate.
+	- Each Item has Bins in a random subset of the branch warehouses (some at zero qty).
+	- About `published_ratio` of Items already have a published Website Item.
+	"""
+	rng = random.Random(seed)
+	standin = StandIn()
+	standin.create_schema()
+	timestamp = now()
+
+	def insert(doctype: str, rows: list[dict]):
+		columns = _columns(doctype)
+		values = []
+		for row in rows:
+			row.setdefault("owner", "Administrator")
+			row.setdefault("modified_by", "Administrator")
+			row.setdefault("creation", timestamp)
+			row.setdefault("modified", timestamp)
+			row.setdefault("docstatus", 0)
+			values.append(tuple(row.get(col) for col in columns))
+		standin.conn.executemany(
+			f"insert into {table(doctype)} ({', '.join(f'`{c}`' for c in columns)}) "
+			f"values ({', '.join('?' * len(columns))})",
+			values,
+		)
+
+	insert(
+		"Company",
+		[
+			{
+				"name": COMPANY,
+				"company_name": COMPANY,
+				"abbr": ABBR,
+				"default_currency": "MXN",
+				"country": "Mexico",
+				"default_cash_account": f"Cash - {ABBR}",
+				"write_off_account": f"Write Off - {ABBR}",
+				"cost_center": f"Main - {ABBR}",
+			}
+		],
+	)
+	insert(
+		"Account",
+		[
+			{"name": f"Cash - {ABBR}", "account_name": "Cash", "company": COMPANY, "is_group": 0},
+			{
+				"name": f"Write Off - {ABBR}",
+				"account_name": "Write Off",
+				"company": COMPANY,
+				"account_type": "Expense Account",
+				"is_group": 0,
+			},
+		],
+	)
+	insert("Cost Center", [{"name": f"Main - {ABBR}", "cost_center_name": "Main", "company": COMPANY, "is_group": 0}])
+	insert("Customer", [{"name": "Walk-in Customer", "customer_name": "Walk-in Customer"}])
+
+	warehouse_rows = [
+		{
+			"name": ROOT_WAREHOUSE,
+			"warehouse_name": ROOT_WAREHOUSE,
+			"company": COMPANY,
+			"is_group": 1,
+			"parent_warehouse": "",
+			"lft": 1,
+			"rgt": 2 + 2 * len(WAREHOUSES),
+		}
+	]
+	warehouses = []
+	for position, warehouse_name in enumerate(WAREHOUSES):
+		warehouses.append(f"{warehouse_name} - {ABBR}")
+		warehouse_rows.append(
+			{
+				"name": warehouses[-1],
+				"warehouse_name": warehouse_name,
+				"company": COMPANY,
+				"is_group": 0,
+				"parent_warehouse": ROOT_WAREHOUSE,
+				"lft": 2 + 2 * position,
+				"rgt": 3 + 2 * position,
+			}
+		)
+	insert("Warehouse", warehouse_rows)
+
+	insert(
+		"Price List",
+		[
+			{"name": name, "price_list_name": name, "enabled": 1, "currency": "MXN", "selling": 1, "buying": 0}
+			for name in ("FerreTlap Retail", "FerreTlap Wholesale")
+		],
+	)
+
+	groups = [f"Grupo {n:02d}" for n in range(ITEM_GROUPS)]
+	insert(
+		"Item Group",
+		[
+			{
+				"name": "All Item Groups",
+				"item_group_name": "All Item Groups",
+				"parent_item_group": "",
+				"lft": 1,
+				"rgt": 2 + 2 * ITEM_GROUPS,
+			}
+		]
+		+ [
+			{
+				"name": group,
+				"item_group_name": group,
+				"parent_item_group": "All Item Groups",
+				"route": f"products/grupo-{n:02d}",
+				"show_in_website": n % 2,
+				"lft": 2 + 2 * n,
+				"rgt": 3 + 2 * n,
+			}
+			for n, group in enumerate(groups)
+		],
+	)
+
+	items, prices, bins, web_items, barcodes = [], [], [], [], []
+	for n in range(size):
+		code = f"SKU-{n:07d}"
+		group = groups[n % ITEM_GROUPS]
+		rate = round(rng.uniform(5, 2500), 2)
+		image = f"/files/sku-{n % 15 + 1:03d}.png" if rng.random() < 0.6 else None
+		items.append(
+			{
+				"name": code,
+				"item_code": code,
+				"item_name": f"Articulo {n}",
+				"item_group": group,
+				"brand": rng.choice(BRANDS),
+				"image": image,
+				"description": f"Articulo de ferreteria numero {n}. " * 4,
+				"standard_rate": rate,
+				"disabled": 1 if rng.random() < disabled_ratio else 0,
+				"stock_uom": "Nos",
+				"is_stock_item": 1,
+				"is_sales_item": 1,
+				"has_variants": 0,
+			}
+		)
+		barcodes.append(
+			{
+				"name": f"BC-{n:07d}",
+				"parent": code,
+				"parentfield": "barcodes",
+				"parenttype": "Item",
+				"idx": 1,
+				"barcode": f"750{n:010d}",
+				"barcode_type": "EAN",
+				"uom": "Nos",
+			}
+		)
+		if rng.random() < priced_ratio:
+			prices.append(
+				{
+					"name": f"IP-{n:07d}",
+					"item_code": code,
+					"item_name": f"Articulo {n}",
+					"price_list": "FerreTlap Retail",
+					"price_list_rate": rate,
+					"currency": "MXN",
+					"selling": 1,
+					"buying": 0,
+					"uom": "Nos",
+				}
+			)
+		for warehouse in rng.sample(warehouses, rng.randint(*bins_per_item)):
+			qty = rng.choice((0, 0, rng.randint(1, 200)))
+			bins.append(
+				{
+					"name": f"BIN-{n:07d}-{warehouses.index(warehouse)}",
+					"item_code": code,
+					"warehouse": warehouse,
+					"actual_qty": qty,
+					"reserved_qty": 0,
+					"projected_qty": qty,
+					"ordered_qty": 0,
+				}
+			)
+		if rng.random() < published_ratio:
+			web_items.append(
+				{
+					"name": f"WEB-{n:07d}",
+					"item_code": code,
+					"item_name": f"Articulo {n}",
+					"item_group": group,
+					"brand": items[-1]["brand"],
+					"published": 1,
+					"show_price": rng.choice((0, 1)),
+					"show_stock_availability": rng.choice((0, 1)),
+					"website_warehouse": rng.choice((None, *warehouses)),
+					"website_image": image,
+					"thumbnail": image,
+					"route": f"products/grupo-{n % ITEM_GROUPS:02d}/articulo-{n}",
+				}
+			)
+
+	insert("Item", items)
+	insert("Item Barcode", barcodes)
+	insert("Item Price", prices)
+	insert("Bin", bins)
+	insert("Website Item", web_items)
+
+	if with_pos_profile:
+		insert(
+			"POS Profile",
+			[
+				{
+					"name": "POS FerreTlap Main",
+					"company": COMPANY,
+					"warehouse": warehouses[0],
+					"selling_price_list": "FerreTlap Retail",
+					"currency": "MXN",
+					"is_default": 1,
+				}
+			],
+		)
+
+	standin.conn.commit()
+	return standin
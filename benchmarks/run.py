@@ -0,0 +1,180 @@
+"""
+Benchmark the setup and website sync paths on synthetic catalogs.
+
+Each benchmark runs on a fresh copy of the generated catalog inside the
+SQLite stand-in and records wall time, query/row counts (via
+`pulpos_custom.profiling.collect`) and peak Python memory (tracemalloc).
+
+Run from the repository root:
+	python -m benchmarks.run --sizes 1000,10000 --output benchmarks/baseline.json
+	python -m benchmarks.run --sizes 100000 --only create_website_items_bulk --compare benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed, now
+
+
+def _create_website_items(modules):
+	return modules["website_sync"].create_website_items()
+
+
+def _create_website_items_bulk(modules):
+	return modules["website_sync"].create_website_items(bulk=1)
+
+
+def _ensure_setup(modules):
+	return modules["setup"].ensure_setup()
+
+
+def _ensure_setup_and_publish(modules):
+	return modules["setup"].ensure_setup_and_publish()
+
+
+def _enable_price_and_stock_display(modules):
+	# The settings half is a no-op here (singles have no table); the backfill is the catalog-sized part
+	modules["setup"]._enable_price_and_stock_display()
+	return modules["setup"]._backfill_website_items()
+
+
+def _ensure_item_prices(modules):
+	setup = modules["setup"]
+	return setup._ensure_item_prices({"retail": "FerreTlap Retail", "wholesale": "FerreTlap Wholesale"}, "MXN")
+
+
+def _website_warehouse_patch(modules):
+	return modules["patch"].execute()
+
+
+def _rebuild_website_catalog(modules):
+	return modules["website_catalog"].rebuild_website_catalog()
+
+
+BENCHMARKS = {
+	"create_website_items": _create_website_items,
+	"create_website_items_bulk": _create_website_items_bulk,
+	"ensure_setup": _ensure_setup,
+	"ensure_setup_and_publish": _ensure_setup_and_publish,
+	"enable_price_and_stock_display": _enable_price_and_stock_display,
+	"ensure_item_prices": _ensure_item_prices,
+	"website_warehouse_patch": _website_warehouse_patch,
+	"rebuild_website_catalog": _rebuild_website_catalog,
+}
+
+DEFAULT_SIZES = (1_000, 10_000)
+ALL_SIZES = (1_000, 10_000, 100_000, 500_000)
+
+
+def run_benchmark(catalog, name: str) -> dict:
+	"""Run one benchmark against a copy of `catalog` and return its measurements."""
+	standin = catalog.clone()
+	with installed(standin):
+		modules = {
+			"setup": importlib.import_module("pulpos_custom.setup"),
+			"website_sync": importlib.import_module("pulpos_custom.website_sync"),
+			"patch": importlib.import_module("pulpos_custom.patches.2025_12_18_set_website_warehouse"),
+			"website_catalog": importlib.import_module("pulpos_custom.website_catalog"),
+		}
+		profiling = importlib.import_module("pulpos_custom.profiling")
+
+		tracemalloc.start()
+		started = time.perf_counter()
+		error = None
+		with profiling.collect(name) as report:
+			try:
+				BENCHMARKS[name](modules)
+			except Exception as exc:
+				error = f"{type(exc).__name__}: {exc}"
+		wall_time = time.perf_counter() - started
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+
+	stats = report.as_dict()
+	result = {
+		"benchmark": name,
+		"wall_time": round(wall_time, 4),
+		"queries": stats["queries"],
+		"rows_read": stats["rows_read"],
+		"rows_written": stats["rows_written"],
+		"peak_memory_kb": round(peak / 1024),
+	}
+	if error:
+		result["error"] = error
+	return result
+
+
+def run(sizes, names) -> dict:
+	results = []
+	for size in sizes:
+		catalog = build_catalog(size)
+		for name in names:
+			result = {"size": size, **run_benchmark(catalog, name)}
+			results.append(result)
+			print(_format(result), file=sys.stderr)
+	return {
+		"generated_at": now(),
+		"python": platform.python_version(),
+		"machine": platform.machine(),
+		"results": results,
+	}
+
+
+def compare(current: dict, baseline: dict) -> list[dict]:
+	"""Pair results by (size, benchmark) and report relative changes."""
+	previous = {(r["size"], r["benchmark"]): r for r in baseline.get("results", [])}
+	rows = []
+	for result in current["results"]:
+		before = previous.get((result["size"], result["benchmark"]))
+		if not before:
+			continue
+		row = {"size": result["size"], "benchmark": result["benchmark"]}
+		for metric in ("wall_time", "queries", "rows_read", "rows_written", "peak_memory_kb"):
+			old, new = before.get(metric) or 0, result.get(metric) or 0
+			row[metric] = {"before": old, "after": new, "change": round((new - old) / old, 3) if old else None}
+		rows.append(row)
+	return rows
+
+
+def _format(result: dict) -> str:
+	line = (
+		f"{result['size']:>8} {result['benchmark']:<32} {result['wall_time']:>9.3f}s "
+		f"{result['queries']:>9} q {result['rows_read']:>10} read {result['rows_written']:>9} written "
+		f"{result['peak_memory_kb']:>8} KiB"
+	)
+	return f"{line}  ERROR {result['error']}" if result.get("error") else line
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated, or 'all'")
+	parser.add_argument("--only", default="", help="comma separated benchmark names")
+	parser.add_argument("--output", help="write results as JSON to this path")
+	parser.add_argument("--compare", help="baseline JSON to compare against")
+	args = parser.parse_args(argv)
+
+	sizes = ALL_SIZES if args.sizes == "all" else [int(s) for s in args.sizes.split(",") if s]
+	names = [n for n in args.only.split(",") if n] or list(BENCHMARKS)
+	unknown = set(names) - set(BENCHMARKS)
+	if unknown:
+		parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+	results = run(sizes, names)
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(results, f, indent=1)
+	if args.compare:
+		with open(args.compare) as f:
+			print(json.dumps(compare(results, json.load(f)), indent=1))
+
+
+if __name__ == "__main__":
+	main()
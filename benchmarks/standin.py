@@ -0,0 +1,1003 @@
+"""
+A SQLite-backed stand-in for the slice of the frappe API used by pulpos_custom.
+
+It lets the setup and sync paths run outside a bench so their wall time,
+query counts and memory can be measured on synthetic catalogs. Every data
+access goes through `db.sql`, like it does in frappe, so the query accounting
+in `pulpos_custom.profiling` sees the same statements it would on a site.
+
+This is a measurement harness, not a frappe replacement: permissions,
+validation, controllers and hooks are not modelled.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import random
+import re
+import sqlite3
+import string
+import sys
+import tempfile
+import types
+import uuid
+from contextlib import contextmanager
+
+STANDARD_COLUMNS = ("name", "owner", "creation", "modified", "modified_by", "docstatus", "idx")
+CHILD_COLUMNS = ("parent", "parentfield", "parenttype")
+
+# doctype -> columns (beyond the standard ones)
+DOCTYPES = {
+	"Company": (
+		"company_name",
+		"abbr",
+		"default_currency",
+		"country",
+		"default_cash_account",
+		"default_bank_account",
+		"write_off_account",
+		"default_write_off_account",
+		"cost_center",
+		"default_cost_center",
+	),
+	"Branch": ("branch", "company", "abbr"),
+	"Warehouse": ("warehouse_name", "company", "is_group", "parent_warehouse", "lft", "rgt", "disabled"),
+	"Price List": ("price_list_name", "enabled", "currency", "selling", "buying"),
+	"Item Group": ("item_group_name", "parent_item_group", "route", "show_in_website", "lft", "rgt"),
+	"Item": (
+		"item_code",
+		"item_name",
+		"item_group",
+		"brand",
+		"image",
+		"description",
+		"standard_rate",
+		"disabled",
+		"stock_uom",
+		"is_stock_item",
+		"is_sales_item",
+		"has_variants",
+		"published_in_website",
+	),
+	"Item Price": (
+		"item_code",
+		"item_name",
+		"price_list",
+		"price_list_rate",
+		"currency",
+		"selling",
+		"buying",
+		"uom",
+		"valid_from",
+		"valid_upto",
+		"customer",
+		"supplier",
+		"batch_no",
+	),
+	"Bin": ("item_code", "warehouse", "actual_qty", "reserved_qty", "projected_qty", "ordered_qty"),
+	"Website Item": (
+		"item_code",
+		"item_name",
+		"web_item_name",
+		"item_group",
+		"brand",
+		"published",
+		"show_price",
+		"show_stock_availability",
+		"website_warehouse",
+		"website_image",
+		"thumbnail",
+		"description",
+		"route",
+		"short_description",
+		"ranking",
+		"on_backorder",
+	),
+	"Mode of Payment": ("mode_of_payment", "type", "enabled"),
+	"POS Profile": (
+		"company",
+		"branch",
+		"warehouse",
+		"selling_price_list",
+		"currency",
+		"is_default",
+		"disabled",
+		"allow_print_before_pay",
+		"ignore_pricing_rule",
+		"write_off_account",
+		"write_off_cost_center",
+		"customer",
+		"hide_unavailable_items",
+	),
+	"Customer": ("customer_name",),
+	"POS Invoice": ("customer", "pos_profile", "is_return", "consolidated_invoice"),
+	"Account": ("account_name", "company", "account_type", "is_group"),
+	"Cost Center": ("cost_center_name", "company", "is_group"),
+	"Item Attribute": ("attribute_name",),
+	"File": ("file_url", "attached_to_doctype", "attached_to_name", "is_private"),
+}
+
+# child doctype -> columns; parent doctype -> {table field: child doctype}
+CHILD_DOCTYPES = {
+	"Mode of Payment Account": ("company", "default_account"),
+	"POS Payment Method": ("mode_of_payment", "default", "account"),
+	"Item Barcode": ("barcode", "barcode_type", "uom"),
+	"POS Invoice Item": ("item_code", "warehouse", "qty", "stock_qty", "so_detail"),
+}
+CHILD_TABLES = {
+	"Mode of Payment": {"accounts": "Mode of Payment Account"},
+	"POS Profile": {"payments": "POS Payment Method"},
+	"Item": {"barcodes": "Item Barcode"},
+	"POS Invoice": {"items": "POS Invoice Item"},
+}
+
+# Site name, also the prefix `Cache.make_key` adds like frappe's `{db_name}|key`
+SITE = "standin"
+
+# Singles have no table of their own, exactly like on a site
+SINGLES = ("E Commerce Settings", "Portal Settings", "Website Settings", "Stock Settings")
+
+INDEXES = {
+	"Item Price": (("item_code", "price_list"), ("price_list",)),
+	"Bin": (("item_code", "warehouse"), ("warehouse",)),
+	"Website Item": (("item_code",),),
+	"Item": (("item_group",),),
+	"Item Barcode": (("barcode",), ("parent",)),
+}
+
+NAME_FIELDS = {
+	"Company": "company_name",
+	"Branch": "branch",
+	"Price List": "price_list_name",
+	"Item Group": "item_group_name",
+	"Item": "item_code",
+	"Mode of Payment": "mode_of_payment",
+	"Customer": "customer_name",
+	"Item Attribute": "attribute_name",
+}
+
+OPERATORS = {"=", "!=", "<>", ">", "<", ">=", "<=", "like", "not like", "in", "not in", "is", "between"}
+
+
+class _dict(dict):
+	"""Attribute-access dict; missing keys read as None (as in frappe)."""
+
+	__getattr__ = dict.get
+
+	def __setattr__(self, key, value):
+		self[key] = value
+
+	def __getstate__(self):
+		return dict(self)
+
+	def __setstate__(self, state):
+		self.update(state)
+
+
+def now() -> str:
+	return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def table(doctype: str) -> str:
+	return f"`tab{doctype}`"
+
+
+def _columns(doctype: str) -> tuple[str, ...]:
+	if doctype in CHILD_DOCTYPES:
+		return STANDARD_COLUMNS + CHILD_COLUMNS + CHILD_DOCTYPES[doctype]
+	return STANDARD_COLUMNS + DOCTYPES[doctype]
+
+
+class Meta:
+	def __init__(self, doctype: str):
+		self.name = doctype
+		self.issingle = doctype in SINGLES
+		self._fields = set(DOCTYPES.get(doctype) or CHILD_DOCTYPES.get(doctype) or ())
+		self._fields.update(CHILD_TABLES.get(doctype, {}))
+
+	def has_field(self, fieldname: str) -> bool:
+		return fieldname in self._fields
+
+
+class Document:
+	"""Just enough of frappe's Document: attributes, child tables, insert/save."""
+
+	def __init__(self, standin: StandIn, doctype: str, values: dict | None = None):
+		object.__setattr__(self, "_standin", standin)
+		object.__setattr__(self, "doctype", doctype)
+		object.__setattr__(self, "_children", {})
+		object.__setattr__(self, "_is_new", True)
+		if values:
+			self.update(values)
+
+	def __getattr__(self, key):
+		if key.startswith("__"):
+			raise AttributeError(key)
+		if key in CHILD_TABLES.get(self.doctype, {}):
+			return self._children.setdefault(key, [])
+		return None
+
+	def __setattr__(self, key, value):
+		if key in CHILD_TABLES.get(self.doctype, {}):
+			self._children[key] = [_dict(row) for row in value or []]
+			return
+		object.__setattr__(self, key, value)
+
+	def get(self, key, default=None):
+		if key in CHILD_TABLES.get(self.doctype, {}):
+			return self._children.setdefault(key, [])
+		value = self.__dict__.get(key)
+		return default if value is None else value
+
+	def set(self, key, value):
+		setattr(self, key, value)
+
+	def update(self, values: dict):
+		for key, value in values.items():
+			setattr(self, key, value)
+		return self
+
+	def append(self, fieldname: str, row: dict | None = None):
+		child = _dict(row or {})
+		self._children.setdefault(fieldname, []).append(child)
+		return child
+
+	def as_dict(self) -> _dict:
+		values = _dict({k: v for k, v in self.__dict__.items() if not k.startswith("_")})
+		values.update({k: list(v) for k, v in self._children.items()})
+		return values
+
+	def insert(self, ignore_permissions=False, **kwargs):
+		standin = self._standin
+		if self.doctype in SINGLES:
+			return self.save()
+		if not self.name:
+			self.name = standin.autoname(self)
+		if standin.exists_name(self.doctype, self.name):
+			raise standin.DuplicateEntryError(f"{self.doctype} {self.name} already exists")
+		timestamp = now()
+		for field, value in (
+			("owner", "Administrator"),
+			("modified_by", "Administrator"),
+			("creation", timestamp),
+			("modified", timestamp),
+			("docstatus", 0),
+		):
+			if getattr(self, field) is None:
+				setattr(self, field, value)
+		row = {col: getattr(self, col) for col in _columns(self.doctype)}
+		standin.db.insert_row(self.doctype, row)
+		self._write_children()
+		object.__setattr__(self, "_is_new", False)
+		return self
+
+	def save(self, ignore_permissions=False, **kwargs):
+		standin = self._standin
+		if self.doctype in SINGLES:
+			self.modified = now()
+			standin.singles[self.doctype] = self.as_dict()
+			standin.db.sql("delete from `tabSingles` where doctype = %s", (self.doctype,))
+			for field, value in standin.singles[self.doctype].items():
+				if not isinstance(value, list):
+					standin.db.sql(
+						"insert into `tabSingles` (doctype, field, value) values (%s, %s, %s)",
+						(self.doctype, field, value),
+					)
+			return self
+		if self._is_new and not (self.name and standin.exists_name(self.doctype, self.name)):
+			return self.insert()
+		self.modified = now()
+		values = {col: getattr(self, col) for col in DOCTYPES[self.doctype]}
+		values["modified"] = self.modified
+		standin.db.set_value(self.doctype, self.name, values, update_modified=False)
+		self._write_children()
+		return self
+
+	def _write_children(self):
+		for fieldname, child_doctype in CHILD_TABLES.get(self.doctype, {}).items():
+			rows = self._children.get(fieldname)
+			if rows is None:
+				continue
+			self._standin.db.sql(
+				f"delete from {table(child_doctype)} where parent = %s and parentfield = %s",
+				(self.name, fieldname),
+			)
+			for idx, row in enumerate(rows, start=1):
+				values = {col: row.get(col) for col in CHILD_DOCTYPES[child_doctype]}
+				values.update(
+					name=row.get("name") or uuid.uuid4().hex[:10],
+					parent=self.name,
+					parentfield=fieldname,
+					parenttype=self.doctype,
+					idx=idx,
+				)
+				self._standin.db.insert_row(child_doctype, values)
+
+
+class _CallbackList:
+	"""frappe.db.after_commit: callables run once after the next commit."""
+
+	def __init__(self):
+		self.callbacks = []
+
+	def add(self, callback):
+		self.callbacks.append(callback)
+
+	def run(self):
+		callbacks, self.callbacks = self.callbacks, []
+		for callback in callbacks:
+			callback()
+
+
+class Database:
+	"""frappe.db over sqlite3; every helper funnels through `sql`."""
+
+	# Queries are written for MariaDB; `_translate` adapts them
+	db_type = "mariadb"
+
+	def __init__(self, standin: StandIn, conn: sqlite3.Connection):
+		self._standin = standin
+		self._conn = conn
+		self._cursor = conn.cursor()
+		self.globals: dict[str, str] = {}
+		self.after_commit = _CallbackList()
+
+	# -- raw SQL --------------------------------------------------------
+
+	def sql(self, query, values=(), as_dict=False, as_list=False, as_iterator=False, pluck=False, **kwargs):
+		query, params = _translate(str(query), values)
+		cursor = self._conn.cursor()
+		self._cursor = cursor
+		cursor.execute(query, params)
+		if cursor.description is None:
+			return ()
+		columns = [d[0] for d in cursor.description]
+		if as_iterator:
+			return (_dict(zip(columns, row)) if as_dict else row for row in cursor)
+		rows = cursor.fetchall()
+		if pluck:
+			return [row[0] for row in rows]
+		if as_dict:
+			return [_dict(zip(columns, row)) for row in rows]
+		return tuple(rows) if not as_list else [list(row) for row in rows]
+
+	@contextmanager
+	def unbuffered_cursor(self):
+		yield
+
+	def commit(self):
+		self._conn.commit()
+		self.after_commit.run()
+
+	def rollback(self, **kwargs):
+		self._conn.rollback()
+
+	# -- schema ---------------------------------------------------------
+
+	def table_exists(self, tablename: str, cached: bool = True) -> bool:
+		return bool(
+			self.sql("select name from sqlite_master where type = 'table' and name = %s", (tablename,))
+		)
+
+	def get_tables(self, cached: bool = True) -> list[str]:
+		return [row[0] for row in self.sql("select name from sqlite_master where type = 'table'")]
+
+	def get_single_value(self, doctype, fieldname, cache=True):
+		return (self._standin.singles.get(doctype) or {}).get(fieldname)
+
+	def has_column(self, doctype: str, column: str) -> bool:
+		if not self.table_exists(f"tab{doctype}"):
+			raise self._standin.TableMissingError(f"tab{doctype}")
+		return column in {row[1] for row in self.sql(f"pragma table_info({table(doctype)})")}
+
+	# -- document helpers ----------------------------------------------
+
+	def exists(self, doctype, dn=None, cache=False):
+		if doctype == "DocType":
+			return dn if dn in DOCTYPES or dn in CHILD_DOCTYPES or dn in SINGLES else None
+		if doctype in SINGLES:
+			return None
+		if dn is None:
+			rows = self.sql(f"select name from {table(doctype)} limit 1")
+		elif isinstance(dn, dict):
+			where, params = _where(dn)
+			rows = self.sql(f"select name from {table(doctype)} where {where} limit 1", params)
+		else:
+			rows = self.sql(f"select name from {table(doctype)} where name = %s limit 1", (dn,))
+		return rows[0][0] if rows else None
+
+	def get_value(self, doctype, filters=None, fieldname="name", as_dict=False, order_by=None, **kwargs):
+		if isinstance(filters, str):
+			filters = {"name": filters}
+		fields = [fieldname] if isinstance(fieldname, str) else list(fieldname)
+		where, params = _where(filters or {})
+		order = f" order by {order_by}" if order_by else ""
+		rows = self.sql(
+			f"select {', '.join(_field(f) for f in fields)} from {table(doctype)} where {where}{order} limit 1",
+			params,
+			as_dict=as_dict,
+		)
+		if not rows:
+			return None
+		if as_dict:
+			return rows[0]
+		return rows[0][0] if isinstance(fieldname, str) else tuple(rows[0])
+
+	def get_values(self, doctype, filters=None, fieldname="name", as_dict=False, **kwargs):
+		fields = [fieldname] if isinstance(fieldname, str) else list(fieldname)
+		where, params = _where(filters or {})
+		return self.sql(
+			f"select {', '.join(_field(f) for f in fields)} from {table(doctype)} where {where}",
+			params,
+			as_dict=as_dict,
+		)
+
+	def set_value(self, doctype, name, fieldname, value=None, update_modified=True, **kwargs):
+		values = dict(fieldname) if isinstance(fieldname, dict) else {fieldname: value}
+		if update_modified:
+			values["modified"] = now()
+		if not values:
+			return
+		assignments = ", ".join(f"{_field(k)} = %s" for k in values)
+		if isinstance(name, dict):
+			where, params = _where(name)
+		else:
+			where, params = "name = %s", [name]
+		self.sql(f"update {table(doctype)} set {assignments} where {where}", [*values.values(), *params])
+
+	def count(self, doctype, filters=None, **kwargs) -> int:
+		where, params = _where(filters or {})
+		return self.sql(f"select count(*) from {table(doctype)} where {where}", params)[0][0]
+
+	def delete(self, doctype, filters=None):
+		where, params = _where(filters or {})
+		self.sql(f"delete from {table(doctype)} where {where}", params)
+
+	def bulk_insert(self, doctype, fields, values, ignore_duplicates=False, **kwargs):
+		# One multi-row statement per chunk, as frappe does (bounded by sqlite's variable limit)
+		verb = "insert or ignore" if ignore_duplicates else "insert"
+		row_placeholder = f"({', '.join(['%s'] * len(fields))})"
+		columns = ", ".join(_field(f) for f in fields)
+		values = list(values)
+		chunk_size = max(1, 30_000 // max(1, len(fields)))
+		for start in range(0, len(values), chunk_size):
+			chunk = values[start : start + chunk_size]
+			self.sql(
+				f"{verb} into {table(doctype)} ({columns}) values {', '.join([row_placeholder] * len(chunk))}",
+				[value for row in chunk for value in row],
+			)
+
+	def insert_row(self, doctype: str, row: dict):
+		columns = ", ".join(_field(k) for k in row)
+		placeholders = ", ".join(["%s"] * len(row))
+		self.sql(f"insert into {table(doctype)} ({columns}) values ({placeholders})", tuple(row.values()))
+
+	# -- defaults ---------------------------------------------------------
+
+	def get_global(self, key, user="__global"):
+		return self.globals.get(key)
+
+	def set_global(self, key, value, user="__global"):
+		self.globals[key] = value
+
+	def get_default(self, key, parent="__default"):
+		return self.globals.get(f"default:{key}")
+
+	def set_default(self, key, value, parent="__default"):
+		self.globals[f"default:{key}"] = value
+
+
+class _Redis:
+	"""Raw redis-py commands on an in-process store; pipelines run these, with keys as given."""
+
+	def __init__(self):
+		self.store: dict = {}
+
+	# key/value
+	def get(self, key):
+		return self.store.get(key)
+
+	def set(self, key, value, ex=None, **kwargs):
+		self.store[key] = value
+
+	def setex(self, key, ttl, value):
+		self.store[key] = value
+
+	def mget(self, keys):
+		return [self.store.get(key) for key in keys]
+
+	def delete(self, *keys):
+		for key in keys:
+			self.store.pop(key, None)
+
+	def rename(self, src, dst):
+		self.store[dst] = self.store.pop(src)
+
+	def exists(self, *keys):
+		return sum(1 for key in keys if self.store.get(key))
+
+	def incr(self, key, amount=1):
+		self.store[key] = int(self.store.get(key) or 0) + amount
+		return self.store[key]
+
+	def expire(self, key, ttl):
+		return True
+
+	# sets
+	def sadd(self, key, *values):
+		self.store.setdefault(key, set()).update(values)
+
+	def smembers(self, key):
+		return set(self.store.get(key) or ())
+
+	def sismember(self, key, value):
+		return value in (self.store.get(key) or ())
+
+	def srem(self, key, *values):
+		self.store.get(key, set()).difference_update(values)
+
+	def spop(self, key, count=None):
+		members = self.store.get(key) or set()
+		popped = [members.pop() for _ in range(min(count or 1, len(members)))]
+		return popped if count else (popped[0] if popped else None)
+
+	# lists
+	def rpush(self, key, *values):
+		self.store.setdefault(key, []).extend(values)
+		return len(self.store[key])
+
+	def llen(self, key):
+		return len(self.store.get(key) or [])
+
+	def lrange(self, key, start, end):
+		values = self.store.get(key) or []
+		return values[start:] if end == -1 else values[start : end + 1]
+
+	# hashes
+	def hset(self, name, key=None, value=None, mapping=None, **kwargs):
+		bucket = self.store.setdefault(name, {})
+		if key is not None:
+			bucket[key] = value
+		bucket.update(mapping or {})
+
+	def hget(self, name, key, generator=None, **kwargs):
+		bucket = self.store.setdefault(name, {})
+		if key not in bucket and generator:
+			bucket[key] = generator()
+		return bucket.get(key)
+
+	def hsetnx(self, name, key, value):
+		bucket = self.store.setdefault(name, {})
+		if key in bucket:
+			return 0
+		bucket[key] = value
+		return 1
+
+	def hmget(self, name, keys):
+		bucket = self.store.get(name) or {}
+		return [bucket.get(key) for key in keys]
+
+	def hgetall(self, name):
+		return dict(self.store.get(name) or {})
+
+	def hdel(self, name, *keys):
+		bucket = self.store.get(name) or {}
+		for key in keys:
+			bucket.pop(key, None)
+
+	def hincrbyfloat(self, name, key, amount):
+		bucket = self.store.setdefault(name, {})
+		bucket[key] = float(bucket.get(key) or 0) + amount
+		return bucket[key]
+
+	def pipeline(self):
+		return _Pipeline(self)
+
+
+class Cache(_Redis):
+	"""
+	In-process stand-in for frappe's RedisWrapper (values are kept as-is).
+
+	Like the real wrapper, its own key/value, set, list and hash helpers prefix the
+	key with `make_key`, while `pipeline()` and the plain redis commands use keys as given.
+	"""
+
+	def make_key(self, key, user=None, shared=False):
+		return f"{SITE}|{key}"
+
+	def get_value(self, key, generator=None, **kwargs):
+		key = self.make_key(key)
+		if key not in self.store and generator:
+			self.store[key] = generator()
+		return self.store.get(key)
+
+	def set_value(self, key, value, expires_in_sec=None, **kwargs):
+		self.store[self.make_key(key)] = value
+
+	def delete_value(self, keys, **kwargs):
+		for key in [keys] if isinstance(keys, str) else keys:
+			self.store.pop(self.make_key(key), None)
+
+	def exists(self, key, user=True, shared=False):
+		return super().exists(self.make_key(key))
+
+	def sadd(self, name, *values):
+		return super().sadd(self.make_key(name), *values)
+
+	def srem(self, name, *values):
+		return super().srem(self.make_key(name), *values)
+
+	def sismember(self, name, value):
+		return super().sismember(self.make_key(name), value)
+
+	def smembers(self, name):
+		return super().smembers(self.make_key(name))
+
+	def spop(self, name):
+		return super().spop(self.make_key(name))
+
+	def rpush(self, key, value):
+		return super().rpush(self.make_key(key), value)
+
+	def llen(self, key):
+		return super().llen(self.make_key(key))
+
+	def lrange(self, key, start, stop):
+		return super().lrange(self.make_key(key), start, stop)
+
+	def hset(self, name, key, value, shared=False, *args, **kwargs):
+		return super().hset(self.make_key(name), key, value)
+
+	def hget(self, name, key, generator=None, shared=False):
+		return super().hget(self.make_key(name), key, generator)
+
+	def hdel(self, name, key, shared=False):
+		return super().hdel(self.make_key(name), key)
+
+	def hgetall(self, name):
+		return super().hgetall(self.make_key(name))
+
+
+class _Pipeline:
+	def __init__(self, cache: Cache):
+		self._cache = cache
+		self._calls = []
+
+	def __getattr__(self, name):
+		def queue(*args, **kwargs):
+			self._calls.append((name, args, kwargs))
+			return self
+
+		return queue
+
+	def execute(self):
+		# Raw commands, as on a redis-py pipeline: no key prefix
+		return [getattr(_Redis, name)(self._cache, *args, **kwargs) for name, args, kwargs in self._calls]
+
+
+class StandIn:
+	"""Holds the sqlite connection and the fake frappe module built on it."""
+
+	def __init__(self, conn: sqlite3.Connection | None = None, site_path: str | None = None):
+		self.conn = conn or sqlite3.connect(":memory:")
+		self.db = Database(self, self.conn)
+		self.cache = Cache()
+		self.singles: dict[str, dict] = {}
+		self.jobs: list[dict] = []
+		self.errors: list[str] = []
+		self.realtime: list[dict] = []
+		self.site_config: dict = {}
+		self.site_path = site_path or tempfile.mkdtemp(prefix="pulpos_standin_")
+		self.DuplicateEntryError = type("DuplicateEntryError", (Exception,), {})
+		self.TableMissingError = type("TableMissingError", (Exception,), {})
+		self.ValidationError = type("ValidationError", (Exception,), {})
+		self.DoesNotExistError = type("DoesNotExistError", (Exception,), {})
+
+	def create_schema(self):
+		self.conn.execute("create table `tabSingles` (doctype, field, value)")
+		for doctype in list(DOCTYPES) + list(CHILD_DOCTYPES):
+			columns = ", ".join(
+				f"`{col}` text primary key" if col == "name" else f"`{col}`" for col in _columns(doctype)
+			)
+			self.conn.execute(f"create table {table(doctype)} ({columns})")
+			for position, index_columns in enumerate(INDEXES.get(doctype, ())):
+				index_name = f"idx_{doctype.replace(' ', '_')}_{position}"
+				self.conn.execute(
+					f"create index {index_name} on {table(doctype)} ({', '.join(index_columns)})"
+				)
+		self.conn.commit()
+
+	def clone(self) -> StandIn:
+		"""Copy of the database (and defaults) so each benchmark starts from the same catalog."""
+		conn = sqlite3.connect(":memory:")
+		self.conn.backup(conn)
+		other = StandIn(conn, site_path=self.site_path)
+		other.db.globals = dict(self.db.globals)
+		return other
+
+	def autoname(self, doc: Document) -> str:
+		if doc.doctype == "Warehouse":
+			abbr = self.db.get_value("Company", doc.company, "abbr") if doc.company else None
+			return f"{doc.warehouse_name} - {abbr}" if abbr else doc.warehouse_name
+		field = NAME_FIELDS.get(doc.doctype)
+		if field and getattr(doc, field):
+			return getattr(doc, field)
+		return uuid.uuid4().hex[:10]
+
+	def exists_name(self, doctype: str, name: str) -> bool:
+		return bool(self.db.exists(doctype, name))
+
+	# -- frappe module -------------------------------------------------
+
+	def get_all(
+		self,
+		doctype,
+		filters=None,
+		fields=None,
+		pluck=None,
+		order_by=None,
+		limit_page_length=None,
+		limit_start=0,
+		limit=None,
+		distinct=False,
+		or_filters=None,
+		group_by=None,
+		**kwargs,
+	):
+		if doctype in SINGLES:
+			return []
+		if pluck:
+			fields = [pluck]
+		fields = fields or ["name"]
+		if isinstance(fields, str):
+			fields = [f.strip() for f in fields.split(",")]
+		where, params = _where(filters or {})
+		if or_filters:
+			or_where, or_params = _where(or_filters, joiner=" or ")
+			where = f"({where}) and ({or_where})"
+			params += or_params
+		query = (
+			f"select {'distinct ' if distinct else ''}{', '.join(_field(f) for f in fields)} "
+			f"from {table(doctype)} where {where}"
+		)
+		if group_by:
+			query += f" group by {group_by}"
+		query += f" order by {order_by or 'modified desc'}"
+		limit = limit or limit_page_length
+		if limit:
+			query += f" limit {int(limit)} offset {int(limit_start or 0)}"
+		rows = self.db.sql(query, params, as_dict=True)
+		if pluck:
+			return [row[pluck] for row in rows]
+		return rows
+
+	def get_doc(self, doctype, name=None, **kwargs):
+		if isinstance(doctype, dict):
+			values = dict(doctype)
+			return Document(self, values.pop("doctype"), values)
+		if doctype in SINGLES:
+			return self.get_single(doctype)
+		rows = self.db.sql(f"select * from {table(doctype)} where name = %s", (name,), as_dict=True)
+		if not rows:
+			raise self.DoesNotExistError(f"{doctype} {name} not found")
+		doc = Document(self, doctype, rows[0])
+		for fieldname, child_doctype in CHILD_TABLES.get(doctype, {}).items():
+			doc._children[fieldname] = self.db.sql(
+				f"select * from {table(child_doctype)} where parent = %s and parentfield = %s order by idx",
+				(name, fieldname),
+				as_dict=True,
+			)
+		object.__setattr__(doc, "_is_new", False)
+		return doc
+
+	def get_single(self, doctype):
+		doc = Document(self, doctype)
+		values = self.singles.get(doctype) or {}
+		for key, value in values.items():
+			if isinstance(value, list):
+				doc._children[key] = [_dict(row) for row in value]
+			else:
+				object.__setattr__(doc, key, value)
+		return doc
+
+	def new_doc(self, doctype, **kwargs):
+		return Document(self, doctype)
+
+	def enqueue(self, method, **kwargs):
+		self.jobs.append({"method": method if isinstance(method, str) else method.__name__, **kwargs})
+
+	def log_error(self, message=None, title=None, **kwargs):
+		self.errors.append(f"{title}: {message}")
+
+	def publish_realtime(self, event=None, message=None, **kwargs):
+		self.realtime.append({"event": event, "message": message, **kwargs})
+
+	def build_module(self) -> dict[str, types.ModuleType]:
+		"""Return the fake `frappe` package and submodules to place in sys.modules."""
+		standin = self
+		frappe = types.ModuleType("frappe")
+		frappe.__path__ = []
+		frappe._dict = _dict
+		frappe.db = self.db
+		frappe.local = types.SimpleNamespace(db=self.db, cache={}, flags=_dict(), site=SITE)
+		frappe.flags = frappe.local.flags
+		frappe.session = _dict(user="Administrator")
+		frappe.get_all = self.get_all
+		frappe.get_list = self.get_all
+		frappe.get_doc = self.get_doc
+		frappe.get_cached_doc = self.get_doc
+		frappe.get_single = self.get_single
+		frappe.get_cached_value = lambda doctype, name, field: self.db.get_value(doctype, name, field)
+		frappe.new_doc = self.new_doc
+		frappe.get_meta = Meta
+		frappe.cache = lambda: standin.cache
+		frappe.enqueue = self.enqueue
+		frappe.log_error = self.log_error
+		frappe.publish_realtime = self.publish_realtime
+		frappe.logger = lambda *args, **kwargs: logging.getLogger("pulpos_custom.standin")
+		frappe.get_site_config = lambda *args, **kwargs: standin.site_config
+		frappe.get_site_path = lambda *parts: "/".join([standin.site_path, *parts])
+		frappe.generate_hash = lambda *args, length=10, **kwargs: uuid.uuid4().hex[:length]
+		frappe.whitelist = lambda *args, **kwargs: (lambda fn: fn)
+		frappe.only_for = lambda *args, **kwargs: None
+		frappe.has_permission = lambda *args, **kwargs: True
+		frappe.parse_json = lambda value: value if not isinstance(value, str) else __import__("json").loads(value)
+		frappe.as_json = lambda value, **kwargs: __import__("json").dumps(value, default=str)
+		frappe._ = lambda text, *args, **kwargs: text
+		frappe.DoesNotExistError = self.DoesNotExistError
+		frappe.DuplicateEntryError = self.DuplicateEntryError
+		frappe.ValidationError = self.ValidationError
+		frappe.PermissionError = type("PermissionError", (Exception,), {})
+
+		def throw(message, exc=None, title=None, **kwargs):
+			raise (exc or standin.ValidationError)(message)
+
+		frappe.throw = throw
+		frappe.msgprint = lambda *args, **kwargs: None
+
+		utils = types.ModuleType("frappe.utils")
+		utils.now = now
+		utils.nowdate = lambda: datetime.date.today().isoformat()
+		utils.today = utils.nowdate
+		utils.now_datetime = datetime.datetime.now
+		utils.getdate = lambda value=None: (
+			datetime.date.fromisoformat(str(value)[:10]) if value else datetime.date.today()
+		)
+		utils.get_datetime = lambda value=None: (
+			datetime.datetime.fromisoformat(str(value)) if value else datetime.datetime.now()
+		)
+		utils.flt = lambda value, precision=None: float(value or 0)
+		utils.cint = lambda value: int(float(value or 0))
+		utils.cstr = lambda value: "" if value is None else str(value)
+		utils.fmt_money = lambda amount, precision=None, currency=None, **kwargs: f"{currency or ''} {amount:,.2f}".strip()
+		utils.random_string = lambda length: "".join(
+			random.choices(string.ascii_letters + string.digits, k=length)
+		)
+
+		website = types.ModuleType("frappe.website")
+		website.__path__ = []
+		website_utils = types.ModuleType("frappe.website.utils")
+		website_utils.cleanup_page_name = lambda title: re.sub(r"[^a-z0-9]+", "-", (title or "").lower()).strip("-")
+		website.utils = website_utils
+
+		installer = types.ModuleType("frappe.installer")
+		installer.update_site_config = lambda key, value, **kwargs: standin.site_config.__setitem__(key, value)
+
+		frappe.utils = utils
+		frappe.website = website
+		frappe.installer = installer
+		return {
+			"frappe": frappe,
+			"frappe.utils": utils,
+			"frappe.website": website,
+			"frappe.website.utils": website_utils,
+			"frappe.installer": installer,
+		}
+
+
+@contextmanager
+def installed(standin: StandIn):
+	"""
+	Import pulpos_custom against the stand-in for the duration of the block.
+
+	Any real `frappe` (and already-imported `pulpos_custom` modules) are
+	restored on exit, so this is safe to use inside a bench test run.
+	"""
+	prefixes = ("frappe", "pulpos_custom")
+	saved = {
+		key: module
+		for key, module in sys.modules.items()
+		if any(key == p or key.startswith(f"{p}.") for p in prefixes)
+	}
+	for key in saved:
+		del sys.modules[key]
+	modules = standin.build_module()
+	sys.modules.update(modules)
+	try:
+		yield modules["frappe"]
+	finally:
+		for key in [k for k in sys.modules if any(k == p or k.startswith(f"{p}.") for p in prefixes)]:
+			del sys.modules[key]
+		sys.modules.update(saved)
+
+
+# -- query translation ------------------------------------------------------
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s")
+
+
+def _translate(query: str, values) -> tuple[str, list]:
+	"""Turn pymysql-style placeholders into sqlite ones, expanding sequences for `in`."""
+	params: list = []
+	positional = iter(values if isinstance(values, (list, tuple)) else (values,) if values else ())
+
+	def replace(match):
+		value = values[match.group(1)] if match.group(1) else next(positional)
+		if isinstance(value, (list, tuple, set)):
+			value = list(value)
+			params.extend(value)
+			return f"({', '.join('?' * len(value))})" if value else "(NULL)"
+		params.append(value)
+		return "?"
+
+	query = _PLACEHOLDER.sub(replace, query)
+	# MariaDB-only clauses that have no sqlite equivalent (sqlite locks the whole db anyway)
+	query = re.sub(r"\s+(for update(\s+skip locked|\s+nowait)?|lock in share mode)\s*$", "", query, flags=re.I)
+	return query, params
+
+
+def _field(field: str) -> str:
+	field = field.strip()
+	if re.fullmatch(r"\w+", field):
+		return f"`{field}`"
+	return field
+
+
+def _where(filters, joiner: str = " and ") -> tuple[str, list]:
+	"""Build a where clause from frappe-style dict or list filters."""
+	conditions, params = [], []
+	if isinstance(filters, dict):
+		items = list(filters.items())
+	else:
+		items = []
+		for f in filters:
+			if isinstance(f, dict):
+				items.extend(f.items())
+			elif len(f) == 4:
+				items.append((f[1], [f[2], f[3]]))
+			else:
+				items.append((f[0], [f[1], f[2]]))
+
+	for field, condition in items:
+		column = _field(field)
+		if isinstance(condition, (list, tuple)) and len(condition) == 2 and str(condition[0]).lower() in OPERATORS:
+			operator, value = str(condition[0]).lower(), condition[1]
+		else:
+			operator, value = "=", condition
+
+		if operator == "is":
+			if value == "set":
+				conditions.append(f"ifnull({column}, '') != ''")
+			else:
+				conditions.append(f"ifnull({column}, '') = ''")
+		elif operator in ("in", "not in"):
+			value = [v.strip() for v in value.split(",")] if isinstance(value, str) else list(value)
+			if not value:
+				conditions.append("1 = 0" if operator == "in" else "1 = 1")
+				continue
+			conditions.append(f"{column} {operator} ({', '.join('?' * len(value))})")
+			params.extend(value)
+		elif operator == "between":
+			conditions.append(f"{column} between ? and ?")
+			params.extend(value)
+		elif value is None and operator in ("=", "!="):
+			conditions.append(f"{column} is {'not ' if operator == '!=' else ''}null")
+		else:
+			conditions.append(f"{column} {operator} ?")
+			params.append(value)
+
+	if not conditions:
+		return "1 = 1", params
+	# Placeholders were already expanded; keep `?` from being re-translated by `sql`
+	return joiner.join(conditions).replace("?", "%s"), params
@@ -0,0 +1,105 @@
+"""
+Scan lookups against the stand-in, whose in-process cache plays Redis.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_pos_scan
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 300
+PROFILE = "POS FerreTlap Main"
+
+
+class TestPosScan(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE, with_pos_profile=True)
+
+	def setUp(self):
+		self.context = installed(self.catalog.clone())
+		self.frappe = self.context.__enter__()
+		self.pos_scan = importlib.import_module("pulpos_custom.pos_scan")
+		self.profiling = importlib.import_module("pulpos_custom.profiling")
+		self.item_code = self.frappe.db.sql(
+			"""
+			select item.name from `tabItem` item
+			join `tabItem Price` price on price.item_code = item.name
+			join `tabBin` bin on bin.item_code = item.name and bin.warehouse = %s
+			where item.disabled = 0 and bin.actual_qty > 0
+			order by item.name limit 1
+			""",
+			self.frappe.get_cached_doc("POS Profile", PROFILE).warehouse,
+			pluck=True,
+		)[0]
+		self.barcode = self.frappe.db.get_value("Item Barcode", {"parent": self.item_code}, "barcode")
+		self.pos_scan.warm_scan_cache(PROFILE)
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def test_scan_by_barcode_and_item_code(self):
+		rate = self.frappe.db.get_value("Item Price", {"item_code": self.item_code}, "price_list_rate")
+		by_barcode = self.pos_scan.scan_item(PROFILE, self.barcode)
+		self.assertEqual(by_barcode["item_code"], self.item_code)
+		self.assertEqual(by_barcode["barcode"], self.barcode)
+		self.assertEqual(by_barcode["uom"], "Nos")
+		self.assertEqual(by_barcode["price_list_rate"], float(rate))
+		self.assertGreater(by_barcode["actual_qty"], 0)
+		self.assertEqual(self.pos_scan.scan_item(PROFILE, self.item_code)["price_list_rate"], float(rate))
+		self.assertIsNone(self.pos_scan.scan_item(PROFILE, "no-such-code"))
+
+	def test_warm_scan_runs_no_queries(self):
+		self.pos_scan.scan_item(PROFILE, self.barcode)
+		with self.profiling.query_budget(0, "warm scan"):
+			self.pos_scan.scan_item(PROFILE, self.barcode)
+			self.pos_scan.scan_item(PROFILE, self.item_code)
+
+	def test_price_and_stock_changes_invalidate(self):
+		self.pos_scan.scan_item(PROFILE, self.barcode)
+		self.frappe.db.sql("update `tabItem Price` set price_list_rate = 12.5 where item_code = %s", self.item_code)
+		self.frappe.db.sql("update `tabBin` set actual_qty = 3 where item_code = %s", self.item_code)
+		warehouse = self.frappe.get_cached_doc("POS Profile", PROFILE).warehouse
+		importlib.import_module("pulpos_custom.pricing").clear_price_cache(["FerreTlap Retail"])
+		importlib.import_module("pulpos_custom.stock").clear_stock_cache(
+			self.frappe._dict(item_code=self.item_code, warehouse=warehouse)
+		)
+		self.pos_scan.on_price_or_stock_change(self.frappe._dict(item_code=self.item_code))
+		self.frappe.db.commit()
+
+		scanned = self.pos_scan.scan_item(PROFILE, self.barcode)
+		self.assertEqual(scanned["price_list_rate"], 12.5)
+		self.assertEqual(scanned["actual_qty"], 3)
+
+	def test_barcode_changes_invalidate(self):
+		self.pos_scan.scan_item(PROFILE, self.barcode)
+		self.frappe.db.sql(
+			"update `tabItem Barcode` set barcode = 'NEW-0001', uom = 'Box' where parent = %s", self.item_code
+		)
+		self.pos_scan.on_item_change(self.frappe._dict(name=self.item_code))
+		self.frappe.db.commit()
+
+		self.assertIsNone(self.pos_scan.scan_item(PROFILE, self.barcode))
+		scanned = self.pos_scan.scan_item(PROFILE, "NEW-0001")
+		self.assertEqual((scanned["item_code"], scanned["uom"]), (self.item_code, "Box"))
+
+	def test_item_saved_before_warm_up_keeps_database_fallback(self):
+		cache = self.frappe.cache()
+		keys = (self.pos_scan.BARCODES_KEY, self.pos_scan.ITEM_BARCODES_KEY, self.pos_scan.WARMED_KEY)
+		cache.pipeline().delete(*(cache.make_key(key) for key in keys)).execute()
+		self.pos_scan._local.clear()
+		other = self.frappe.db.get_value("Item Barcode", {"parent": ["!=", self.item_code]}, "parent")
+		self.pos_scan.on_item_change(self.frappe._dict(name=other))
+		self.frappe.db.commit()
+
+		self.assertEqual(self.pos_scan.scan_item(PROFILE, self.barcode)["item_code"], self.item_code)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,61 @@
+"""
+Effective Item Price resolution against the stand-in's Item Prices.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_pricing
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 20
+ITEM_CODE = "SKU-0000001"
+PRICE_LIST = "FerreTlap Retail"
+
+
+class TestPricing(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE)
+
+	def setUp(self):
+		self.context = installed(self.catalog.clone())
+		self.frappe = self.context.__enter__()
+		self.pricing = importlib.import_module("pulpos_custom.pricing")
+		self.frappe.db.sql("delete from `tabItem Price` where item_code = %s", ITEM_CODE)
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def price(self, name, rate, uom=None, modified="2026-01-01 00:00:00"):
+		self.frappe.db.insert_row(
+			"Item Price",
+			{
+				"name": name,
+				"item_code": ITEM_CODE,
+				"price_list": PRICE_LIST,
+				"price_list_rate": rate,
+				"currency": "MXN",
+				"selling": 1,
+				"uom": uom,
+				"valid_from": "2026-01-01",
+				"modified": modified,
+			},
+		)
+
+	def test_uom_specific_row_wins_a_valid_from_tie(self):
+		# ERPNext breaks valid_from ties with `uom desc`; the newer UOM-less row must not shadow the box price
+		self.price("PRICE-BOX", 90, uom="Caja")
+		self.price("PRICE-ANY", 10, modified="2026-02-01 00:00:00")
+		prices = self.pricing.get_item_prices([ITEM_CODE], PRICE_LIST, "2026-03-01")[ITEM_CODE]
+		self.assertEqual(prices["Caja"], (90.0, "MXN"))
+		self.assertEqual(prices[None], (10.0, "MXN"))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,110 @@
+"""
+Query budgets for the setup, catalog job and Website Item paths, checked at two catalog sizes.
+
+A budget that holds for both a small and a 10x larger catalog means the query
+count does not grow per Item; a per-row `exists`/`get_value`/`set_value` fails
+it with the offending call sites.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_query_budget
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZES = (300, 3000)
+# Paged steps read 1000 Items per page, so the larger catalog is only three pages
+PAGE_SIZE = 1000
+QUERY_BUDGETS = {
+	"ensure_setup_and_publish": 60,
+	"ensure_setup_and_publish_unchanged": 5,
+	"create_website_items": 25,
+	# Mostly setup context reads; the grouped UPDATEs are batched per 500 rows
+	"website_warehouse_patch": 15,
+}
+# Per chunk of `setup_jobs.CHUNK_SIZE` rows; the backfill writes one grouped UPDATE per distinct change
+CATALOG_CHUNK_BUDGETS = {
+	"item_prices": 10,
+	"website_items": 15,
+	"website_item_backfill": 35,
+	"thumbnails": 5,
+}
+
+
+class TestQueryBudget(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalogs = {size: build_catalog(size) for size in CATALOG_SIZES}
+
+	def run_with_budget(self, name: str, fn):
+		for size, catalog in self.catalogs.items():
+			with self.subTest(size=size), installed(catalog.clone()):
+				profiling = importlib.import_module("pulpos_custom.profiling")
+				with profiling.query_budget(QUERY_BUDGETS[name], f"{name} ({size} items)"):
+					fn()
+
+	def test_ensure_setup_and_publish(self):
+		self.run_with_budget(
+			"ensure_setup_and_publish",
+			lambda: importlib.import_module("pulpos_custom.setup").ensure_setup_and_publish(force=1),
+		)
+
+	def test_ensure_setup_and_publish_unchanged(self):
+		for size, catalog in self.catalogs.items():
+			with self.subTest(size=size), installed(catalog.clone()):
+				setup = importlib.import_module("pulpos_custom.setup")
+				profiling = importlib.import_module("pulpos_custom.profiling")
+				setup.ensure_setup_and_publish()
+				with profiling.query_budget(QUERY_BUDGETS["ensure_setup_and_publish_unchanged"]):
+					setup.ensure_setup_and_publish()
+
+	def test_create_website_items(self):
+		self.run_with_budget(
+			"create_website_items",
+			lambda: importlib.import_module("pulpos_custom.website_sync").create_website_items(
+				bulk=1, batch_size=PAGE_SIZE
+			),
+		)
+
+	def test_website_warehouse_patch(self):
+		self.run_with_budget(
+			"website_warehouse_patch",
+			lambda: importlib.import_module("pulpos_custom.patches.2025_12_18_set_website_warehouse").execute(),
+		)
+
+	def test_catalog_chunks(self):
+		chunks = {}
+		for size, catalog in self.catalogs.items():
+			standin = catalog.clone()
+			with self.subTest(size=size), installed(standin):
+				setup_jobs = importlib.import_module("pulpos_custom.setup_jobs")
+				profiling = importlib.import_module("pulpos_custom.profiling")
+				setup_jobs.enqueue_catalog_jobs()
+				# The stand-in records enqueued chunks instead of running them; run each under its budget
+				while standin.jobs:
+					job = standin.jobs.pop(0)
+					step = setup_jobs._current_step(setup_jobs._load_state())[0]
+					with profiling.query_budget(CATALOG_CHUNK_BUDGETS[step], f"{step} chunk ({size} items)"):
+						setup_jobs.run_catalog_chunk(job["run_id"], job["context"])
+					chunks[size] = chunks.get(size, 0) + 1
+				self.assertTrue(setup_jobs.is_complete())
+		# The larger catalog ran more chunks, each within the same budget
+		self.assertGreater(chunks[CATALOG_SIZES[1]], chunks[CATALOG_SIZES[0]])
+
+	def test_budget_reports_call_sites(self):
+		with installed(self.catalogs[CATALOG_SIZES[0]].clone()) as frappe:
+			profiling = importlib.import_module("pulpos_custom.profiling")
+			with self.assertRaises(profiling.QueryBudgetExceeded) as raised:
+				with profiling.query_budget(1, "per-row lookups"):
+					for name in frappe.get_all("Item", pluck="name")[:5]:
+						frappe.db.exists("Website Item", {"item_code": name})
+			self.assertIn("per-row lookups ran 6 queries, budget is 1", str(raised.exception))
+
+
+if __name__ == "__main__":
+	unittest.main()
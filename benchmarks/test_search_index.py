@@ -0,0 +1,80 @@
+"""
+POS and shop search against the stand-in's Items, Website Items and POS Profile.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_search_index
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+from unittest import mock
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 300
+PROFILE = "POS FerreTlap Main"
+
+
+class TestSearchIndex(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE, with_pos_profile=True)
+
+	def setUp(self):
+		self.context = installed(self.catalog.clone())
+		self.frappe = self.context.__enter__()
+		self.search_index = importlib.import_module("pulpos_custom.search_index")
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def test_pos_search_pages_by_rank_offset(self):
+		first = self.search_index.search_pos_items(PROFILE, "articulo", page_length=5)
+		self.assertEqual(len(first["items"]), 5)
+		self.assertEqual(first["next"], 5)
+		second = self.search_index.search_pos_items(PROFILE, "articulo", page_length=5, after=first["next"])
+		first_codes = {item.item_code for item in first["items"]}
+		self.assertFalse(first_codes & {item.item_code for item in second["items"]})
+
+	def test_shop_search_only_ranks_published_website_items(self):
+		published = self.frappe.get_all("Website Item", filters={"published": 1}, pluck="item_code")
+		web_item = self.frappe.db.get_value("Website Item", {"item_code": published[0]}, "name")
+		self.frappe.db.sql(
+			"update `tabWebsite Item` set web_item_name = 'Pinza de presion' where name = %s", web_item
+		)
+		ranked = self.search_index.build_search_index().search("articulo", limit=None, published_only=True)
+		self.assertTrue(ranked)
+		self.assertLessEqual(set(ranked), set(published))
+		index = self.search_index.build_search_index()
+		self.assertEqual(index.search("pinza", published_only=True), [published[0]])
+
+	def test_unnarrowed_search_scans_past_the_first_candidates(self):
+		index = self.search_index.SearchIndex()
+		for n in range(self.search_index.MAX_CANDIDATES + 100):
+			name = "Martillo especial" if n == self.search_index.MAX_CANDIDATES + 50 else f"Articulo {n}"
+			index.add(self.frappe._dict(name=f"SKU-{n}", item_name=name, item_group="Herramientas"), [])
+		# Every trigram counts as common, so no word narrows the candidates
+		with mock.patch.object(self.search_index, "COMMON_TRIGRAM_POSTINGS", 0):
+			self.assertEqual(index.search("artillo"), [f"SKU-{self.search_index.MAX_CANDIDATES + 50}"])
+
+	def test_renamed_item_leaves_the_index(self):
+		index = self.search_index.get_search_index()
+		old_code = index.search("articulo", limit=1)[0]
+		self.frappe.db.sql(
+			"update `tabItem` set name = 'SKU-RENAMED', item_code = 'SKU-RENAMED' where name = %s", old_code
+		)
+		self.frappe.db.sql("update `tabItem Barcode` set parent = 'SKU-RENAMED' where parent = %s", old_code)
+		self.search_index.queue_index_update(
+			self.frappe._dict(doctype="Item", name="SKU-RENAMED"), "after_rename", old_code, "SKU-RENAMED"
+		)
+		self.frappe.db.commit()
+		codes = self.search_index.get_search_index().search("articulo", limit=None)
+		self.assertIn("SKU-RENAMED", codes)
+		self.assertNotIn(old_code, codes)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,104 @@
+"""
+Submit-time stock validation against the stand-in's Bins and POS Invoices.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_stock_check
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 50
+ITEM_CODE = "SKU-0000001"
+WAREHOUSE = "FerreTlap Central Warehouse - FT"
+
+
+class TestStockCheck(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE)
+
+	def setUp(self):
+		self.standin = self.catalog.clone()
+		self.context = installed(self.standin)
+		self.frappe = self.context.__enter__()
+		self.stock = importlib.import_module("pulpos_custom.stock")
+		self.frappe.db.sql("delete from `tabBin` where item_code = %s", ITEM_CODE)
+		self.frappe.db.insert_row(
+			"Bin",
+			{
+				"name": "BIN-CHECK",
+				"item_code": ITEM_CODE,
+				"warehouse": WAREHOUSE,
+				"actual_qty": 10,
+				"reserved_qty": 4,
+			},
+		)
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def invoice(self, *qtys, doctype="POS Invoice", so_detail=None, **values):
+		items = [
+			self.frappe._dict(item_code=ITEM_CODE, warehouse=WAREHOUSE, qty=qty, so_detail=so_detail)
+			for qty in qtys
+		]
+		values = {"doctype": doctype, "name": "TEST-INV", "update_stock": 1, "items": items, **values}
+		return self.frappe._dict(values)
+
+	def test_duplicate_lines_are_summed_against_available_to_sell(self):
+		# 10 actual less 4 reserved leaves 6
+		self.stock.validate_stock_on_submit(self.invoice(3, 3))
+		with self.assertRaises(self.frappe.ValidationError):
+			self.stock.validate_stock_on_submit(self.invoice(3, 4))
+
+	def submitted_pos_invoice(self, qty):
+		self.frappe.db.insert_row("POS Invoice", {"name": "POS-1", "docstatus": 1, "consolidated_invoice": ""})
+		self.frappe.db.insert_row(
+			"POS Invoice Item",
+			{
+				"name": "POS-1-1",
+				"parent": "POS-1",
+				"parenttype": "POS Invoice",
+				"parentfield": "items",
+				"item_code": ITEM_CODE,
+				"warehouse": WAREHOUSE,
+				"qty": qty,
+				"stock_qty": qty,
+			},
+		)
+
+	def test_unconsolidated_pos_invoices_count_as_sold(self):
+		self.submitted_pos_invoice(5)
+		self.assertEqual(
+			self.stock.get_stock_shortfalls([{"item_code": ITEM_CODE, "warehouse": WAREHOUSE, "qty": 2}]),
+			[{"item_code": ITEM_CODE, "warehouse": WAREHOUSE, "required": 2.0, "available": 1.0}],
+		)
+
+	def test_sales_order_lines_use_their_own_reservation(self):
+		self.stock.validate_stock_on_submit(self.invoice(9, doctype="Sales Invoice", so_detail="SO-ROW"))
+
+	def test_negative_stock_setting_only_reports(self):
+		self.standin.singles["Stock Settings"] = {"allow_negative_stock": 1}
+		messages = []
+		self.frappe.msgprint = lambda message, **kwargs: messages.append(message)
+		self.stock.validate_stock_on_submit(self.invoice(20))
+		self.assertIn(f"{ITEM_CODE} @ {WAREHOUSE}: need 20.0, available 6.0", messages[0])
+
+	def test_consolidated_invoice_does_not_count_its_pos_invoices_twice(self):
+		# The merge log submits the Sales Invoice before the POS Invoice points at it
+		self.submitted_pos_invoice(5)
+		self.stock.validate_stock_on_submit(self.invoice(5, doctype="Sales Invoice", is_consolidated=1))
+
+	def test_skipped_documents(self):
+		self.stock.validate_stock_on_submit(self.invoice(20, doctype="Sales Invoice", update_stock=0))
+		self.stock.validate_stock_on_submit(self.invoice(20, is_return=1))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,75 @@
+"""
+Stock change fan-out against the stand-in, where Bin quantities change without Bin events.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_stock_events
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+from unittest import mock
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 20
+
+
+class TestStockEvents(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE)
+
+	def setUp(self):
+		self.standin = self.catalog.clone()
+		self.context = installed(self.standin)
+		self.frappe = self.context.__enter__()
+		self.stock_events = importlib.import_module("pulpos_custom.stock_events")
+		self.stock_push = importlib.import_module("pulpos_custom.stock_push")
+		self.bin = self.frappe.get_all("Bin", fields=["name", "item_code", "warehouse"], limit=1)[0]
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def pushed(self) -> dict:
+		self.standin.realtime.clear()
+		with mock.patch.object(self.stock_push, "FLUSH_WINDOW", 0):
+			self.stock_push.flush_stock_push()
+		return {
+			(message["message"]["warehouse"], item_code): qtys
+			for message in self.standin.realtime
+			for item_code, qtys in message["message"]["items"].items()
+		}
+
+	def set_qty(self, actual_qty: float):
+		self.frappe.db.set_value("Bin", self.bin.name, {"actual_qty": actual_qty, "projected_qty": actual_qty})
+
+	def test_ledger_entry_pushes_the_quantity_written_after_it(self):
+		entry = self.frappe._dict(
+			doctype="Stock Ledger Entry", item_code=self.bin.item_code, warehouse=self.bin.warehouse
+		)
+		self.stock_events.on_stock_change(entry, "on_submit")
+		# ERPNext updates the Bin after the entry is submitted, in the same transaction
+		self.set_qty(42)
+		self.assertFalse(self.pushed())
+
+		self.frappe.db.commit()
+		pushed = self.pushed()
+		self.assertEqual(pushed[(self.bin.warehouse, self.bin.item_code)]["actual_qty"], 42)
+
+	def test_sweep_fans_out_bins_modified_since_the_last_run(self):
+		self.stock_events.sync_modified_bins()
+		self.assertFalse(self.pushed())
+
+		self.set_qty(7)
+		self.frappe.db.sql("update `tabBin` set modified = '2999-01-01 00:00:00' where name = %s", self.bin.name)
+		self.stock_events.sync_modified_bins()
+		pushed = self.pushed()
+		self.assertEqual(list(pushed), [(self.bin.warehouse, self.bin.item_code)])
+		self.assertEqual(pushed[(self.bin.warehouse, self.bin.item_code)]["projected_qty"], 7)
+
+
+if __name__ == "__main__":
+	unittest.main()
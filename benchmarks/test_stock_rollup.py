@@ -0,0 +1,62 @@
+"""
+Group warehouse totals and their refresh queue against the stand-in, whose cache prefixes keys like RedisWrapper.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_stock_rollup
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from benchmarks.catalog import ROOT_WAREHOUSE, build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 20
+
+
+class TestStockRollup(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE)
+
+	def setUp(self):
+		self.context = installed(self.catalog.clone())
+		self.frappe = self.context.__enter__()
+		self.stock_rollup = importlib.import_module("pulpos_custom.stock_rollup")
+		self.stock_rollup.rebuild_stock_rollup()
+		self.bin = self.frappe.get_all("Bin", fields=["name", "item_code", "warehouse"], limit=1)[0]
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def pending(self) -> set:
+		cache = self.frappe.cache()
+		(members,) = cache.pipeline().smembers(cache.make_key(self.stock_rollup.PENDING_KEY)).execute()
+		return members
+
+	def root_total(self) -> float:
+		return self.stock_rollup.get_rollup_qtys([(self.bin.item_code, ROOT_WAREHOUSE)])[
+			(self.bin.item_code, ROOT_WAREHOUSE)
+		]
+
+	def test_queued_items_are_drained_into_group_totals(self):
+		self.frappe.db.set_value("Bin", self.bin.name, "actual_qty", 1000)
+		expected = sum(
+			self.frappe.get_all("Bin", filters={"item_code": self.bin.item_code}, pluck="actual_qty")
+		)
+		self.assertNotEqual(self.root_total(), expected)
+
+		self.stock_rollup.queue_rollup_refresh(self.bin)
+		self.assertFalse(self.pending())
+		self.frappe.db.commit()
+		self.assertEqual(self.pending(), {self.bin.item_code})
+
+		self.stock_rollup.refresh_pending_rollups()
+		self.assertFalse(self.pending())
+		self.assertEqual(self.root_total(), expected)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,86 @@
+"""
+Event-driven Website Item sync against the stand-in, whose cache prefixes keys like RedisWrapper.
+
+Run from the repository root:
+	python -m unittest benchmarks.test_website_events
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from benchmarks.catalog import build_catalog
+from benchmarks.standin import installed
+
+CATALOG_SIZE = 100
+
+
+class TestWebsiteEvents(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.catalog = build_catalog(CATALOG_SIZE)
+
+	def setUp(self):
+		self.context = installed(self.catalog.clone())
+		self.frappe = self.context.__enter__()
+		self.events = importlib.import_module("pulpos_custom.website_events")
+		self.published_code = self.frappe.db.sql(
+			"""
+			select web.item_code from `tabWebsite Item` web
+			join `tabItem Price` price on price.item_code = web.item_code and price.price_list = 'FerreTlap Retail'
+			where web.published = 1 and price.price_list_rate > 0
+			order by web.item_code limit 1
+			""",
+			pluck=True,
+		)[0]
+
+	def tearDown(self):
+		self.context.__exit__(None, None, None)
+
+	def pending(self) -> set:
+		cache = self.frappe.cache()
+		(members,) = cache.pipeline().smembers(cache.make_key(self.events.PENDING_KEY)).execute()
+		return members
+
+	def published(self, item_code: str):
+		return self.frappe.db.get_value("Website Item", {"item_code": item_code}, "published")
+
+	def test_queued_items_are_drained(self):
+		unlisted = self.frappe.db.sql(
+			"""
+			select item.name from `tabItem` item
+			join `tabItem Price` price on price.item_code = item.name and price.price_list = 'FerreTlap Retail'
+			left join `tabWebsite Item` web on web.item_code = item.name
+			where web.name is null and item.disabled = 0 and price.price_list_rate > 0
+			order by item.name limit 1
+			""",
+			pluck=True,
+		)[0]
+		self.events.queue_item_sync(self.frappe._dict(doctype="Item", name=unlisted))
+		self.assertEqual(self.pending(), {unlisted})
+
+		self.events.process_pending_item_sync()
+		self.assertFalse(self.pending())
+		self.assertEqual(self.published(unlisted), 1)
+
+	def test_auto_unpublished_item_is_published_again(self):
+		code = self.published_code
+		self.frappe.db.sql("update `tabItem` set disabled = 1 where name = %s", code)
+		self.events.sync_website_items([code])
+		self.assertEqual(self.published(code), 0)
+
+		self.frappe.db.sql("update `tabItem` set disabled = 0 where name = %s", code)
+		self.events.sync_website_items([code])
+		self.frappe.db.commit()
+		self.assertEqual(self.published(code), 1)
+
+	def test_manually_unpublished_item_stays_unpublished(self):
+		code = self.published_code
+		self.frappe.db.sql("update `tabWebsite Item` set published = 0 where item_code = %s", code)
+		self.events.sync_website_items([code])
+		self.assertEqual(self.published(code), 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
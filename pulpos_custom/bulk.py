@@ -0,0 +1,152 @@
+"""Set-based helpers for reading and writing many rows with a bounded number of statements."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import frappe
+from frappe.utils import now
+
+
+def iter_pages(
+	doctype: str,
+	fields: list[str],
+	filters: dict | None = None,
+	page_size: int = 500,
+) -> Iterator[list]:
+	"""
+	Yield rows of `doctype` in pages of `page_size`, in primary key order.
+
+	- Keyset pagination (`name > last name`), so each page costs one indexed query
+	  however deep into the table it is, and rows are never held past their page.
+	- Only `fields` are read (`name` is always included); keep long text columns
+	  out unless the caller needs them for every row.
+	"""
+	page_size = max(1, int(page_size or 1))
+	fields = fields if "name" in fields else ["name", *fields]
+	conditions = [
+		[doctype, field, *(value if isinstance(value, list) else ["=", value])]
+		for field, value in (filters or {}).items()
+	]
+	last_name = None
+	while True:
+		page_filters = conditions if last_name is None else [*conditions, [doctype, "name", ">", last_name]]
+		page = frappe.get_all(
+			doctype, filters=page_filters, fields=fields, order_by="name asc", limit_page_length=page_size
+		)
+		if page:
+			yield page
+		if len(page) < page_size:
+			return
+		last_name = page[-1].name
+
+
+def bulk_insert_docs(
+	doctype: str,
+	rows: list[dict],
+	batch_size: int = 500,
+	commit: bool = True,
+) -> int:
+	"""
+	Insert plain row dicts into a DocType table in batches.
+
+	- Bypasses controller hooks, so callers must pre-compute any derived fields.
+	- Fills the standard columns (name, owner, creation, modified) when missing.
+	- Commits after each batch when `commit` is set so long backfills are chunked.
+
+	Returns the number of rows inserted.
+	"""
+	if not rows:
+		return 0
+
+	batch_size = max(1, int(batch_size or 1))
+	timestamp = now()
+	user = frappe.session.user if getattr(frappe, "session", None) else "Administrator"
+
+	for row in rows:
+		row.setdefault("name", frappe.generate_hash(length=10))
+		row.setdefault("owner", user)
+		row.setdefault("modified_by", user)
+		row.setdefault("creation", timestamp)
+		row.setdefault("modified", timestamp)
+		row.setdefault("docstatus", 0)
+
+	fields = list(rows[0].keys())
+	inserted = 0
+	for start in range(0, len(rows), batch_size):
+		chunk = rows[start : start + batch_size]
+		frappe.db.bulk_insert(doctype, fields, [tuple(row.get(f) for f in fields) for row in chunk])
+		inserted += len(chunk)
+		if commit:
+			frappe.db.commit()
+
+	return inserted
+
+
+class BulkUpdater:
+	"""
+	Collect `{name: values}` changes for one DocType and write them as grouped UPDATEs.
+
+	- Rows with identical values share one `UPDATE ... WHERE name IN (...)` per batch.
+	- Bypasses controller hooks and the document cache, like `frappe.db.set_value`.
+	- `update_modified=False` leaves `modified`/`modified_by` untouched.
+
+	Use as a context manager to flush on exit, or call `flush()` which returns
+	the number of rows affected.
+	"""
+
+	def __init__(
+		self,
+		doctype: str,
+		batch_size: int = 500,
+		update_modified: bool = True,
+		commit: bool = False,
+	):
+		self.doctype = doctype
+		self.batch_size = max(1, int(batch_size or 1))
+		self.update_modified = update_modified
+		self.commit = commit
+		self.affected = 0
+		self._pending: dict[str, dict] = {}
+
+	def add(self, name: str, values: dict):
+		"""Queue `values` for `name`; later values for the same row are merged in."""
+		if values:
+			self._pending.setdefault(name, {}).update(values)
+
+	def __len__(self) -> int:
+		return len(self._pending)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type is None:
+			self.flush()
+
+	def flush(self) -> int:
+		"""Write all queued changes and return the rows affected so far."""
+		groups: dict[tuple, list[str]] = {}
+		for name, values in self._pending.items():
+			groups.setdefault(tuple(sorted(values.items())), []).append(name)
+		self._pending = {}
+
+		timestamp = now()
+		user = frappe.session.user if getattr(frappe, "session", None) else "Administrator"
+		for values, names in groups.items():
+			assignments = dict(values)
+			if self.update_modified:
+				assignments["modified"] = timestamp
+				assignments["modified_by"] = user
+			set_clause = ", ".join(f"`{field}` = %s" for field in assignments)
+			for start in range(0, len(names), self.batch_size):
+				chunk = names[start : start + self.batch_size]
+				frappe.db.sql(
+					f"update `tab{self.doctype}` set {set_clause} where name in %s",
+					(*assignments.values(), tuple(chunk)),
+				)
+				self.affected += frappe.db._cursor.rowcount
+				if self.commit:
+					frappe.db.commit()
+
+		return self.affected
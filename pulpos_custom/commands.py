@@ -0,0 +1,115 @@
+"""bench commands: run the setup hook on many sites at once."""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+from frappe.commands import pass_context
+from frappe.exceptions import SiteNotSpecifiedError
+
+DEFAULT_PROCESSES = 4
+
+
+def run_setup_on_sites(
+	sites: list[str],
+	steps: list[str] | None = None,
+	force: bool = False,
+	processes: int = DEFAULT_PROCESSES,
+	sites_path: str = ".",
+) -> dict:
+	"""
+	Run `ensure_setup_and_publish` on every site in a pool of `processes` workers.
+
+	Each worker opens its own site connection, so one site failing (or its worker
+	dying) is recorded in that site's entry and the other sites carry on.
+	"""
+	started = time.perf_counter()
+	results = []
+	sites_path = os.path.abspath(sites_path)
+	# Fresh interpreters rather than forks: no frappe.local or DB socket is shared
+	with ProcessPoolExecutor(
+		max_workers=max(1, min(processes, len(sites))), mp_context=multiprocessing.get_context("spawn")
+	) as pool:
+		futures = {pool.submit(_run_site, site, sites_path, steps, force): site for site in sites}
+		for future in as_completed(futures):
+			try:
+				results.append(future.result())
+			except Exception as exc:
+				results.append({"site": futures[future], "status": "failed", "error": repr(exc)})
+
+	results.sort(key=lambda result: sites.index(result["site"]))
+	return {
+		"wall_time": round(time.perf_counter() - started, 4),
+		"processes": processes,
+		"steps": steps or "all",
+		"force": force,
+		"ok": sum(result["status"] == "ok" for result in results),
+		"failed": sum(result["status"] == "failed" for result in results),
+		"sites": results,
+	}
+
+
+def _run_site(site: str, sites_path: str, steps: list[str] | None, force: bool) -> dict:
+	import frappe
+
+	started = time.perf_counter()
+	result = {"site": site}
+	try:
+		frappe.init(site=site, sites_path=sites_path)
+		frappe.connect()
+		if "pulpos_custom" not in frappe.get_installed_apps():
+			result["status"] = "skipped"
+		else:
+			from pulpos_custom.setup import ensure_setup_and_publish
+
+			result["report"] = ensure_setup_and_publish(force=int(force), steps=steps)
+			frappe.db.commit()
+			result["status"] = "ok"
+	except Exception as exc:
+		if getattr(frappe.local, "db", None):
+			frappe.db.rollback()
+		result.update(status="failed", error=repr(exc), traceback=traceback.format_exc())
+	finally:
+		frappe.destroy()
+	result["wall_time"] = round(time.perf_counter() - started, 4)
+	return result
+
+
+@click.command("pulpos-setup")
+@click.option("--steps", help="Comma separated setup steps to run (default: all, subject to fingerprints)")
+@click.option("--force", is_flag=True, default=False, help="Run steps even if their inputs are unchanged")
+@click.option("--processes", type=int, default=DEFAULT_PROCESSES, show_default=True, help="Sites run at once")
+@click.option("--output", type=click.Path(dir_okay=False), help="Also write the JSON report to this file")
+@pass_context
+def pulpos_setup(context, steps=None, force=False, processes=DEFAULT_PROCESSES, output=None):
+	"""Run the pulpos_custom setup hook on the given sites in parallel (`bench --site all pulpos-setup`)."""
+	if not context.sites:
+		raise SiteNotSpecifiedError
+
+	steps = [step.strip() for step in steps.split(",") if step.strip()] if steps else None
+	report = run_setup_on_sites(list(context.sites), steps=steps, force=force, processes=processes)
+
+	for result in report["sites"]:
+		line = f"{result['site']}: {result['status']} in {result.get('wall_time', 0):.2f}s"
+		if result.get("report"):
+			line += f", {result['report']['queries']} queries"
+		if result.get("error"):
+			line += f" - {result['error']}"
+		click.echo(line)
+	click.echo(f"{report['ok']} ok, {report['failed']} failed in {report['wall_time']:.2f}s")
+
+	if output:
+		with open(output, "w") as f:
+			json.dump(report, f, indent=1, default=str)
+	if report["failed"]:
+		sys.exit(1)
+
+
+commands = [pulpos_setup]
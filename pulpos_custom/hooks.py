@@ -9,12 +9,10 @@ app_license = "MIT"
 # ------------------
 
 # include js, css files in header of desk.html
-app_include_css = [
-	"/assets/pulpos_custom/css/pulpos_custom.css",
-	"/assets/pulpos_custom/css/pulpos_theme.css",
-	"/assets/pulpos_custom/css/pos_theme.css",
-]
-app_include_js = "/assets/pulpos_custom/js/pulpos_custom.js"
+# Bundle names resolve to content-hashed files via sites/assets/assets.json, written by `bench build`.
+# The stub loads pulpos_pos.bundle.{js,css} on POS routes and pulpos_sales_form.bundle.js on sales forms.
+app_include_css = "pulpos_custom.bundle.css"
+app_include_js = "pulpos_custom.bundle.js"
 
 # include js, css files in header of web template
 web_include_css = "/assets/pulpos_custom/css/website_products.css"
@@ -120,34 +118,91 @@ web_include_css = "/assets/pulpos_custom/css/website_products.css"
 # ---------------
 # Hook on document methods and events
 
-# doc_events = {
-# 	"*": {
-# 		"on_update": "method",
-# 		"on_cancel": "method",
-# 		"on_trash": "method"
-# 	}
-# }
+doc_events = {
+	"Item": {
+		"on_update": [
+			"pulpos_custom.website_events.queue_item_sync",
+			"pulpos_custom.search_index.queue_index_update",
+			"pulpos_custom.pos_scan.on_item_change",
+		],
+		"on_trash": [
+			"pulpos_custom.website_events.queue_item_sync",
+			"pulpos_custom.pos_catalog.bump_catalog_epoch",
+			"pulpos_custom.search_index.queue_index_update",
+			"pulpos_custom.pos_scan.on_item_change",
+		],
+		# The search index drops the old code and indexes the new one
+		"after_rename": "pulpos_custom.search_index.queue_index_update",
+	},
+	# The price cache is cleared first, so the sync job queued after commit never reads stale prices
+	"Item Price": {
+		"on_update": [
+			"pulpos_custom.pricing.on_item_price_change",
+			"pulpos_custom.pos_scan.on_price_or_stock_change",
+			"pulpos_custom.website_events.queue_item_sync",
+			"pulpos_custom.pos_catalog.bump_catalog_epoch",
+		],
+		"on_trash": [
+			"pulpos_custom.pricing.on_item_price_change",
+			"pulpos_custom.pos_scan.on_price_or_stock_change",
+			"pulpos_custom.website_events.queue_item_sync",
+			"pulpos_custom.pos_catalog.bump_catalog_epoch",
+		],
+	},
+	"Warehouse": {
+		"on_update": "pulpos_custom.stock_rollup.on_warehouse_change",
+		"on_trash": "pulpos_custom.stock_rollup.on_warehouse_change",
+	},
+	"Website Item": {
+		"on_update": [
+			"pulpos_custom.website_catalog.refresh_catalog_row",
+			"pulpos_custom.search_index.queue_index_update",
+		],
+		"on_trash": [
+			"pulpos_custom.website_catalog.refresh_catalog_row",
+			"pulpos_custom.search_index.queue_index_update",
+		],
+	},
+	# ERPNext writes Bin quantities with frappe.db.set_value, which fires no Bin doc_events;
+	# cancelling a voucher submits reversing entries, so on_submit covers both directions
+	"Stock Ledger Entry": {
+		"on_submit": "pulpos_custom.stock_events.on_stock_change",
+		"on_cancel": "pulpos_custom.stock_events.on_stock_change",
+	},
+	# Stock is checked under Bin locks so concurrent terminals cannot oversell a SKU
+	"Sales Order": {
+		"before_submit": "pulpos_custom.stock.validate_stock_on_submit",
+	},
+	"Sales Invoice": {
+		"before_submit": "pulpos_custom.stock.validate_stock_on_submit",
+	},
+	"POS Invoice": {
+		"before_submit": "pulpos_custom.stock.validate_stock_on_submit",
+	},
+	# Load barcodes, prices and stock for the register before its first scan
+	"POS Opening Entry": {
+		"on_submit": "pulpos_custom.pos_scan.on_pos_opening",
+	},
+}
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"pulpos_custom.tasks.all"
-# 	],
-# 	"daily": [
-# 		"pulpos_custom.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"pulpos_custom.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"pulpos_custom.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"pulpos_custom.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	# Reserved/ordered quantities and reposts reach Bin without a Stock Ledger Entry
+	"cron": {
+		"*/5 * * * *": [
+			"pulpos_custom.stock_events.sync_modified_bins",
+		],
+	},
+	"hourly": [
+		"pulpos_custom.website_events.sync_modified_items",
+	],
+	# Dated Item Prices take effect by date, without any row being modified
+	"daily": [
+		"pulpos_custom.website_catalog.rebuild_website_catalog",
+	],
+}
 
 # Testing
 # -------
@@ -157,10 +212,12 @@ web_include_css = "/assets/pulpos_custom/css/website_products.css"
 # Overriding Methods
 # ------------------------------
 #
-# override_whitelisted_methods = {
-# 	"frappe.desk.doctype.event.event.get_events": "pulpos_custom.event.get_events"
-# }
-#
+# /all-products reads price and stock from the materialised website catalog
+override_whitelisted_methods = {
+	"erpnext.e_commerce.api.get_product_filter_data": "pulpos_custom.website_catalog.get_product_filter_data"
+}
+
+
 # each overriding function accepts a `data` argument;
 # generated from the base implementation of the doctype dashboard,
 # along with any modifications made in other Frappe apps
@@ -169,7 +226,10 @@ web_include_css = "/assets/pulpos_custom/css/website_products.css"
 # }
 
 # Run setup after migrations to ensure baseline data and website items
-after_migrate = "pulpos_custom.setup.ensure_setup_and_publish"
+after_migrate = [
+	"pulpos_custom.setup.ensure_setup_and_publish",
+	"pulpos_custom.website_catalog.ensure_catalog_table",
+]
 
 # exempt linked doctypes from being automatically cancelled
 #
@@ -0,0 +1,156 @@
+"""Resized, compressed image derivatives for Website Item thumbnails and listings."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import frappe
+
+from pulpos_custom.bulk import BulkUpdater
+from pulpos_custom.profiling import profiled
+
+DERIVATIVE_DIR = "derivatives"
+DERIVATIVE_FORMAT = "webp"
+DERIVATIVE_QUALITY = 80
+# Longest edge in pixels per derivative kind
+DERIVATIVE_SIZES = {"thumbnail": 240, "listing": 640}
+# Below this many images the process pool costs more than it saves
+POOL_THRESHOLD = 8
+# Redis hash: source image URL -> its listing derivative URL, for POS cards and shop listings
+LISTING_KEY = "pulpos_custom:image_listing"
+
+
+@profiled
+def generate_website_thumbnails(website_items: list[str] | None = None, processes: int | None = None) -> dict:
+	"""
+	Build thumbnail/listing derivatives for Website Item images and point `thumbnail` at them.
+
+	- Derivatives are named by the source content hash, so unchanged images are skipped.
+	- Encoding runs in a process pool; only public `/files/...` images are handled.
+	- Listing derivatives are recorded for `get_listing_images`; images that fail to
+	  decode or write are logged with their path and counted as `failed`.
+
+	Run with:
+	bench --site <site> execute "pulpos_custom.images.generate_website_thumbnails"
+	"""
+	filters = {"website_image": ["is", "set"]}
+	if website_items is not None:
+		if not website_items:
+			return {"updated": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+		filters["name"] = ["in", website_items]
+
+	rows = frappe.get_all("Website Item", filters=filters, fields=["name", "website_image", "thumbnail"])
+	output_dir = frappe.get_site_path("public", "files", DERIVATIVE_DIR)
+	os.makedirs(output_dir, exist_ok=True)
+
+	jobs = {}
+	skipped = 0
+	for row in rows:
+		source = _local_path(row.website_image)
+		if not source:
+			skipped += 1
+			continue
+		jobs.setdefault(source, []).append(row)
+
+	args = [(source, output_dir) for source in jobs]
+	if len(args) < POOL_THRESHOLD:
+		results = [_make_derivatives(arg) for arg in args]
+	else:
+		with ProcessPoolExecutor(max_workers=processes) as pool:
+			results = list(pool.map(_make_derivatives, args, chunksize=4))
+
+	updated = unchanged = failed = 0
+	listing = {}
+	updater = BulkUpdater("Website Item", update_modified=False)
+	for (source, _), (files, error) in zip(args, results):
+		if error:
+			frappe.log_error(title=f"Image derivative failed: {source}", message=error)
+			failed += len(jobs[source])
+			continue
+		thumbnail_url = f"/files/{DERIVATIVE_DIR}/{files['thumbnail']}"
+		for row in jobs[source]:
+			listing[row.website_image] = f"/files/{DERIVATIVE_DIR}/{files['listing']}"
+			if row.thumbnail == thumbnail_url:
+				unchanged += 1
+				continue
+			updater.add(row.name, {"thumbnail": thumbnail_url})
+			updated += 1
+	# Rows sharing a source share its thumbnail, so they go out as one UPDATE
+	updater.flush()
+
+	if listing:
+		frappe.cache().pipeline().hset(frappe.cache().make_key(LISTING_KEY), mapping=listing).execute()
+	return {"updated": updated, "unchanged": unchanged, "skipped": skipped, "failed": failed}
+
+
+def get_listing_images(image_urls) -> dict[str, str]:
+	"""
+	Map image URLs to their listing derivative, in one Redis read.
+
+	URLs without a generated derivative map to themselves, so callers can always substitute.
+	"""
+	urls = list({url for url in image_urls if url})
+	if not urls:
+		return {}
+	cache = frappe.cache()
+	(found,) = cache.pipeline().hmget(cache.make_key(LISTING_KEY), urls).execute()
+	return {
+		url: (derivative.decode() if isinstance(derivative, bytes) else derivative) or url
+		for url, derivative in zip(urls, found)
+	}
+
+
+def _local_path(image_url: str | None) -> str | None:
+	"""Map a public `/files/...` URL to its path on disk."""
+	if not image_url or not image_url.startswith("/files/"):
+		return None
+	path = frappe.get_site_path("public", "files", image_url[len("/files/") :].split("?")[0])
+	return path if os.path.isfile(path) else None
+
+
+def _make_derivatives(args: tuple[str, str]) -> tuple[dict | None, str | None]:
+	"""
+	Process-pool worker: write every missing derivative for one source image.
+
+	Returns `(files, None)`, or `(None, traceback)` for the parent to log (workers have no db).
+	"""
+	source, output_dir = args
+	try:
+		from PIL import Image, ImageOps
+
+		digest = _content_hash(source)
+		files = {kind: _derivative_name(digest, kind) for kind in DERIVATIVE_SIZES}
+		missing = {
+			kind: name for kind, name in files.items() if not os.path.exists(os.path.join(output_dir, name))
+		}
+		if missing:
+			with Image.open(source) as img:
+				img = ImageOps.exif_transpose(img)
+				if img.mode not in ("RGB", "RGBA"):
+					img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+				for kind, name in missing.items():
+					size = DERIVATIVE_SIZES[kind]
+					resized = img.copy()
+					resized.thumbnail((size, size))
+					target = os.path.join(output_dir, name)
+					tmp = f"{target}.tmp"
+					resized.save(tmp, format=DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY)
+					os.replace(tmp, target)
+		return files, None
+	except Exception:
+		return None, traceback.format_exc()
+
+
+def _content_hash(path: str) -> str:
+	digest = hashlib.sha1()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 16), b""):
+			digest.update(chunk)
+	return digest.hexdigest()[:20]
+
+
+def _derivative_name(digest: str, kind: str) -> str:
+	return f"{digest}-{kind}-{DERIVATIVE_SIZES[kind]}.{DERIVATIVE_FORMAT}"
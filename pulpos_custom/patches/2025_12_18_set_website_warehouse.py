@@ -1,25 +1,21 @@
 import frappe
 
+from pulpos_custom.bulk import BulkUpdater
+from pulpos_custom.setup_context import get_setup_context
+from pulpos_custom.stock_matrix import StockMatrix
+
 
 def execute():
 	"""Force website items to use the POS warehouse so stock matches POS."""
-	pos_wh = frappe.db.get_value("POS Profile", {"name": "POS FerreTlap Main"}, "warehouse")
-	if not pos_wh:
-		pos_profiles = frappe.get_all(
-			"POS Profile",
-			fields=["warehouse"],
-			filters={"warehouse": ["is", "set"]},
-			order_by="modified desc",
-			limit_page_length=1,
-		)
-		pos_wh = pos_profiles[0].warehouse if pos_profiles else None
+	ctx = get_setup_context()
+	pos_wh = ctx.default_pos_warehouse()
 
 	# Fallbacks if POS Profile warehouse is missing
 	fallback_wh = (
 		frappe.db.get_value(
 			"Warehouse", {"warehouse_name": "FerreTlap Central Warehouse", "is_group": 0}, "name"
 		)
-		or frappe.db.get_value("Warehouse", {"is_group": 0}, "name")
+		or ctx.any_leaf_warehouse()
 	)
 
 	target_wh = pos_wh or fallback_wh
@@ -32,31 +28,33 @@ def execute():
 		fields=["name", "item_code", "website_warehouse"],
 	)
 
+	# Only rows with a different warehouse need a stock probe; read their Bins once
+	to_check = [
+		row.item_code
+		for row in web_items
+		if row.website_warehouse and row.website_warehouse != target_wh
+	]
+	stock = StockMatrix.load(to_check)
+
+	has_show_stock = ctx.has_column("Website Item", "show_stock_availability")
+	has_show_price = ctx.has_column("Website Item", "show_price")
+
+	updater = BulkUpdater("Website Item", update_modified=False)
 	for row in web_items:
 		# If already set to target, skip
 		if row.website_warehouse == target_wh:
 			continue
 
 		# If the existing website warehouse has stock, keep it; else use target
-		if row.website_warehouse and _has_stock(row.item_code, row.website_warehouse):
+		if row.website_warehouse and stock.has_stock(row.item_code, row.website_warehouse):
 			continue
 
 		payload = {"website_warehouse": target_wh}
-		if frappe.db.has_column("Website Item", "show_stock_availability"):
+		if has_show_stock:
 			payload["show_stock_availability"] = 1
-		if frappe.db.has_column("Website Item", "show_price"):
+		if has_show_price:
 			payload["show_price"] = 1
 
-		frappe.db.set_value("Website Item", row.name, payload, update_modified=False)
-
+		updater.add(row.name, payload)
 
-def _has_stock(item_code: str, warehouse: str) -> bool:
-	if not item_code or not warehouse:
-		return False
-	qty = frappe.db.get_value(
-		"Bin", {"item_code": item_code, "warehouse": warehouse}, "actual_qty"
-	)
-	try:
-		return float(qty or 0) > 0
-	except Exception:
-		return False
+	updater.flush()
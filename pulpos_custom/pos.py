@@ -0,0 +1,110 @@
+"""Server-paged item feed for the Point of Sale item selector."""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import cint
+
+from pulpos_custom.images import get_listing_images
+from pulpos_custom.pricing import get_item_prices, select_price
+from pulpos_custom.stock_rollup import get_rollup_qtys
+
+POS_PAGE_LENGTH = 40
+MAX_PAGE_LENGTH = 200
+
+
+@frappe.whitelist()
+def get_pos_items(
+	pos_profile: str,
+	item_group: str | None = None,
+	search_term: str | None = None,
+	after: str | None = None,
+	page_length: int = POS_PAGE_LENGTH,
+) -> dict:
+	"""
+	Return one page of sellable Items for a POS Profile, ordered by item code.
+
+	- Price comes from the profile's `selling_price_list`, stock from its warehouse.
+	- `item_group` includes its descendants; `search_term` matches a barcode exactly,
+	  otherwise part of the item code or name.
+	- Pass the returned `next` as `after` to fetch the following page (keyset pagination).
+
+	Items carry the field names ERPNext's POS item selector renders.
+	"""
+	frappe.has_permission("POS Profile", "read", pos_profile, throw=True)
+	profile = frappe.get_cached_doc("POS Profile", pos_profile)
+	page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+
+	conditions = ["item.disabled = 0", "item.has_variants = 0", "item.is_sales_item = 1"]
+	values = {"limit": page_length + 1, "warehouse": profile.warehouse}
+	if after:
+		conditions.append("item.name > %(after)s")
+		values["after"] = after
+	if item_group:
+		conditions.append(
+			"""exists (
+				select 1 from `tabItem Group` ig, `tabItem Group` parent_ig
+				where parent_ig.name = %(item_group)s and ig.name = item.item_group
+				and ig.lft >= parent_ig.lft and ig.rgt <= parent_ig.rgt
+			)"""
+		)
+		values["item_group"] = item_group
+	barcode_item = None
+	if search_term:
+		barcode_item = frappe.db.get_value("Item Barcode", {"barcode": search_term}, "parent")
+		if barcode_item:
+			conditions.append("item.name = %(barcode_item)s")
+			values["barcode_item"] = barcode_item
+		else:
+			conditions.append("(item.name like %(search)s or item.item_name like %(search)s)")
+			values["search"] = f"%{search_term}%"
+	if profile.get("hide_unavailable_items") and profile.warehouse:
+		conditions.append(
+			"""(item.is_stock_item = 0 or exists (
+				select 1 from `tabBin` bin
+				where bin.item_code = item.name and bin.warehouse = %(warehouse)s and bin.actual_qty > 0
+			))"""
+		)
+
+	items = frappe.db.sql(
+		f"""
+		select item.name as item_code, item.item_name, item.item_group, item.image as item_image,
+			item.stock_uom, item.is_stock_item
+		from `tabItem` item
+		where {" and ".join(conditions)}
+		order by item.name
+		limit %(limit)s
+		""",
+		values,
+		as_dict=True,
+	)
+	has_more = len(items) > page_length
+	items = items[:page_length]
+
+	add_price_and_stock(items, profile)
+	result = {"items": items, "next": items[-1].item_code if has_more else None}
+	if search_term and barcode_item:
+		# Lets the selector auto-add a scanned item, as it does for ERPNext's own feed
+		result["barcode"] = search_term
+	return result
+
+
+def add_price_and_stock(items: list, profile) -> list:
+	"""
+	Set `uom`, `price_list_rate`, `currency` and `actual_qty` on Item rows for a POS Profile.
+
+	`item_image` is swapped for its listing-size derivative where one was generated.
+	"""
+	codes = [item.item_code for item in items]
+	prices = get_item_prices(codes, profile.selling_price_list)
+	images = get_listing_images(item.item_image for item in items)
+	# A group warehouse on the profile reads its subtree total from the rollup
+	stock = get_rollup_qtys([(code, profile.warehouse) for code in codes]) if profile.warehouse else {}
+	for item in items:
+		rate, currency = select_price(prices.get(item.item_code, {}), stock_uom=item.stock_uom)
+		item.uom = item.stock_uom
+		item.price_list_rate = rate
+		item.currency = currency or profile.currency
+		item.actual_qty = stock.get((item.item_code, profile.warehouse), 0.0)
+		item.item_image = images.get(item.item_image, item.item_image)
+	return items
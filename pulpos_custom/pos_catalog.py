@@ -0,0 +1,224 @@
+"""Versioned POS catalog snapshots that terminals cache and refresh with deltas."""
+
+from __future__ import annotations
+
+import datetime
+import gzip
+import hashlib
+import json
+
+import frappe
+from frappe.utils import cint, flt, get_datetime, nowdate
+from werkzeug.wrappers import Response
+
+from pulpos_custom.images import get_listing_images
+from pulpos_custom.pricing import get_item_prices, select_price
+
+EPOCH_KEY = "pulpos_custom_pos_catalog_epoch"
+SNAPSHOT_CACHE_KEY = "pulpos_custom:pos_catalog"
+SNAPSHOT_CACHE_TTL = 600  # seconds
+# Deltas re-send rows modified shortly before the client's version, so a transaction
+# that started earlier but committed later is not missed
+DELTA_OVERLAP = 120  # seconds
+# Past this many changed items a full snapshot is cheaper than a delta
+MAX_DELTA_ITEMS = 5000
+SNAPSHOT_FIELDS = (
+	"item_code",
+	"item_name",
+	"item_group",
+	"stock_uom",
+	"item_image",
+	"is_stock_item",
+	"price_list_rate",
+	"actual_qty",
+)
+
+
+@frappe.whitelist()
+def get_pos_catalog(pos_profile: str, since: str | None = None):
+	"""
+	Return the POS Profile's catalog snapshot, or only the changes since `since`.
+
+	- The body carries `version`; pass it back as `since` on the next request.
+	- Responses have a weak ETag for the current version, so a terminal that is
+	  already up to date gets `304 Not Modified` via `If-None-Match`.
+	- Bodies are gzip-compressed when the client accepts it and cached per version,
+	  so many terminals opening at once build each snapshot only once.
+	"""
+	frappe.has_permission("POS Profile", "read", pos_profile, throw=True)
+	profile = frappe.get_cached_doc("POS Profile", pos_profile)
+	version = get_catalog_version(profile)
+	etag = hashlib.sha1(f"{profile.name}:{version}".encode()).hexdigest()[:20]
+
+	request = getattr(frappe, "request", None)
+	if request and request.if_none_match.contains_weak(etag):
+		response = Response(status=304)
+	else:
+		cache_key = f"{SNAPSHOT_CACHE_KEY}:{profile.name}:{version}:{since or 'full'}"
+		body = frappe.cache().get_value(cache_key)
+		if body is None:
+			snapshot = build_catalog_snapshot(profile, version, since)
+			body = gzip.compress(json.dumps(snapshot, separators=(",", ":"), default=str).encode())
+			frappe.cache().set_value(cache_key, body, expires_in_sec=SNAPSHOT_CACHE_TTL)
+
+		response = Response(mimetype="application/json")
+		if request and "gzip" in (request.headers.get("Accept-Encoding") or ""):
+			response.data = body
+			response.headers["Content-Encoding"] = "gzip"
+		else:
+			response.data = gzip.decompress(body)
+		response.vary.add("Accept-Encoding")
+
+	response.set_etag(etag, weak=True)
+	response.headers["Cache-Control"] = "private, no-cache"
+	return response
+
+
+def get_catalog_version(profile) -> str:
+	"""
+	Version of a profile's catalog: `<config>.<epoch>.<watermark>`.
+
+	- config changes when the profile's warehouse or price list changes, and daily,
+	  since dated Item Prices (`valid_from`/`valid_upto`) start and end by date.
+	- epoch is bumped on deletions, which a `modified` watermark cannot see.
+	- watermark is the latest `modified` of the Items, Prices and Bins it reads.
+	"""
+	config = hashlib.sha1(
+		f"{profile.warehouse}|{profile.selling_price_list}|{nowdate()}".encode()
+	).hexdigest()[:8]
+	epoch = cint(frappe.db.get_global(EPOCH_KEY))
+	watermark = frappe.db.sql(
+		"""
+		select max(modified) from (
+			select max(modified) as modified from `tabItem`
+			union all
+			select max(modified) from `tabItem Price` where price_list = %(price_list)s
+			union all
+			select max(modified) from `tabBin` where warehouse = %(warehouse)s
+		) sources
+		""",
+		{"price_list": profile.selling_price_list, "warehouse": profile.warehouse},
+	)[0][0]
+	return f"{config}.{epoch}.{get_datetime(watermark).isoformat() if watermark else ''}"
+
+
+def build_catalog_snapshot(profile, version: str, since: str | None = None) -> dict:
+	"""
+	Build a compact snapshot: item rows as lists in `fields` order.
+
+	A delta (`full: 0`) has the changed rows and the codes to drop in `removed`; a
+	full snapshot also carries the Item Group tree (`{name: [lft, rgt]}`) for filtering.
+	"""
+	changed = _changed_items(profile, version, since)
+	if changed is not None and len(changed) > MAX_DELTA_ITEMS:
+		changed = None
+
+	snapshot = {
+		"version": version,
+		"full": 1 if changed is None else 0,
+		"pos_profile": profile.name,
+		"warehouse": profile.warehouse,
+		"price_list": profile.selling_price_list,
+		"currency": profile.currency,
+		"hide_unavailable_items": cint(profile.get("hide_unavailable_items")),
+		"fields": SNAPSHOT_FIELDS,
+		"items": [],
+		"removed": [],
+	}
+	if changed is not None and not changed:
+		return snapshot
+
+	filters = {"disabled": 0, "has_variants": 0, "is_sales_item": 1}
+	if changed is not None:
+		filters["name"] = ["in", list(changed)]
+	items = frappe.get_all(
+		"Item",
+		filters=filters,
+		fields=["name", "item_name", "item_group", "stock_uom", "image", "is_stock_item"],
+		order_by="name asc",
+	)
+	# A full snapshot reads the whole price list and warehouse instead of a huge IN list
+	codes = None if changed is None else [item.name for item in items]
+	prices = get_item_prices(codes, profile.selling_price_list)
+	stock = _get_stock(codes, profile.warehouse)
+	images = get_listing_images(item.image for item in items)
+
+	for item in items:
+		rate = select_price(prices.get(item.name, {}), stock_uom=item.stock_uom)[0]
+		snapshot["items"].append(
+			[
+				item.name,
+				item.item_name,
+				item.item_group,
+				item.stock_uom,
+				images.get(item.image, item.image),
+				item.is_stock_item,
+				rate,
+				stock.get(item.name, 0.0),
+			]
+		)
+
+	if changed is None:
+		snapshot["item_groups"] = {
+			row.name: [row.lft, row.rgt] for row in frappe.get_all("Item Group", fields=["name", "lft", "rgt"])
+		}
+	else:
+		snapshot["removed"] = sorted(changed - set(codes))
+	return snapshot
+
+
+def bump_catalog_epoch(doc=None, method=None):
+	"""
+	doc_events handler: force full snapshots after deletions.
+
+	An Item Price moved to another price list also disappears from the old list's deltas.
+	"""
+	if method == "on_update":
+		if not doc.get_doc_before_save() or not doc.has_value_changed("price_list"):
+			return
+	frappe.db.set_global(EPOCH_KEY, cint(frappe.db.get_global(EPOCH_KEY)) + 1)
+
+
+def _changed_items(profile, version: str, since: str | None) -> set[str] | None:
+	"""Item codes touched since the client's version, or None when it needs a full snapshot."""
+	if not since:
+		return None
+	try:
+		since_config, since_epoch, since_watermark = since.split(".", 2)
+	except ValueError:
+		return None
+	config, epoch, _watermark = version.split(".", 2)
+	if since_config != config or since_epoch != epoch or not since_watermark:
+		return None
+
+	try:
+		cutoff = get_datetime(since_watermark) - datetime.timedelta(seconds=DELTA_OVERLAP)
+	except Exception:
+		return None
+
+	changed = set(frappe.get_all("Item", filters={"modified": [">=", cutoff]}, pluck="name"))
+	changed.update(
+		frappe.get_all(
+			"Item Price",
+			filters={"price_list": profile.selling_price_list, "modified": [">=", cutoff]},
+			pluck="item_code",
+		)
+	)
+	changed.update(
+		frappe.get_all(
+			"Bin", filters={"warehouse": profile.warehouse, "modified": [">=", cutoff]}, pluck="item_code"
+		)
+	)
+	return changed
+
+
+def _get_stock(item_codes: list[str] | None, warehouse: str | None) -> dict[str, float]:
+	if not warehouse or item_codes == []:
+		return {}
+	filters = {"warehouse": warehouse}
+	if item_codes is not None:
+		filters["item_code"] = ["in", item_codes]
+	return {
+		row.item_code: flt(row.actual_qty)
+		for row in frappe.get_all("Bin", filters=filters, fields=["item_code", "actual_qty"])
+	}
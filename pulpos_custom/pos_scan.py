@@ -0,0 +1,221 @@
+"""Barcode and item code scan lookups for POS checkout, answered from cache."""
+
+from __future__ import annotations
+
+import json
+
+import frappe
+from frappe.utils import cint, nowdate
+
+from pulpos_custom.bulk import iter_pages
+from pulpos_custom.images import get_listing_images
+from pulpos_custom.pricing import get_item_prices, select_price
+from pulpos_custom.stock_rollup import get_rollup_qtys
+
+BARCODES_KEY = "pulpos_custom:scan:barcodes"
+ITEM_BARCODES_KEY = "pulpos_custom:scan:item_barcodes"
+GENERATION_KEY = "pulpos_custom:scan:generation"
+PROFILES_KEY = "pulpos_custom:scan:profiles"
+ENTRIES_KEY = "pulpos_custom:scan:entries"
+# Set once BARCODES_KEY holds every barcode; until then misses are answered from the database
+WARMED_KEY = "pulpos_custom:scan:warmed"
+WARM_BATCH_SIZE = 1000
+# Barcodes a worker remembers before it starts over
+MAX_LOCAL_BARCODES = 10000
+ITEM_FIELDS = ["name", "item_name", "stock_uom", "is_stock_item", "image", "disabled", "has_variants"]
+
+# {site: {"generation": ..., "barcodes": {barcode: [item_code, uom]}}}, per worker; misses are not kept
+_local: dict[str, dict] = {}
+
+
+@frappe.whitelist()
+def scan_item(pos_profile: str, code: str) -> dict | None:
+	"""
+	Resolve a scanned barcode or typed item code for a POS Profile.
+
+	Returns `item_code`, `item_name`, `uom` (the barcode's UOM, else the stock UOM),
+	`price_list_rate`, `currency`, `actual_qty`, `is_stock_item` and `barcode`, or
+	None when nothing matches. A warm lookup is one Redis round trip and no SQL.
+	"""
+	frappe.has_permission("POS Profile", "read", pos_profile, throw=True)
+	code = (code or "").strip()
+	if not code:
+		return None
+	cache = frappe.cache()
+	local = _local.setdefault(frappe.local.site, {"generation": None, "barcodes": {}})
+	# This worker's barcode map says which entry to fetch in the same round trip
+	guess = local["barcodes"].get(code)
+	guessed_code = guess[0] if guess else code
+	generation, value, warmed, entry = (
+		cache.pipeline()
+		.get(cache.make_key(GENERATION_KEY))
+		.hget(cache.make_key(BARCODES_KEY), code)
+		.exists(cache.make_key(WARMED_KEY))
+		.hget(_entries_key(pos_profile), guessed_code)
+		.execute()
+	)
+	if local["generation"] != generation:
+		# Barcodes changed since this worker mapped them
+		local = _local[frappe.local.site] = {"generation": generation, "barcodes": {}}
+
+	if value is None and not warmed:
+		# Barcodes not fully loaded yet: ask the database
+		row = frappe.db.get_value("Item Barcode", {"barcode": code}, ["parent", "uom"], as_dict=True)
+		value = json.dumps([row.parent, row.uom or None]) if row else None
+	barcode = json.loads(value) if value else None
+	if barcode:
+		if len(local["barcodes"]) >= MAX_LOCAL_BARCODES:
+			local["barcodes"].clear()
+		local["barcodes"][code] = barcode
+	item_code, uom = barcode if barcode else (code, None)
+
+	if item_code != guessed_code:
+		(entry,) = cache.pipeline().hget(_entries_key(pos_profile), item_code).execute()
+	entry = json.loads(entry) if entry else None
+	if not entry or entry["date"] != nowdate():
+		# Dated Item Prices may have taken effect since the entry was cached
+		entry = get_scan_entries(pos_profile, [item_code]).get(item_code)
+	if not entry:
+		return None
+	prices = {price_uom: (rate, currency) for price_uom, rate, currency in entry["prices"]}
+	rate, currency = select_price(prices, uom, entry["stock_uom"])
+	return {
+		"item_code": item_code,
+		"item_name": entry["item_name"],
+		"item_image": entry["image"],
+		"uom": uom or entry["stock_uom"],
+		"stock_uom": entry["stock_uom"],
+		"is_stock_item": entry["is_stock_item"],
+		"price_list_rate": rate,
+		"currency": currency or entry["currency"],
+		"actual_qty": entry["actual_qty"],
+		"barcode": code if barcode else None,
+	}
+
+
+def get_scan_entries(pos_profile: str, item_codes: list[str] | None = None) -> dict[str, dict]:
+	"""
+	Build and cache scan entries (item, prices, stock) for these items, or all sellable ones.
+
+	Uses a constant number of queries per `WARM_BATCH_SIZE` items.
+	"""
+	profile = frappe.get_cached_doc("POS Profile", pos_profile)
+	cache = frappe.cache()
+	entries: dict[str, dict] = {}
+	filters = {"disabled": 0, "has_variants": 0, "is_sales_item": 1}
+	if item_codes is not None:
+		filters["name"] = ["in", item_codes]
+
+	for page in iter_pages("Item", ITEM_FIELDS, filters=filters, page_size=WARM_BATCH_SIZE):
+		codes = [item.name for item in page]
+		prices = get_item_prices(codes, profile.selling_price_list)
+		stock = get_rollup_qtys([(code, profile.warehouse) for code in codes]) if profile.warehouse else {}
+		images = get_listing_images(item.image for item in page)
+		pipe = cache.pipeline()
+		for item in page:
+			entries[item.name] = {
+				"item_name": item.item_name,
+				"stock_uom": item.stock_uom,
+				"is_stock_item": cint(item.is_stock_item),
+				"image": images.get(item.image, item.image),
+				"prices": [[uom, rate, currency] for uom, (rate, currency) in prices.get(item.name, {}).items()],
+				"currency": profile.currency,
+				"actual_qty": stock.get((item.name, profile.warehouse), 0.0),
+				"date": nowdate(),
+			}
+			pipe.hset(_entries_key(pos_profile), item.name, json.dumps(entries[item.name]))
+		pipe.sadd(cache.make_key(PROFILES_KEY), pos_profile)
+		pipe.execute()
+	return entries
+
+
+def warm_scan_cache(pos_profile: str):
+	"""Load every barcode and the profile's scan entries into Redis (background job)."""
+	cache = frappe.cache()
+	barcodes: dict[str, list] = {}
+	item_barcodes: dict[str, list] = {}
+	for row in frappe.get_all(
+		"Item Barcode", filters={"parenttype": "Item"}, fields=["parent", "barcode", "uom"]
+	):
+		barcodes[row.barcode] = json.dumps([row.parent, row.uom or None])
+		item_barcodes.setdefault(row.parent, []).append(row.barcode)
+
+	pipe = cache.pipeline()
+	pipe.delete(cache.make_key(BARCODES_KEY), cache.make_key(ITEM_BARCODES_KEY))
+	items = list(barcodes.items())
+	for start in range(0, len(items), WARM_BATCH_SIZE):
+		pipe.hset(cache.make_key(BARCODES_KEY), mapping=dict(items[start : start + WARM_BATCH_SIZE]))
+	owners = [(code, json.dumps(codes)) for code, codes in item_barcodes.items()]
+	for start in range(0, len(owners), WARM_BATCH_SIZE):
+		pipe.hset(cache.make_key(ITEM_BARCODES_KEY), mapping=dict(owners[start : start + WARM_BATCH_SIZE]))
+	pipe.set(cache.make_key(WARMED_KEY), 1)
+	pipe.incr(cache.make_key(GENERATION_KEY))
+	pipe.execute()
+
+	get_scan_entries(pos_profile)
+
+
+def on_pos_opening(doc, method=None):
+	"""POS Opening Entry doc_events handler: warm the cache before the first scan."""
+	frappe.enqueue(
+		"pulpos_custom.pos_scan.warm_scan_cache",
+		queue="short",
+		job_id=f"pulpos_custom_scan_warm:{doc.pos_profile}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		pos_profile=doc.pos_profile,
+	)
+
+
+def on_item_change(doc, method=None):
+	"""Item doc_events handler: re-read its barcodes (a child table) and drop its entries."""
+	item_code = doc.name
+	frappe.db.after_commit.add(lambda: _refresh_item_barcodes(item_code))
+
+
+def on_price_or_stock_change(doc, method=None):
+	"""Item Price and stock change handler: drop the item's entries after commit."""
+	if doc.get("item_code"):
+		item_code = doc.item_code
+		frappe.db.after_commit.add(lambda: forget_items([item_code]))
+
+
+def forget_items(item_codes: list[str]):
+	"""Drop these items' entries from every POS Profile; the next scan rebuilds them."""
+	cache = frappe.cache()
+	(profiles,) = cache.pipeline().smembers(cache.make_key(PROFILES_KEY)).execute()
+	if not profiles or not item_codes:
+		return
+	pipe = cache.pipeline()
+	for profile in profiles:
+		pipe.hdel(_entries_key(profile.decode() if isinstance(profile, bytes) else profile), *item_codes)
+	pipe.execute()
+
+
+def _refresh_item_barcodes(item_code: str):
+	cache = frappe.cache()
+	old, warmed = (
+		cache.pipeline()
+		.hget(cache.make_key(ITEM_BARCODES_KEY), item_code)
+		.exists(cache.make_key(WARMED_KEY))
+		.execute()
+	)
+	pipe = cache.pipeline()
+	# Before the first warm-up there is nothing to patch, and a partial hash must not look loaded
+	if warmed:
+		rows = frappe.get_all(
+			"Item Barcode", filters={"parenttype": "Item", "parent": item_code}, fields=["barcode", "uom"]
+		)
+		if old:
+			pipe.hdel(cache.make_key(BARCODES_KEY), *json.loads(old))
+		for row in rows:
+			pipe.hset(cache.make_key(BARCODES_KEY), row.barcode, json.dumps([item_code, row.uom or None]))
+		pipe.hset(cache.make_key(ITEM_BARCODES_KEY), item_code, json.dumps([row.barcode for row in rows]))
+	# Workers drop their local barcode maps when the generation moves
+	pipe.incr(cache.make_key(GENERATION_KEY))
+	pipe.execute()
+	forget_items([item_code])
+
+
+def _entries_key(pos_profile: str) -> str:
+	return frappe.cache().make_key(f"{ENTRIES_KEY}:{pos_profile}")
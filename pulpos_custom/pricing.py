@@ -0,0 +1,174 @@
+"""Effective Item Price resolution for many items at once, cached per price list and date."""
+
+from __future__ import annotations
+
+import json
+
+import frappe
+from frappe.utils import flt, getdate, nowdate
+
+PRICE_CACHE_KEY = "pulpos_custom:prices"
+PRICE_CACHE_TTL = 6 * 60 * 60  # seconds
+# Marks a (price list, date) hash that holds every priced item, so absent items have no price
+COMPLETE_FIELD = "__complete"
+
+
+def get_item_prices(
+	item_codes: list[str] | None, price_list: str | None, date=None
+) -> dict[str, dict[str | None, tuple[float, str]]]:
+	"""
+	Return `{item_code: {uom or None: (rate, currency)}}` effective on `date` (default today).
+
+	- Only rows valid on `date` (`valid_from`/`valid_upto`) that are not customer,
+	  supplier or batch specific count; the latest `valid_from` wins per UOM, and a
+	  UOM-less row counts for every UOM (as in ERPNext's own price lookup).
+	- `None` is the rate for any other UOM: a UOM-less row, else the first row found.
+	- `item_codes=None` resolves the whole price list.
+
+	Cached items are answered from Redis; the rest come from one Item Price query.
+	"""
+	if item_codes == [] or not price_list:
+		return {}
+	date = str(getdate(date or nowdate()))
+	cache = frappe.cache()
+	key = _cache_key(price_list, date)
+
+	# Hash commands go through a pipeline: the raw client, not the pickling RedisWrapper helpers
+	if item_codes is None:
+		(cached,) = cache.pipeline().hgetall(key).execute()
+		cached = {_decode(field): value for field, value in (cached or {}).items()}
+		if cached.pop(COMPLETE_FIELD, None) is not None:
+			return {code: by_uom for code, value in cached.items() if (by_uom := _load(value))}
+		prices = _query_prices(None, price_list, date)
+		_store(key, prices, complete=True)
+		return prices
+
+	item_codes = list(dict.fromkeys(item_codes))
+	(cached,) = cache.pipeline().hmget(key, [*item_codes, COMPLETE_FIELD]).execute()
+	complete = cached.pop() is not None
+	prices, missing = {}, []
+	for code, value in zip(item_codes, cached):
+		if value is not None:
+			by_uom = _load(value)
+			if by_uom:
+				prices[code] = by_uom
+		elif not complete:
+			missing.append(code)
+
+	if missing:
+		fetched = _query_prices(missing, price_list, date)
+		# Unpriced items are cached as empty so they are not queried again
+		_store(key, {code: fetched.get(code, {}) for code in missing})
+		prices.update(fetched)
+	return prices
+
+
+def select_price(
+	by_uom: dict, uom: str | None = None, stock_uom: str | None = None
+) -> tuple[float, str | None]:
+	"""Pick `(rate, currency)` for `uom`, else the stock UOM, else any UOM; `(0.0, None)` if unpriced."""
+	return (by_uom.get(uom) if uom else None) or by_uom.get(stock_uom) or by_uom.get(None) or (0.0, None)
+
+
+@frappe.whitelist()
+def get_effective_prices(
+	item_codes, price_list: str, date: str | None = None, uom: str | None = None
+) -> dict:
+	"""`{item_code: {"price_list_rate", "currency"}}` for the batch, in `uom` or each item's stock UOM."""
+	frappe.has_permission("Item Price", "read", throw=True)
+	item_codes = frappe.parse_json(item_codes) if isinstance(item_codes, str) else item_codes
+	if not item_codes:
+		return {}
+	prices = get_item_prices(item_codes, price_list, date)
+	stock_uoms = {
+		row.name: row.stock_uom
+		for row in frappe.get_all("Item", filters={"name": ["in", item_codes]}, fields=["name", "stock_uom"])
+	}
+	result = {}
+	for code in item_codes:
+		rate, currency = select_price(prices.get(code, {}), uom, stock_uoms.get(code))
+		result[code] = {"price_list_rate": rate, "currency": currency}
+	return result
+
+
+def clear_price_cache(price_lists: list[str]):
+	"""Drop cached prices of these price lists (every date) by moving them to a new generation."""
+	cache = frappe.cache()
+	pipe = cache.pipeline()
+	for price_list in {pl for pl in price_lists if pl}:
+		pipe.incr(cache.make_key(f"{PRICE_CACHE_KEY}:generation:{price_list}"))
+	pipe.execute()
+
+
+def on_item_price_change(doc, method=None):
+	"""Item Price doc_events handler: invalidate its price list (and the previous one) after commit."""
+	price_lists = [doc.get("price_list")]
+	before = doc.get_doc_before_save() if method == "on_update" else None
+	if before:
+		price_lists.append(before.get("price_list"))
+	# Invalidating before commit would let a concurrent read cache the old price again
+	frappe.db.after_commit.add(lambda: clear_price_cache(price_lists))
+
+
+def _query_prices(item_codes: list[str] | None, price_list: str, date: str) -> dict[str, dict]:
+	values = {"price_list": price_list, "date": date}
+	item_condition = ""
+	if item_codes is not None:
+		item_condition = "and item_code in %(item_codes)s"
+		values["item_codes"] = tuple(item_codes)
+
+	prices: dict[str, dict] = {}
+	any_uom: dict[str, tuple] = {}
+	uom_less_first: set[str] = set()
+	# Ordered so the first row seen for an item and UOM is the effective one; like ERPNext,
+	# a UOM-specific row sorts ahead of a UOM-less one with the same valid_from
+	for item_code, uom, rate, currency in frappe.db.sql(
+		f"""
+		select item_code, uom, price_list_rate, currency
+		from `tabItem Price`
+		where price_list = %(price_list)s {item_condition}
+			and ifnull(customer, '') = '' and ifnull(supplier, '') = '' and ifnull(batch_no, '') = ''
+			and (valid_from is null or valid_from <= %(date)s)
+			and (valid_upto is null or valid_upto >= %(date)s)
+		order by item_code, valid_from desc, uom desc, modified desc
+		""",
+		values,
+	):
+		by_uom = prices.setdefault(item_code, {})
+		if not uom and item_code not in any_uom:
+			uom_less_first.add(item_code)
+		# Like ERPNext, a newer UOM-less row overrides an older UOM-specific one
+		by_uom.setdefault(None if item_code in uom_less_first else uom or None, (flt(rate), currency))
+		any_uom.setdefault(item_code, (flt(rate), currency))
+	# Without a UOM-less row, a UOM-specific price still covers the item
+	for item_code, price in any_uom.items():
+		prices[item_code].setdefault(None, price)
+	return prices
+
+
+def _store(key: str, prices: dict[str, dict], complete: bool = False):
+	pipe = frappe.cache().pipeline()
+	fields = {
+		code: json.dumps([[uom, rate, currency] for uom, (rate, currency) in by_uom.items()])
+		for code, by_uom in prices.items()
+	}
+	if complete:
+		fields[COMPLETE_FIELD] = 1
+	if fields:
+		pipe.hset(key, mapping=fields)
+	pipe.expire(key, PRICE_CACHE_TTL)
+	pipe.execute()
+
+
+def _cache_key(price_list: str, date: str) -> str:
+	cache = frappe.cache()
+	generation = cache.get(cache.make_key(f"{PRICE_CACHE_KEY}:generation:{price_list}"))
+	return cache.make_key(f"{PRICE_CACHE_KEY}:{price_list}:{_decode(generation) or 0}:{date}")
+
+
+def _load(value) -> dict:
+	return {uom: (rate, currency) for uom, rate, currency in json.loads(value)}
+
+
+def _decode(value):
+	return value.decode() if isinstance(value, bytes) else value
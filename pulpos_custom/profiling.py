@@ -0,0 +1,239 @@
+"""Step-level timing and SQL accounting for the setup hook and website sync."""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import frappe
+
+WRITE_VERBS = ("insert", "update", "delete", "replace")
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Call sites listed when a query budget is exceeded
+TOP_CALL_SITES = 10
+
+
+class QueryBudgetExceeded(AssertionError):
+	"""Raised by `query_budget` when a block runs more queries than it declared."""
+
+
+class QueryStats:
+	"""Cumulative counters fed by the `frappe.db.sql` wrapper installed by `collect`."""
+
+	def __init__(self):
+		self.queries = 0
+		self.rows_read = 0
+		self.rows_written = 0
+		# {"setup.py:123 in _fn": queries} while a `query_budget` block is active
+		self.call_sites: Counter | None = None
+
+	def snapshot(self) -> tuple[int, int, int]:
+		return (self.queries, self.rows_read, self.rows_written)
+
+	def record(self, query, result):
+		self.queries += 1
+		if self.call_sites is not None:
+			self.call_sites[_call_site()] += 1
+		verb = str(query).lstrip().split(None, 1)[0].lower() if str(query).strip() else ""
+		if verb in WRITE_VERBS:
+			cursor = getattr(frappe.db, "_cursor", None)
+			rowcount = getattr(cursor, "rowcount", 0) or 0
+			self.rows_written += max(rowcount, 0)
+		elif isinstance(result, (list, tuple)):
+			self.rows_read += len(result)
+
+	def count_rows(self, rows):
+		"""Count rows of an `as_iterator=True` result as they are consumed."""
+		for row in rows:
+			self.rows_read += 1
+			yield row
+
+
+class ProfileReport:
+	def __init__(self, name: str):
+		self.name = name
+		self.stats = QueryStats()
+		self.steps: list[dict] = []
+		self.depth = 0
+		self.started = time.perf_counter()
+
+	def as_dict(self) -> dict:
+		queries, rows_read, rows_written = self.stats.snapshot()
+		return {
+			"name": self.name,
+			"wall_time": round(time.perf_counter() - self.started, 4),
+			"queries": queries,
+			"rows_read": rows_read,
+			"rows_written": rows_written,
+			"steps": self.steps,
+		}
+
+
+def get_active_report() -> ProfileReport | None:
+	return getattr(frappe.local, "pulpos_profile_report", None)
+
+
+@contextmanager
+def collect(name: str):
+	"""
+	Account every query run through `frappe.db.sql` until the block exits.
+
+	Nested `collect` calls are recorded as steps of the outer report. The
+	report is logged to the `pulpos_custom` logger when the outer block exits.
+	"""
+	active = get_active_report()
+	if active:
+		with step(name):
+			yield active
+		return
+
+	report = ProfileReport(name)
+	db = frappe.local.db
+	had_own_sql = "sql" in vars(db)
+	original_sql = db.sql
+
+	def counted_sql(query, *args, **kwargs):
+		result = original_sql(query, *args, **kwargs)
+		report.stats.record(query, result)
+		if kwargs.get("as_iterator"):
+			return report.stats.count_rows(result)
+		return result
+
+	db.sql = counted_sql
+	frappe.local.pulpos_profile_report = report
+	try:
+		yield report
+	finally:
+		if had_own_sql:
+			db.sql = original_sql
+		else:
+			del db.sql
+		frappe.local.pulpos_profile_report = None
+		frappe.logger("pulpos_custom").info(json.dumps(report.as_dict(), default=str))
+
+
+@contextmanager
+def step(name: str):
+	"""Record wall time and query deltas for a block when a report is being collected."""
+	report = get_active_report()
+	if not report:
+		yield
+		return
+
+	entry = {"step": name, "depth": report.depth}
+	report.steps.append(entry)
+	before = report.stats.snapshot()
+	started = time.perf_counter()
+	report.depth += 1
+	try:
+		yield
+	except Exception as exc:
+		entry["error"] = str(exc)
+		raise
+	finally:
+		report.depth -= 1
+		after = report.stats.snapshot()
+		entry["wall_time"] = round(time.perf_counter() - started, 4)
+		entry["queries"] = after[0] - before[0]
+		entry["rows_read"] = after[1] - before[1]
+		entry["rows_written"] = after[2] - before[2]
+
+
+@contextmanager
+def query_budget(max_queries: int, name: str = "query_budget"):
+	"""
+	Fail with `QueryBudgetExceeded` if the block runs more than `max_queries` queries.
+
+	Meant for tests: a budget that holds at two catalog sizes shows the query
+	count does not grow per row. The error lists the app call sites (file, line,
+	function) that ran the most queries, which is where a per-row lookup crept in.
+	"""
+	with collect(name) as report:
+		stats = report.stats
+		outer_sites = stats.call_sites
+		stats.call_sites = Counter()
+		before = stats.queries
+		try:
+			yield report
+		finally:
+			sites = stats.call_sites
+			stats.call_sites = outer_sites
+			if outer_sites is not None:
+				outer_sites.update(sites)
+		queries = stats.queries - before
+
+	if queries > max_queries:
+		lines = [f"{count:>7} x {site}" for site, count in sites.most_common(TOP_CALL_SITES)]
+		raise QueryBudgetExceeded(
+			f"{name} ran {queries} queries, budget is {max_queries}. Top call sites:\n" + "\n".join(lines)
+		)
+
+
+def _call_site() -> str:
+	"""Innermost app frame outside this module, e.g. `website_sync.py:80 in create_website_items`."""
+	frame = sys._getframe(2)
+	while frame:
+		filename = frame.f_code.co_filename
+		if filename.startswith(APP_DIR + os.sep) and filename != __file__:
+			return f"{os.path.relpath(filename, APP_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+		frame = frame.f_back
+	return "<outside pulpos_custom>"
+
+
+def profiled(fn):
+	"""Decorator form of `step`, named after the function's module and name."""
+	name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		with step(name):
+			return fn(*args, **kwargs)
+
+	return wrapper
+
+
+def profile_setup(include_catalog: int = 0, profile: int = 0, profile_path: str | None = None) -> dict:
+	"""
+	Run the after_migrate setup with per-step timing and query counts.
+
+	- `include_catalog=1` also runs the catalog-wide steps (normally background
+	  jobs) synchronously over the whole catalog so they show up in the report.
+	- `profile=1` additionally dumps cProfile stats to `profile_path`
+	  (defaults to the site's logs folder).
+
+	Run with:
+	bench --site <site> execute "pulpos_custom.profiling.profile_setup" --kwargs "{'profile': 1}"
+	"""
+	from pulpos_custom import setup
+	from pulpos_custom.images import generate_website_thumbnails
+	from pulpos_custom.website_sync import create_website_items
+
+	profiler = cProfile.Profile() if profile else None
+	with collect("profile_setup") as report:
+		if profiler:
+			profiler.enable()
+		try:
+			setup.ensure_setup_and_publish()
+			if include_catalog:
+				currency = setup._get_company_currency(setup._ensure_company("FerreTlap"))
+				setup._ensure_item_prices(setup._create_price_lists(currency), currency)
+				create_website_items(price_list="FerreTlap Retail", publish=1, bulk=1)
+				setup._backfill_website_items()
+				generate_website_thumbnails()
+			frappe.db.commit()
+		finally:
+			if profiler:
+				profiler.disable()
+
+	result = report.as_dict()
+	if profiler:
+		profile_path = profile_path or frappe.get_site_path("logs", f"pulpos_setup_{int(time.time())}.prof")
+		profiler.dump_stats(profile_path)
+		result["profile_path"] = profile_path
+	return result
@@ -0,0 +1,52 @@
+// Always-loaded stub: the POS and sales form code is fetched only where it is used.
+// Bundle names resolve to their content-hashed files through the assets.json manifest `bench build` writes.
+
+frappe.provide("pulpos_custom");
+
+const POS_ROUTES = ["point-of-sale", "pos"];
+
+pulpos_custom.is_pos_route = () => {
+	const r = frappe.get_route && frappe.get_route();
+	if (r && r.length && POS_ROUTES.includes(r[0])) return true;
+	// Fallback for direct URL load
+	return window.location.pathname.includes("point-of-sale") || window.location.pathname.endsWith("/pos");
+};
+
+// frappe.require loads each bundle once; later calls resolve immediately
+const loadBundle = (assets) => new Promise((resolve) => frappe.require(assets, resolve));
+
+const onRouteChange = () => {
+	if (!pulpos_custom.is_pos_route()) {
+		document.body.classList.remove("pulpos-pos");
+		return;
+	}
+	loadBundle(["pulpos_pos.bundle.js", "pulpos_pos.bundle.css"]).then(() => pulpos_custom.pos.apply());
+};
+
+frappe.router && frappe.router.on("change", onRouteChange);
+// Direct loads of /app/point-of-sale do not fire a route change
+$(onRouteChange);
+
+frappe.ui.form.on("Item", {
+	refresh(frm) {
+		if (!frm.is_new()) {
+			frm.dashboard.add_comment(
+				"info",
+				__("Remember to set Default Warehouse and Price List rates for accurate selling.")
+			);
+		}
+	},
+});
+
+// Handlers stay registered here so none is missed while the bundle loads on the first form open
+["Sales Order", "Sales Invoice"].forEach((doctype) => {
+	const salesForm = () => loadBundle("pulpos_sales_form.bundle.js").then(() => pulpos_custom.sales_form);
+	frappe.ui.form.on(doctype, {
+		refresh(frm) {
+			return salesForm().then((form) => form.refresh(frm));
+		},
+		validate(frm) {
+			return salesForm().then((form) => form.validate(frm));
+		},
+	});
+});
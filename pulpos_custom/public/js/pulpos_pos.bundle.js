@@ -0,0 +1,497 @@
+// POS page enhancements, loaded by pulpos_custom.bundle.js only on point-of-sale routes.
+(() => {
+	// POS enhancements: dark/yellow skin, quick search focus, quick-pay buttons (non-invasive)
+	let quickPayInjected = false;
+	let posClassApplied = false;
+	let customerSet = false;
+	const DEFAULT_CUSTOMER = "Publico General - 1";
+	let filterButtonAdded = false;
+	let paginationControlsAdded = false;
+	const paginationState = {
+		currentPage: 1,
+		rowsPerPage: Number(localStorage.getItem("pulpos_rows_per_page") || 2) || 2,
+		// cursors[n] is the `after` key for page n + 1; `next` is the key for the page after the current one
+		cursors: [null],
+		next: null,
+		selector: null,
+	};
+	const ROWS_PER_PAGE_OPTIONS = [1, 2, 3, 4];
+
+	const focusPosSearch = () => {
+		const search = document.querySelector(
+			'.pos input[type="text"][placeholder*="Search"], .pos .search-bar input, input[placeholder*="Search Item"]'
+		);
+		if (search) search.focus();
+	};
+
+	const injectQuickPay = () => {
+		if (quickPayInjected) return;
+		const payArea =
+			document.querySelector(".pos .pay-section") ||
+			document.querySelector(".pos .cart-footer") ||
+			document.querySelector(".modal .modal-footer");
+		if (!payArea) return;
+
+		const container = document.createElement("div");
+		container.className = "pulpos-quick-pay";
+
+		[50, 100, 200].forEach((amt) => {
+			const btn = document.createElement("button");
+			btn.type = "button";
+			btn.textContent = `${frappe.sys_defaults && frappe.sys_defaults.currency ? frappe.sys_defaults.currency : "$"}${amt}`;
+			btn.addEventListener("click", () => {
+				const payInput =
+					document.querySelector('.pos input[name="paid_amount"]') ||
+					document.querySelector('.modal input[name="paid_amount"]') ||
+					document.querySelector('.pos input[placeholder*="Amount"]');
+				if (payInput) {
+					payInput.value = amt;
+					payInput.dispatchEvent(new Event("input", { bubbles: true }));
+				}
+			});
+			container.appendChild(btn);
+		});
+
+		payArea.prepend(container);
+		quickPayInjected = true;
+	};
+
+	const applyPosEnhancements = () => {
+		if (!pulpos_custom.is_pos_route()) return;
+		if (!posClassApplied) {
+			document.body.classList.add("pulpos-pos");
+			posClassApplied = true;
+		}
+		focusPosSearch();
+		injectQuickPay();
+		setDefaultCustomer();
+		addFilterButton();
+		patchItemSelector();
+		ensurePaginationControls();
+	};
+
+	const setDefaultCustomer = () => {
+		if (customerSet) return;
+
+		// Try cur_pos API first (ERPNext POS object)
+		try {
+			const fallback =
+				(cur_pos?.pos_profile_data && cur_pos.pos_profile_data.customer) ||
+				(cur_pos?.frm && cur_pos.frm.doc && cur_pos.frm.doc.customer) ||
+				DEFAULT_CUSTOMER ||
+				"Walk-in Customer";
+
+			if (window.cur_pos && fallback) {
+				const current = cur_pos.customer_field && cur_pos.customer_field.get_value();
+
+				if (cur_pos.set_customer && !current) {
+					cur_pos.set_customer(fallback);
+					customerSet = true;
+					return;
+				}
+
+				if (cur_pos.customer_field && !current) {
+					cur_pos.customer_field.set_value(fallback);
+					customerSet = true;
+					return;
+				}
+
+				if (cur_pos.frm && cur_pos.frm.set_value && !cur_pos.frm.doc.customer) {
+					cur_pos.frm.set_value("customer", fallback);
+					customerSet = true;
+					return;
+				}
+
+				if (current) {
+					customerSet = true;
+					return;
+				}
+			}
+		} catch (e) {
+			// ignore
+		}
+
+		// Fallback: set the DOM input if empty
+		const customerInput = document.querySelector(
+			'.customer-section input[data-fieldtype="Link"], .customer-section input[placeholder*="Cliente"]'
+		);
+		if (customerInput && !customerInput.value) {
+			customerInput.value = DEFAULT_CUSTOMER;
+			customerInput.dispatchEvent(new Event("input", { bubbles: true }));
+			customerInput.dispatchEvent(new Event("change", { bubbles: true }));
+			customerSet = true;
+		}
+	};
+
+	// The stub calls this on every POS route change; the POS page builds its DOM lazily,
+	// so retry a few times instead of polling forever
+	frappe.provide("pulpos_custom.pos");
+	pulpos_custom.pos.apply = () => {
+		quickPayInjected = false;
+		posClassApplied = false;
+		[100, 500, 2000, 6000].forEach((delay) => setTimeout(applyPosEnhancements, delay));
+	};
+
+	const addFilterButton = () => {
+		if (filterButtonAdded) return;
+		const filterSection = document.querySelector(".point-of-sale-app .items-selector .filter-section");
+		const itemGroupField = document.querySelector(".point-of-sale-app .item-group-field");
+		if (!filterSection || !itemGroupField) return;
+
+		// Wrap search and button
+		if (!filterSection.classList.contains("pulpos-filter-bar")) {
+			filterSection.classList.add("pulpos-filter-bar");
+			filterSection.style.position = "relative";
+		}
+
+		// Filter button
+		const btn = document.createElement("button");
+		btn.type = "button";
+		btn.className = "pulpos-filter-btn";
+		btn.textContent = "Filters";
+
+		// Dropdown menu
+		const menu = document.createElement("div");
+		menu.className = "pulpos-filter-menu";
+		// Move item group field into menu
+		menu.appendChild(itemGroupField);
+		itemGroupField.style.display = "block";
+
+		btn.addEventListener("click", (e) => {
+			e.stopPropagation();
+			menu.classList.toggle("show");
+		});
+		menu.addEventListener("click", (e) => e.stopPropagation());
+		document.addEventListener("click", () => {
+			menu.classList.remove("show");
+		});
+
+		filterSection.appendChild(btn);
+		filterSection.appendChild(menu);
+		filterButtonAdded = true;
+	};
+
+	// POS catalog snapshot cached in IndexedDB and refreshed with deltas (pulpos_custom.pos_catalog)
+	const CATALOG_SYNC_INTERVAL = 60 * 1000;
+	const posCatalog = { profile: null, snapshot: null, codes: [], syncing: null, syncedAt: 0 };
+
+	const catalogStore = (mode, fn) =>
+		new Promise((resolve, reject) => {
+			const open = indexedDB.open("pulpos_catalog", 1);
+			open.onupgradeneeded = () => open.result.createObjectStore("snapshots");
+			open.onerror = () => reject(open.error);
+			open.onsuccess = () => {
+				const tx = open.result.transaction("snapshots", mode);
+				const req = fn(tx.objectStore("snapshots"));
+				tx.oncomplete = () => resolve(req.result);
+				tx.onerror = () => reject(tx.error);
+			};
+		});
+
+	const applyCatalogSnapshot = (snapshot, data) => {
+		const base = data.full || !snapshot ? { items: {}, item_groups: data.item_groups } : snapshot;
+		const items = base.items;
+		data.items.forEach((row) => {
+			items[row[0]] = row;
+		});
+		data.removed.forEach((code) => delete items[code]);
+		return { ...data, items, item_groups: base.item_groups };
+	};
+
+	const syncPosCatalog = (posProfile) => {
+		if (!posProfile || !window.indexedDB || !window.fetch) return Promise.resolve();
+		if (posCatalog.syncing) return posCatalog.syncing;
+		if (posCatalog.profile === posProfile && Date.now() - posCatalog.syncedAt < CATALOG_SYNC_INTERVAL) {
+			return Promise.resolve();
+		}
+
+		posCatalog.syncing = (async () => {
+			let snapshot =
+				posCatalog.profile === posProfile
+					? posCatalog.snapshot
+					: await catalogStore("readonly", (store) => store.get(posProfile)).catch(() => null);
+			const params = new URLSearchParams({ pos_profile: posProfile });
+			const headers = { Accept: "application/json" };
+			if (snapshot) {
+				params.set("since", snapshot.version);
+				if (snapshot.etag) headers["If-None-Match"] = snapshot.etag;
+			}
+			// 304 keeps the cached snapshot; 200 is a full snapshot or a delta to merge
+			const res = await fetch(`/api/method/pulpos_custom.pos_catalog.get_pos_catalog?${params}`, { headers });
+			if (res.status === 200) {
+				snapshot = applyCatalogSnapshot(snapshot, await res.json());
+				snapshot.etag = res.headers.get("ETag");
+				await catalogStore("readwrite", (store) => store.put(snapshot, posProfile)).catch(() => null);
+			}
+			if (snapshot) {
+				posCatalog.profile = posProfile;
+				posCatalog.snapshot = snapshot;
+				posCatalog.codes = Object.keys(snapshot.items).sort();
+				posCatalog.syncedAt = Date.now();
+			}
+		})()
+			.catch(() => null)
+			.finally(() => {
+				posCatalog.syncing = null;
+			});
+		return posCatalog.syncing;
+	};
+
+	const firstCodeAfter = (codes, after) => {
+		let lo = 0;
+		let hi = codes.length;
+		while (lo < hi) {
+			const mid = (lo + hi) >> 1;
+			if (codes[mid] <= after) lo = mid + 1;
+			else hi = mid;
+		}
+		return lo;
+	};
+
+	// Same page shape as pulpos_custom.pos.get_pos_items, or null when the snapshot cannot answer.
+	// Searches normally go to the server's ranked index (pulpos_custom.search_index); a plain
+	// substring match here only answers them when that call fails (e.g. offline).
+	const getLocalPage = ({ pos_profile, item_group, search_term, after, page_length }) => {
+		const snapshot = posCatalog.profile === pos_profile && posCatalog.snapshot;
+		if (!snapshot) return null;
+		const group = item_group ? snapshot.item_groups && snapshot.item_groups[item_group] : null;
+		if (item_group && !group) return null;
+
+		const term = (search_term || "").toLowerCase();
+		const codes = posCatalog.codes;
+		const matches = [];
+		for (let i = after ? firstCodeAfter(codes, after) : 0; i < codes.length && matches.length <= page_length; i++) {
+			const row = snapshot.items[codes[i]];
+			const item = {};
+			snapshot.fields.forEach((field, idx) => {
+				item[field] = row[idx];
+			});
+			if (group) {
+				const itemGroup = snapshot.item_groups[item.item_group];
+				if (!itemGroup || itemGroup[0] < group[0] || itemGroup[1] > group[1]) continue;
+			}
+			if (
+				term &&
+				!item.item_code.toLowerCase().includes(term) &&
+				!(item.item_name || "").toLowerCase().includes(term)
+			) {
+				continue;
+			}
+			if (snapshot.hide_unavailable_items && item.is_stock_item && item.actual_qty <= 0) continue;
+			matches.push(item);
+		}
+		const items = matches
+			.slice(0, page_length)
+			.map((item) => ({ ...item, uom: item.stock_uom, currency: snapshot.currency }));
+		return { items, next: matches.length > page_length ? items[items.length - 1].item_code : null };
+	};
+
+	// Realtime stock (pulpos_custom.stock_push): follow the POS Profile's warehouse room
+	const stockWatch = { profile: null, warehouse: null };
+
+	const watchPosStock = async (posProfile) => {
+		if (!posProfile || posProfile === stockWatch.profile || !frappe.realtime) return;
+		stockWatch.profile = posProfile;
+		const { message } = await frappe.db.get_value("POS Profile", posProfile, "warehouse");
+		const warehouse = message && message.warehouse;
+		if (!warehouse || warehouse === stockWatch.warehouse) return;
+		if (stockWatch.warehouse) frappe.realtime.doc_unsubscribe("Warehouse", stockWatch.warehouse);
+		frappe.realtime.doc_subscribe("Warehouse", warehouse);
+		stockWatch.warehouse = warehouse;
+	};
+
+	// Same thresholds and formatting as ERPNext's POS item cards
+	const renderQtyPill = (pill, qty) => {
+		pill.classList.remove("green", "orange", "red");
+		pill.classList.add(qty > 10 ? "green" : qty <= 0 ? "red" : "orange");
+		pill.textContent = Math.round(qty) > 999 ? `${(Math.round(qty) / 1000).toFixed(1)}K` : qty;
+	};
+
+	const applyStockUpdate = ({ warehouse, items }) => {
+		if (!items || warehouse !== stockWatch.warehouse) return;
+		const snapshot = posCatalog.snapshot;
+		const qtyIndex = snapshot && snapshot.warehouse === warehouse ? snapshot.fields.indexOf("actual_qty") : -1;
+		Object.entries(items).forEach(([itemCode, { actual_qty }]) => {
+			if (qtyIndex >= 0 && snapshot.items[itemCode]) snapshot.items[itemCode][qtyIndex] = actual_qty;
+			document
+				.querySelectorAll(
+					`.point-of-sale-app .item-wrapper[data-item-code="${CSS.escape(escape(itemCode))}"] .indicator-pill`
+				)
+				.forEach((pill) => renderQtyPill(pill, actual_qty));
+		});
+	};
+
+	frappe.realtime && frappe.realtime.on("pulpos_stock_update", applyStockUpdate);
+
+	// One style read for the grid's column count instead of measuring every card
+	const calcItemsPerRow = () => {
+		const container = document.querySelector(".point-of-sale-app .items-container");
+		const columns = container && getComputedStyle(container).gridTemplateColumns;
+		if (!columns || columns === "none") return 4;
+		return columns.split(" ").filter(Boolean).length || 4;
+	};
+
+	const resetPagination = () => {
+		paginationState.currentPage = 1;
+		paginationState.cursors = [null];
+		paginationState.next = null;
+	};
+
+	// Serve ERPNext's item selector from pulpos_custom.pos.get_pos_items, one page at a time
+	const patchItemSelector = () => {
+		const proto = window.erpnext?.PointOfSale?.ItemSelector?.prototype;
+		if (!proto) return;
+
+		if (!proto.pulposPaged) {
+			proto.pulposPaged = true;
+			// Search and item group changes always start from the first page
+			const filterItems = proto.filter_items;
+			proto.filter_items = function (...args) {
+				resetPagination();
+				return filterItems.apply(this, args);
+			};
+			const loadItemsData = proto.load_items_data;
+			proto.load_items_data = function (...args) {
+				resetPagination();
+				return loadItemsData.apply(this, args);
+			};
+			proto.get_items = function ({ search_term = "" } = {}) {
+				paginationState.selector = this;
+				const args = {
+					pos_profile: this.pos_profile,
+					item_group: this.item_group,
+					search_term,
+					after: paginationState.cursors[paginationState.currentPage - 1],
+					page_length: calcItemsPerRow() * Math.max(1, paginationState.rowsPerPage),
+				};
+				const localPage = search_term ? null : getLocalPage(args);
+				const method = search_term
+					? "pulpos_custom.search_index.search_pos_items"
+					: "pulpos_custom.pos.get_pos_items";
+				const fetchPage = () => {
+					let request = localPage ? Promise.resolve({ message: localPage }) : frappe.call({ method, args });
+					if (search_term) {
+						// Server search pages by rank offset; the local fallback pages by item code
+						const localArgs = { ...args, after: typeof args.after === "string" ? args.after : null };
+						request = request.catch(() => ({
+							message: getLocalPage(localArgs) || { items: [], next: null },
+						}));
+					}
+					return request;
+				};
+				// Barcodes and exact item codes resolve from the register's scan cache before ranked search;
+				// a barcode hit is reported as such so ERPNext adds it to the cart in the barcode's UOM
+				const scanCode = search_term.trim();
+				const request =
+					scanCode && !/\s/.test(scanCode) && paginationState.currentPage === 1
+						? frappe
+								.call({
+									method: "pulpos_custom.pos_scan.scan_item",
+									args: { pos_profile: this.pos_profile, code: scanCode },
+								})
+								.then((r) =>
+									r.message
+										? { message: { items: [r.message], next: null, barcode: r.message.barcode } }
+										: fetchPage()
+								)
+								.catch(() => fetchPage())
+						: fetchPage();
+				return request.then((r) => {
+					paginationState.next = (r.message && r.message.next) || null;
+					updatePaginationControls();
+					return r;
+				});
+			};
+		}
+
+		// A selector built before the patch rendered ERPNext's own list; reload it once
+		const selector = window.cur_pos && cur_pos.item_selector;
+		if (selector) {
+			syncPosCatalog(selector.pos_profile);
+			watchPosStock(selector.pos_profile);
+		}
+		if (selector && !selector.pulposLoaded) {
+			selector.pulposLoaded = true;
+			selector.filter_items();
+		}
+	};
+
+	const loadPage = (page) => {
+		const selector = paginationState.selector || (window.cur_pos && cur_pos.item_selector);
+		if (!selector) return;
+		paginationState.currentPage = page;
+		const search_term = (selector.search_field && selector.search_field.get_value()) || "";
+		selector.get_items({ search_term }).then(({ message }) => selector.render_item_list(message.items));
+	};
+
+	const ensurePaginationControls = () => {
+		if (paginationControlsAdded) return;
+		const filterSection = document.querySelector(".point-of-sale-app .items-selector .filter-section");
+		if (!filterSection) return;
+
+		const wrap = document.createElement("div");
+		wrap.className = "pulpos-pagination-controls";
+
+		const label = document.createElement("span");
+		label.className = "pulpos-rows-label";
+		label.textContent = "Rows per page";
+
+		const select = document.createElement("select");
+		select.className = "pulpos-rows-select";
+		ROWS_PER_PAGE_OPTIONS.forEach((opt) => {
+			const o = document.createElement("option");
+			o.value = opt;
+			o.textContent = opt;
+			if (opt === paginationState.rowsPerPage) o.selected = true;
+			select.appendChild(o);
+		});
+		select.addEventListener("change", () => {
+			paginationState.rowsPerPage = Number(select.value) || 1;
+			localStorage.setItem("pulpos_rows_per_page", paginationState.rowsPerPage);
+			resetPagination();
+			loadPage(1);
+		});
+
+		const prev = document.createElement("button");
+		prev.type = "button";
+		prev.className = "pulpos-pagination-btn pulpos-page-prev";
+		prev.textContent = "Prev";
+		prev.addEventListener("click", () => {
+			if (paginationState.currentPage > 1) loadPage(paginationState.currentPage - 1);
+		});
+
+		const pageIndicator = document.createElement("span");
+		pageIndicator.className = "pulpos-page-indicator";
+		pageIndicator.textContent = "1";
+
+		const next = document.createElement("button");
+		next.type = "button";
+		next.className = "pulpos-pagination-btn pulpos-page-next";
+		next.textContent = "Next";
+		next.addEventListener("click", () => {
+			if (!paginationState.next) return;
+			paginationState.cursors[paginationState.currentPage] = paginationState.next;
+			loadPage(paginationState.currentPage + 1);
+		});
+
+		wrap.appendChild(label);
+		wrap.appendChild(select);
+		wrap.appendChild(prev);
+		wrap.appendChild(pageIndicator);
+		wrap.appendChild(next);
+		filterSection.appendChild(wrap);
+		paginationControlsAdded = true;
+		updatePaginationControls();
+	};
+
+	const updatePaginationControls = () => {
+		const wrap = document.querySelector(".pulpos-pagination-controls");
+		if (!wrap) return;
+		const indicator = wrap.querySelector(".pulpos-page-indicator");
+		if (indicator) indicator.textContent = `${paginationState.currentPage}`;
+		const prev = wrap.querySelector(".pulpos-page-prev");
+		const next = wrap.querySelector(".pulpos-page-next");
+		if (prev) prev.disabled = paginationState.currentPage <= 1;
+		if (next) next.disabled = !paginationState.next;
+	};
+})();
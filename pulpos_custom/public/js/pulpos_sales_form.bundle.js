@@ -0,0 +1,43 @@
+// Sales Order / Sales Invoice form UX, loaded by pulpos_custom.bundle.js when one of those forms opens.
+
+frappe.provide("pulpos_custom.sales_form");
+
+const warnLowStock = async (frm) => {
+	if (!frm.doc.items || !frm.doc.items.length) return;
+	const lines = frm.doc.items
+		.filter((row) => row.item_code && row.warehouse && row.qty)
+		.map((row) => ({
+			item_code: row.item_code,
+			warehouse: row.warehouse,
+			qty: row.stock_qty || row.qty,
+			so_detail: row.so_detail,
+		}));
+	if (!lines.length) return;
+
+	// One round-trip for every line; duplicate item/warehouse lines are summed server-side.
+	// This is an early warning only: submit re-checks under Bin locks (stock.validate_stock_on_submit).
+	const { message } = await frappe.call({
+		method: "pulpos_custom.stock.get_stock_shortfalls",
+		args: { lines },
+	});
+	const shortfallMessages = (message || []).map(
+		(row) => `${row.item_code} @ ${row.warehouse}: need ${row.required}, available ${row.available}`
+	);
+
+	if (shortfallMessages.length) {
+		frappe.throw({
+			title: __("Insufficient Stock"),
+			message: __("Adjust quantities or warehouse:\n{0}", [shortfallMessages.join("<br>")]),
+		});
+	}
+};
+
+Object.assign(pulpos_custom.sales_form, {
+	refresh(frm) {
+		frm.dashboard.add_comment(
+			"info",
+			__("Tip: verify price list and warehouse per line to avoid stock/price issues.")
+		);
+	},
+	validate: warnLowStock,
+});
@@ -0,0 +1,372 @@
+"""In-memory prefix and trigram index over Items for POS and shop typeahead search."""
+
+from __future__ import annotations
+
+import bisect
+import re
+import unicodedata
+from array import array
+
+import frappe
+from frappe.utils import cint
+
+from pulpos_custom.bulk import iter_pages
+from pulpos_custom.pos import add_price_and_stock
+
+CHANGES_KEY = "pulpos_custom:search_index:changes"
+GENERATION_KEY = "pulpos_custom:search_index:generation"
+# Past this many logged changes, workers rebuild instead of replaying them
+MAX_CHANGES = 5000
+# Candidates scored per query word; broad prefixes ("a") stop collecting here
+MAX_CANDIDATES = 500
+COMMON_TRIGRAM_POSTINGS = 5000
+# Share of a query token's trigrams a document must have to match it with a typo
+MIN_TRIGRAM_OVERLAP = 0.6
+# Rebuild once this share of document slots belongs to replaced or deleted Items
+MAX_DEAD_RATIO = 0.25
+POS_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 100
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+INDEX_FIELDS = ["name", "item_name", "item_group", "has_variants", "is_sales_item"]
+
+# One index per site for the lifetime of the worker process
+_indexes: dict[str, SearchIndex] = {}
+
+
+class SearchIndex:
+	"""
+	Prefix and trigram postings over item code, name, website name, barcodes and item group.
+
+	- Documents are numbered slots; posting lists are `array("I")` of slots, so
+	  they stay sorted and compact as slots are appended.
+	- An updated Item gets a new slot and its old slot is marked dead, so
+	  updates never rewrite posting lists.
+	"""
+
+	def __init__(self):
+		self.codes: list[str] = []
+		# Normalised "code\0name\0group" per slot, used to score candidates
+		self.texts: list[str] = []
+		self.groups: array = array("I")
+		self.group_ids: dict[str, int] = {}
+		self.pos_items = bytearray()
+		self.published = bytearray()
+		self.slots: dict[str, int] = {}
+		self.dead: set[int] = set()
+		self.barcodes: dict[str, int] = {}
+		self.tokens: list[str] = []
+		self.postings: dict[str, array] = {}
+		self.trigrams: dict[str, array] = {}
+		self.generation = None
+		self.position = 0
+
+	def add(self, item, barcodes: list[str], web_item_name: str | None = None):
+		"""
+		Index one Item row (`name`, `item_name`, `item_group`, `has_variants`, `is_sales_item`).
+
+		`web_item_name` is set (possibly empty) when the Item has a published Website Item.
+		"""
+		self.remove(item.name)
+		slot = len(self.codes)
+		code, name, group = normalize(item.name), normalize(item.item_name), normalize(item.item_group)
+		if web_item_name and normalize(web_item_name) != name:
+			name = f"{name} {normalize(web_item_name)}"
+		if item.item_group not in self.group_ids:
+			self.group_ids[item.item_group] = len(self.group_ids)
+
+		self.codes.append(item.name)
+		self.texts.append(f"{code}\0{name}\0{group}")
+		self.groups.append(self.group_ids[item.item_group])
+		self.pos_items.append(int(not item.has_variants and cint(item.is_sales_item)))
+		self.published.append(int(web_item_name is not None))
+		self.slots[item.name] = slot
+
+		words = {*TOKEN_RE.findall(code), *TOKEN_RE.findall(name), *TOKEN_RE.findall(group)}
+		for barcode in barcodes:
+			self.barcodes[barcode] = slot
+			words.add(normalize(barcode))
+		for word in words:
+			if word not in self.postings:
+				bisect.insort(self.tokens, word)
+				self.postings[word] = array("I")
+			self.postings[word].append(slot)
+		for trigram in {trigram for word in words for trigram in _trigrams(word)}:
+			self.trigrams.setdefault(trigram, array("I")).append(slot)
+
+	def remove(self, item_code: str):
+		slot = self.slots.pop(item_code, None)
+		if slot is not None:
+			self.dead.add(slot)
+
+	def needs_rebuild(self) -> bool:
+		return len(self.dead) > MAX_DEAD_RATIO * max(len(self.codes), 1)
+
+	def lookup_barcode(self, barcode: str) -> str | None:
+		slot = self.barcodes.get((barcode or "").strip())
+		return self.codes[slot] if slot is not None and slot not in self.dead else None
+
+	def search(
+		self,
+		query: str,
+		limit: int | None = POS_PAGE_LENGTH,
+		pos_only: bool = False,
+		groups: set[str] | None = None,
+		published_only: bool = False,
+	) -> list[str]:
+		"""
+		Item codes matching every word of `query`, best first; `limit=None` returns all found.
+
+		At most `MAX_CANDIDATES` matches are collected when no word narrows the search.
+		"""
+		query = normalize(query).strip()
+		words = TOKEN_RE.findall(query)
+		if not words:
+			return []
+		group_ids = None if groups is None else {self.group_ids[g] for g in groups if g in self.group_ids}
+
+		# Score the candidates of the most selective word against all words
+		narrowed = [found for found in map(self._candidates, words) if found is not None]
+		candidates = min(narrowed, key=len) if narrowed else range(len(self.codes))
+		scored = []
+		for slot in candidates:
+			if slot in self.dead or (pos_only and not self.pos_items[slot]):
+				continue
+			if (published_only and not self.published[slot]) or (
+				group_ids is not None and self.groups[slot] not in group_ids
+			):
+				continue
+			score = self._score(slot, query, words)
+			if score:
+				scored.append((-score, len(self.texts[slot]), self.codes[slot]))
+				if not narrowed and len(scored) >= MAX_CANDIDATES:
+					break
+		scored.sort()
+		return [code for _, _, code in scored[:limit]]
+
+	def _candidates(self, word: str) -> set[int] | None:
+		"""Slots that may match `word`, or None when its trigrams are too common to narrow the search."""
+		candidates: set[int] = set()
+		for position in range(bisect.bisect_left(self.tokens, word), len(self.tokens)):
+			token = self.tokens[position]
+			if not token.startswith(word) or len(candidates) >= MAX_CANDIDATES:
+				break
+			candidates.update(self.postings[token][: MAX_CANDIDATES - len(candidates)])
+		if len(word) >= 3 and len(candidates) < MAX_CANDIDATES:
+			fuzzy = self._trigram_candidates(word, MAX_CANDIDATES - len(candidates))
+			if fuzzy is None:
+				return candidates or None
+			candidates.update(fuzzy)
+		return candidates
+
+	def _trigram_candidates(self, word: str, limit: int) -> list[int] | None:
+		"""Documents sharing enough of the word's trigrams: substrings and typos."""
+		trigrams = _trigrams(word)
+		needed = max(1, int(len(trigrams) * MIN_TRIGRAM_OVERLAP + 0.5))
+		# Trigrams most documents have ("000", "art") cannot narrow anything down; only
+		# rare ones are counted, and the common ones are taken as present
+		postings = sorted((self.trigrams.get(trigram, array("I")) for trigram in trigrams), key=len)
+		rare = [posting for posting in postings if len(posting) <= COMMON_TRIGRAM_POSTINGS]
+		needed -= len(postings) - len(rare)
+		if needed <= 0:
+			return None
+		counts: dict[int, int] = {}
+		for posting in rare:
+			for slot in posting:
+				counts[slot] = counts.get(slot, 0) + 1
+		return [slot for slot, count in counts.items() if count >= needed][:limit]
+
+	def _score(self, slot: int, query: str, words: list[str]) -> int:
+		code, name, group = self.texts[slot].split("\0")
+		name_words = TOKEN_RE.findall(name)
+		other_words = TOKEN_RE.findall(code) + TOKEN_RE.findall(group)
+		# The whole item code typed or scanned outranks everything else
+		total = 100 if query == code else 0
+		for word in words:
+			if code.startswith(word):
+				score = 60
+			elif name_words and name_words[0].startswith(word):
+				score = 45
+			elif any(w.startswith(word) for w in name_words):
+				score = 40
+			elif any(w.startswith(word) for w in other_words):
+				score = 25
+			elif word in code or word in name:
+				score = 20
+			elif len(word) >= 3 and _overlap(word, self.texts[slot]) >= MIN_TRIGRAM_OVERLAP:
+				score = 10
+			else:
+				return 0
+			total += score
+		return total
+
+
+def normalize(text: str | None) -> str:
+	"""Lowercase without accents, so "Uña" matches "una"."""
+	text = unicodedata.normalize("NFKD", (text or "").lower())
+	return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def get_search_index() -> SearchIndex:
+	"""This worker's index for the current site, built on first use and kept current from the change log."""
+	site = frappe.local.site
+	index = _indexes.get(site)
+	cache = frappe.cache()
+	generation, changes = (
+		cache.pipeline()
+		.get(cache.make_key(GENERATION_KEY))
+		.lrange(cache.make_key(CHANGES_KEY), index.position if index else 0, -1)
+		.execute()
+	)
+	if index is None or index.generation != generation or index.needs_rebuild():
+		# Log position first: changes logged during the build are replayed, which is harmless
+		(position,) = cache.pipeline().llen(cache.make_key(CHANGES_KEY)).execute()
+		index = build_search_index()
+		index.generation, index.position = generation, position
+		_indexes[site] = index
+	elif changes:
+		index.position += len(changes)
+		_refresh_items(index, list({code.decode() if isinstance(code, bytes) else code for code in changes}))
+	return index
+
+
+def build_search_index() -> SearchIndex:
+	"""Index every enabled Item, reading Items in pages and barcodes and Website Items in one query each."""
+	index = SearchIndex()
+	barcodes: dict[str, list[str]] = {}
+	for row in frappe.get_all("Item Barcode", filters={"parenttype": "Item"}, fields=["parent", "barcode"]):
+		barcodes.setdefault(row.parent, []).append(row.barcode)
+	web_names = _published_names()
+	for page in iter_pages("Item", INDEX_FIELDS, filters={"disabled": 0}, page_size=5000):
+		for item in page:
+			index.add(item, barcodes.get(item.name, []), web_names.get(item.name))
+	return index
+
+
+def queue_index_update(doc, method=None, old_name=None, new_name=None, merge=False):
+	"""
+	Item and Website Item doc_events handler: log the item code after commit so every worker re-reads it.
+
+	On an Item rename (`after_rename`) the old code is logged too, so workers drop it.
+	"""
+	item_codes = [doc.item_code if doc.doctype == "Website Item" else doc.name]
+	if old_name:
+		item_codes.append(old_name)
+	if item_codes[0]:
+		frappe.db.after_commit.add(lambda: _log_change(*item_codes))
+
+
+@frappe.whitelist()
+def search_pos_items(
+	pos_profile: str,
+	search_term: str,
+	item_group: str | None = None,
+	page_length: int = POS_PAGE_LENGTH,
+	after: str | None = None,
+) -> dict:
+	"""
+	Ranked Items for a POS Profile's typeahead, with price and stock like `pos.get_pos_items`.
+
+	- `next` is the rank offset to pass back as `after` for the following page.
+	- An exact barcode returns just that Item and echoes `barcode`, so the selector adds it to the cart.
+	"""
+	frappe.has_permission("POS Profile", "read", pos_profile, throw=True)
+	profile = frappe.get_cached_doc("POS Profile", pos_profile)
+	page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+	hide_unavailable = bool(profile.get("hide_unavailable_items") and profile.warehouse)
+	index = get_search_index()
+
+	barcode_item = index.lookup_barcode(search_term)
+	if barcode_item:
+		ranked, start = [barcode_item], 0
+	else:
+		groups = _group_subtree(item_group) if item_group else None
+		ranked, start = index.search(search_term, limit=None, pos_only=True, groups=groups), cint(after)
+	# Extra candidates cover Items hidden for being out of stock; one more tells whether a page follows
+	window = ranked[start : start + page_length * (3 if hide_unavailable else 1) + 1]
+
+	items = []
+	if window:
+		rows = {
+			row.item_code: row
+			for row in frappe.get_all(
+				"Item",
+				filters={"name": ["in", window]},
+				fields=[
+					"name as item_code",
+					"item_name",
+					"item_group",
+					"image as item_image",
+					"stock_uom",
+					"is_stock_item",
+				],
+			)
+		}
+		items = add_price_and_stock([rows[code] for code in window if code in rows], profile)
+		if hide_unavailable:
+			items = [item for item in items if not item.is_stock_item or item.actual_qty > 0]
+
+	page = items[:page_length]
+	next_start = None
+	if len(items) > page_length:
+		next_start = start + window.index(page[-1].item_code) + 1
+	elif start + len(window) < len(ranked):
+		next_start = start + len(window)
+
+	result = {"items": page, "next": next_start}
+	if barcode_item:
+		result["barcode"] = search_term
+	return result
+
+
+def _published_names(item_codes: list[str] | None = None) -> dict[str, str]:
+	"""`{item_code: web_item_name}` for Items with a published Website Item."""
+	filters = {"published": 1}
+	if item_codes is not None:
+		filters["item_code"] = ["in", item_codes]
+	return {
+		row.item_code: row.web_item_name or ""
+		for row in frappe.get_all("Website Item", filters=filters, fields=["item_code", "web_item_name"])
+	}
+
+
+def _refresh_items(index: SearchIndex, item_codes: list[str]):
+	items = frappe.get_all("Item", filters={"name": ["in", item_codes], "disabled": 0}, fields=INDEX_FIELDS)
+	barcodes: dict[str, list[str]] = {}
+	for row in frappe.get_all(
+		"Item Barcode", filters={"parenttype": "Item", "parent": ["in", item_codes]}, fields=["parent", "barcode"]
+	):
+		barcodes.setdefault(row.parent, []).append(row.barcode)
+	web_names = _published_names(item_codes)
+	for code in item_codes:
+		index.remove(code)
+	for item in items:
+		index.add(item, barcodes.get(item.name, []), web_names.get(item.name))
+
+
+def _group_subtree(item_group: str) -> set[str]:
+	bounds = frappe.db.get_value("Item Group", item_group, ["lft", "rgt"], as_dict=True)
+	if not bounds:
+		return set()
+	return set(
+		frappe.get_all(
+			"Item Group", filters={"lft": [">=", bounds.lft], "rgt": ["<=", bounds.rgt]}, pluck="name"
+		)
+	)
+
+
+def _log_change(*item_codes: str):
+	cache = frappe.cache()
+	key = cache.make_key(CHANGES_KEY)
+	(length,) = cache.pipeline().rpush(key, *item_codes).execute()
+	if length > MAX_CHANGES:
+		# Workers see the new generation and rebuild from the database
+		cache.pipeline().delete(key).incr(cache.make_key(GENERATION_KEY)).execute()
+
+
+def _trigrams(word: str) -> set[str]:
+	return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def _overlap(word: str, text: str) -> float:
+	trigrams = _trigrams(word)
+	return sum(trigram in text for trigram in trigrams) / len(trigrams) if trigrams else 0.0
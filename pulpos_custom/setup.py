@@ -1,9 +1,20 @@
 import frappe
-from pulpos_custom.website_sync import create_website_items
+from pulpos_custom.bulk import BulkUpdater, bulk_insert_docs, iter_pages
+from pulpos_custom.pricing import clear_price_cache
+from pulpos_custom.profiling import collect, profiled
+from pulpos_custom.setup_context import get_setup_context, reset_setup_context
+from pulpos_custom.setup_fingerprint import SetupFingerprints
+from pulpos_custom.stock_matrix import StockMatrix
+from pulpos_custom.sync_report import SyncReport
 
 
+@profiled
 def ensure_setup():
-	"""Ensure baseline config for FerreTlap: two branches, two warehouses, two price lists."""
+	"""
+	Ensure baseline config for FerreTlap: two branches, two warehouses, two price lists.
+
+	Item Price backfill is catalog-sized and runs in `pulpos_custom.setup_jobs`.
+	"""
 	company = "FerreTlap"
 	company = _ensure_company(company)
 
@@ -14,24 +25,92 @@ def ensure_setup():
 	_create_branches(company)
 	warehouse_map = _create_warehouses(company, root_wh)
 	price_lists = _create_price_lists(currency)
-	_ensure_item_prices(price_lists, currency)
 	_ensure_mode_of_payment("Cash", company)
 	_create_pos_profiles(company, warehouse_map, price_lists)
 
 
-def ensure_setup_and_publish():
-	"""Run baseline setup and publish website items (safe wrapper for after_migrate)."""
-	ensure_setup()
-	_enable_product_filters()
-	_enable_price_and_stock_display()
-	_ensure_portal_menu()
-	_enable_signup()
+# Step -> DocTypes whose row count and last `modified` decide whether the step must run again
+SETUP_STEP_INPUTS = {
+	"ensure_setup": (
+		"Company",
+		"Branch",
+		"Warehouse",
+		"Price List",
+		"Mode of Payment",
+		"POS Profile",
+		"Customer",
+		"Account",
+		"Cost Center",
+	),
+	"enable_product_filters": ("E Commerce Settings", "Item Attribute", "Item Group", "Website Item"),
+	"enable_price_and_stock_display": ("E Commerce Settings", "Price List"),
+	"ensure_portal_menu": ("Portal Settings",),
+	"enable_signup": ("Website Settings",),
+	# File holds the images thumbnails are cut from. Bin is left out: stock moves on every sale,
+	# and the event sync plus the hourly watermark sweep already keep Website Items current
+	"catalog_jobs": ("Item", "Item Group", "Item Price", "Website Item", "File"),
+}
+
+
+def ensure_setup_and_publish(force: int = 0, steps: list[str] | str | None = None) -> dict:
+	"""
+	Run baseline setup and publish website items (safe wrapper for after_migrate).
+
+	Each step is skipped when the fingerprint of its inputs (row counts, last
+	`modified`, app version) matches the last run; pass `force=1` to run all.
+	`steps` (names from `SETUP_STEP_INPUTS`) runs only those steps, unconditionally.
+
+	Returns the per-step timing/query report, which is also written to the
+	`pulpos_custom` log.
+	"""
+	if isinstance(steps, str):
+		steps = [step.strip() for step in steps.split(",") if step.strip()]
+	unknown = set(steps or ()) - set(SETUP_STEP_INPUTS)
+	if unknown:
+		frappe.throw(f"Unknown setup steps: {', '.join(sorted(unknown))}")
+
+	# Imported here: setup_jobs runs this module's helpers, so it imports setup at module level
+	from pulpos_custom import setup_jobs
+
+	reset_setup_context()
+	with collect("ensure_setup_and_publish") as report:
+		fingerprints = SetupFingerprints(SETUP_STEP_INPUTS)
+		signup_config = get_setup_context().site_config().get("allow_signup")
+		setup_steps = (
+			("ensure_setup", ensure_setup, None),
+			("enable_product_filters", _enable_product_filters, None),
+			("enable_price_and_stock_display", lambda: _enable_price_and_stock_display(backfill=False), None),
+			("ensure_portal_menu", _ensure_portal_menu, None),
+			("enable_signup", _enable_signup, signup_config),
+			("catalog_jobs", _enqueue_catalog_jobs, None),
+		)
+		ran = {}
+		for step, run, extra in setup_steps:
+			if steps and step not in steps:
+				report.steps.append({"step": f"setup.{step}", "depth": 0, "skipped": "not selected"})
+				continue
+			pending = step == "catalog_jobs" and not setup_jobs.is_complete()
+			if not (force or steps or pending or fingerprints.changed(step, extra)):
+				report.steps.append({"step": f"setup.{step}", "depth": 0, "skipped": "unchanged"})
+				continue
+			run()
+			ran[step] = extra
+		fingerprints.save(ran)
+	return report.as_dict()
+
+
+def _enqueue_catalog_jobs():
+	# Item Prices, Website Item publish/backfill and thumbnails scale with the catalog,
+	# so they run as chunked background jobs instead of inside bench migrate
+	from pulpos_custom import setup_jobs
+
 	try:
-		create_website_items(price_list="FerreTlap Retail", default_warehouse=None, publish=1)
+		setup_jobs.enqueue_catalog_jobs()
 	except Exception as exc:  # pragma: no cover - defensive log to avoid blocking migrations
-		frappe.log_error(f"Website Item publish failed: {exc}", "pulpos_custom.ensure_setup_and_publish")
+		frappe.log_error(f"Catalog job enqueue failed: {exc}", "pulpos_custom.ensure_setup_and_publish")
 
 
+@profiled
 def _ensure_company(company: str) -> str:
 	if frappe.db.exists("Company", company):
 		return company
@@ -52,6 +131,7 @@ def _get_company_currency(company: str) -> str:
 	return company_doc.default_currency or frappe.db.get_default("currency") or "MXN"
 
 
+@profiled
 def _create_branches(company: str):
 	branches = [
 		{"branch": "FerreTlap Matriz", "abbr": "FT-MTZ"},
@@ -68,6 +148,7 @@ def _create_branches(company: str):
 		doc.insert(ignore_permissions=True)
 
 
+@profiled
 def _ensure_root_warehouse(company: str) -> str:
 	# Try to find existing root for this company
 	existing = frappe.db.get_value(
@@ -90,6 +171,7 @@ def _ensure_root_warehouse(company: str) -> str:
 	return doc.name
 
 
+@profiled
 def _create_warehouses(company: str, parent: str):
 	warehouses = [
 		"FerreTlap Central Warehouse",
@@ -112,9 +194,11 @@ def _create_warehouses(company: str, parent: str):
 	return created
 
 
+@profiled
 def _enable_product_filters():
 	"""Ensure website product filters (sidebar) are visible by seeding filter config."""
-	if not frappe.db.exists("DocType", "E Commerce Settings") or not _table_exists("E Commerce Settings"):
+	ctx = get_setup_context()
+	if not ctx.doctype_ready("E Commerce Settings"):
 		return
 
 	try:
@@ -125,7 +209,7 @@ def _enable_product_filters():
 	changed = False
 
 	# Turn on field filters (e.g. Item Group, Brand) if disabled
-	if _has_column_safe("E Commerce Settings", "enable_field_filters"):
+	if ctx.has_column("E Commerce Settings", "enable_field_filters"):
 		if not settings.enable_field_filters:
 			settings.enable_field_filters = 1
 			changed = True
@@ -134,14 +218,13 @@ def _enable_product_filters():
 		return any(getattr(row, "fieldname", None) == fieldname for row in settings.get("filter_fields", []))
 
 	# Seed common filters if missing and the Website Item doctype supports them
-	web_meta = frappe.get_meta("Website Item")
 	for fieldname in ("item_group", "brand"):
-		if web_meta.has_field(fieldname) and not has_filter_field(fieldname):
+		if ctx.has_field("Website Item", fieldname) and not has_filter_field(fieldname):
 			settings.append("filter_fields", {"fieldname": fieldname})
 			changed = True
 
 	# Turn on attribute filters and seed a few Item Attributes (e.g., Color, Size) if they exist
-	if _has_column_safe("E Commerce Settings", "enable_attribute_filters"):
+	if ctx.has_column("E Commerce Settings", "enable_attribute_filters"):
 		if not settings.enable_attribute_filters:
 			settings.enable_attribute_filters = 1
 			changed = True
@@ -151,7 +234,7 @@ def _enable_product_filters():
 			getattr(row, "attribute", None) == attribute for row in settings.get("filter_attributes", [])
 		)
 
-	if frappe.db.exists("DocType", "Item Attribute"):
+	if ctx.doctype_exists("Item Attribute"):
 		# Prefer common attributes; fall back to whatever exists
 		preferred_attrs = ["Color", "Colour", "Size"]
 		existing_attrs = [row.name for row in frappe.get_all("Item Attribute", pluck="name")]
@@ -167,23 +250,30 @@ def _enable_product_filters():
 	item_groups = frappe.get_all(
 		"Website Item", filters={"published": 1}, pluck="item_group", distinct=True
 	)
-	for ig in item_groups:
-		if ig and frappe.db.exists("Item Group", ig):
-			if frappe.db.get_value("Item Group", ig, "show_in_website") != 1:
-				frappe.db.set_value("Item Group", ig, "show_in_website", 1)
+	item_groups = [ig for ig in item_groups if ig]
+	if item_groups:
+		hidden = frappe.get_all(
+			"Item Group",
+			filters={"name": ["in", item_groups], "show_in_website": ["!=", 1]},
+			pluck="name",
+		)
+		with BulkUpdater("Item Group") as updater:
+			for ig in hidden:
+				updater.add(ig, {"show_in_website": 1})
 
 	if changed:
 		settings.save(ignore_permissions=True)
 
 
-def _enable_price_and_stock_display():
+@profiled
+def _enable_price_and_stock_display(backfill: bool = True):
 	"""Show price and stock on product cards by toggling settings and backfilling Website Items."""
-	if not frappe.db.exists("DocType", "E Commerce Settings") or not _table_exists("E Commerce Settings"):
+	ctx = get_setup_context()
+	if not ctx.doctype_ready("E Commerce Settings"):
 		return
 
 	try:
 		settings = frappe.get_single("E Commerce Settings")
-		web_items_exist = frappe.db.exists("Website Item")
 	except Exception:
 		return
 
@@ -193,7 +283,7 @@ def _enable_price_and_stock_display():
 		"show_stock_availability": 1,
 		"show_actual_qty": 1,
 	}.items():
-		if _has_column_safe("E Commerce Settings", field) and getattr(settings, field, None) != desired:
+		if ctx.has_column("E Commerce Settings", field) and getattr(settings, field, None) != desired:
 			setattr(settings, field, desired)
 			changed = True
 
@@ -205,80 +295,62 @@ def _enable_price_and_stock_display():
 	if changed:
 		settings.save(ignore_permissions=True)
 
-	if not web_items_exist:
+	if backfill:
+		_backfill_website_items()
+
+
+@profiled
+def _backfill_website_items(website_items: list[str] | None = None):
+	"""Ensure price/stock flags and a warehouse for stock checks on published Website Items."""
+	ctx = get_setup_context()
+	if not ctx.table_exists("Website Item"):
 		return
 
-	# Backfill Website Items to ensure price/stock flags and a warehouse for stock checks
+	filters = {"published": 1}
+	if website_items is not None:
+		if not website_items:
+			return
+		filters["name"] = ["in", website_items]
+
 	# Default to the explicitly requested POS Profile warehouse if present
-	pos_default_wh = _get_default_pos_warehouse()
-	fallback_wh = pos_default_wh or frappe.db.get_value("Warehouse", {"is_group": 0}, "name")
+	pos_default_wh = ctx.default_pos_warehouse()
+	fallback_wh = pos_default_wh or ctx.any_leaf_warehouse()
 	web_items = frappe.get_all(
 		"Website Item",
-		filters={"published": 1},
+		filters=filters,
 		fields=["name", "item_code", "website_warehouse", "show_price", "show_stock_availability"],
 	)
+	if not web_items:
+		return
+
+	# Per-item warehouse picking is only needed without a POS warehouse; load stock once for it
+	stock = None
+	if not pos_default_wh:
+		stock = StockMatrix.load(None if website_items is None else [row.item_code for row in web_items])
+	has_show_price = ctx.has_column("Website Item", "show_price")
+	has_show_stock = ctx.has_column("Website Item", "show_stock_availability")
+	updater = BulkUpdater("Website Item", update_modified=False)
 	for row in web_items:
 		updates = {}
-		if frappe.db.has_column("Website Item", "show_price") and row.show_price != 1:
+		if has_show_price and row.show_price != 1:
 			updates["show_price"] = 1
-		if frappe.db.has_column("Website Item", "show_stock_availability") and row.show_stock_availability != 1:
+		if has_show_stock and row.show_stock_availability != 1:
 			updates["show_stock_availability"] = 1
 		# Force website warehouse to the POS warehouse when available to keep stock in sync
-		best_wh = pos_default_wh or _pick_warehouse_for_item(
+		best_wh = pos_default_wh or stock.pick_warehouse(
 			row.item_code, row.website_warehouse, pos_default_wh, fallback_wh
 		)
 		if best_wh and best_wh != row.website_warehouse:
 			updates["website_warehouse"] = best_wh
-		if updates:
-			frappe.db.set_value("Website Item", row.name, updates, update_modified=False)
-
-
-def _pick_warehouse_for_item(
-	item_code: str, current_wh: str | None, pos_wh: str | None, fallback: str | None
-) -> str | None:
-	"""Pick a warehouse that actually has stock, preferring current -> POS -> default -> any stocked -> fallback."""
-	if not item_code:
-		return current_wh or pos_wh or fallback
-
-	candidates = []
-	if current_wh:
-		candidates.append(current_wh)
-	if pos_wh:
-		candidates.append(pos_wh)
-
-	default_wh = frappe.db.get_value("Item", item_code, "default_warehouse")
-	if default_wh:
-		candidates.append(default_wh)
-
-	# Add any warehouse with stock (highest first)
-	stock_wh = frappe.db.sql(
-		"""
-		select warehouse
-		from `tabBin`
-		where item_code = %s and actual_qty > 0
-		order by actual_qty desc
-		limit 1
-		""",
-		item_code,
-	)
-	if stock_wh:
-		candidates.append(stock_wh[0][0])
-
-	# Finally fallback
-	if fallback:
-		candidates.append(fallback)
-
-	for wh in candidates:
-		if wh and _has_stock(item_code, wh):
-			return wh
-
-	# No stock anywhere, keep existing or fallback for consistency
-	return current_wh or pos_wh or default_wh or fallback
+		updater.add(row.name, updates)
+	updater.flush()
 
 
+@profiled
 def _ensure_portal_menu():
 	"""Ensure a basic customer portal menu exists (orders, invoices, quotes, issues, communications)."""
-	if not frappe.db.exists("DocType", "Portal Settings") or not _table_exists("Portal Settings"):
+	ctx = get_setup_context()
+	if not ctx.doctype_ready("Portal Settings"):
 		return
 
 	try:
@@ -289,7 +361,7 @@ def _ensure_portal_menu():
 	changed = False
 
 	# Turn on portal if field exists
-	if frappe.db.has_column("Portal Settings", "enable_portal"):
+	if ctx.has_column("Portal Settings", "enable_portal"):
 		if not settings.enable_portal:
 			settings.enable_portal = 1
 			changed = True
@@ -315,7 +387,7 @@ def _ensure_portal_menu():
 			"enabled": 1,
 		}
 		# Assign Customer role if the child table has role field
-		if frappe.db.has_column("Portal Menu Item", "role"):
+		if ctx.has_column("Portal Menu Item", "role"):
 			item["role"] = "Customer"
 		settings.append("menu_items", item)
 		changed = True
@@ -324,9 +396,11 @@ def _ensure_portal_menu():
 		settings.save(ignore_permissions=True)
 
 
+@profiled
 def _enable_signup():
 	"""Allow self-service signup on the website login page."""
-	if not frappe.db.exists("DocType", "Website Settings") or not _table_exists("Website Settings"):
+	ctx = get_setup_context()
+	if not ctx.doctype_ready("Website Settings"):
 		return
 
 	try:
@@ -336,15 +410,15 @@ def _enable_signup():
 
 	changed = False
 	# Field name varies by version; check both enable and disable flags.
-	if _has_column_safe("Website Settings", "disable_signup"):
+	if ctx.has_column("Website Settings", "disable_signup"):
 		if ws.disable_signup:
 			ws.disable_signup = 0
 			changed = True
-	if _has_column_safe("Website Settings", "allow_guest_signup"):
+	if ctx.has_column("Website Settings", "allow_guest_signup"):
 		if not ws.allow_guest_signup:
 			ws.allow_guest_signup = 1
 			changed = True
-	elif _has_column_safe("Website Settings", "enable_signup"):
+	elif ctx.has_column("Website Settings", "enable_signup"):
 		if not ws.enable_signup:
 			ws.enable_signup = 1
 			changed = True
@@ -356,7 +430,7 @@ def _enable_signup():
 	try:
 		from frappe.installer import update_site_config
 
-		site_config = frappe.get_site_config()
+		site_config = ctx.site_config()
 		if not site_config.get("allow_signup", True):
 			update_site_config("allow_signup", 1)
 	except Exception:
@@ -364,52 +438,7 @@ def _enable_signup():
 		pass
 
 
-def _get_default_pos_warehouse() -> str | None:
-	"""Return the default POS Profile warehouse if configured."""
-	# Prefer the configured profile "POS FerreTlap Main" if it exists and has a warehouse
-	preferred = frappe.db.get_value("POS Profile", {"name": "POS FerreTlap Main"}, "warehouse")
-	if preferred:
-		return preferred
-
-	pos_profiles = frappe.get_all(
-		"POS Profile",
-		fields=["warehouse"],
-		filters={"warehouse": ["is", "set"]},
-		order_by="modified desc",
-		limit_page_length=1,
-	)
-	return pos_profiles[0].warehouse if pos_profiles else None
-
-
-def _has_stock(item_code: str, warehouse: str) -> bool:
-	"""Check if a Bin has positive qty for item/warehouse."""
-	if not item_code or not warehouse:
-		return False
-	qty = frappe.db.get_value(
-		"Bin", {"item_code": item_code, "warehouse": warehouse}, "actual_qty"
-	)
-	try:
-		return float(qty or 0) > 0
-	except Exception:
-		return False
-
-
-def _has_column_safe(doctype: str, column: str) -> bool:
-	"""Safely check column existence, guarding against missing tables."""
-	try:
-		return frappe.db.has_column(doctype, column)
-	except Exception:
-		return False
-
-
-def _table_exists(doctype: str) -> bool:
-	"""Return True if the underlying table for the DocType exists."""
-	try:
-		return frappe.db.table_exists(f"tab{doctype}")
-	except Exception:
-		return False
-
-
+@profiled
 def _create_price_lists(currency: str):
 	price_lists = [
 		{"price_list_name": "FerreTlap Retail", "selling": 1, "buying": 0},
@@ -431,6 +460,7 @@ def _create_price_lists(currency: str):
 	return names
 
 
+@profiled
 def _ensure_mode_of_payment(name: str, company: str) -> str:
 	company_doc = frappe.get_cached_doc("Company", company)
 	# Preferred account: company's default cash, else default bank
@@ -487,6 +517,7 @@ def _get_mop_account(mode_of_payment: str, company: str) -> str | None:
 	)
 
 
+@profiled
 def _create_pos_profiles(company: str, warehouses: dict, price_lists: dict):
 	"""Create POS Profiles per branch with branch-aware warehouse and price list."""
 	profiles = [
@@ -508,14 +539,15 @@ def _create_pos_profiles(company: str, warehouses: dict, price_lists: dict):
 		},
 	]
 
+	ctx = get_setup_context()
 	for pf in profiles:
 		if frappe.db.exists("POS Profile", pf["name"]):
 			continue
 
 		# Required fields; if missing, skip to avoid migration failure
-		mop_account = _get_mop_account("Cash", company)
-		write_off_acct = _get_write_off_account(company)
-		write_off_cc = _get_cost_center(company)
+		mop_account = ctx.cached(("mop_account", "Cash", company), lambda: _get_mop_account("Cash", company))
+		write_off_acct = ctx.cached(("write_off_account", company), lambda: _get_write_off_account(company))
+		write_off_cc = ctx.cached(("cost_center", company), lambda: _get_cost_center(company))
 
 		if not (mop_account and write_off_acct and write_off_cc):
 			frappe.log_error(
@@ -543,39 +575,76 @@ def _create_pos_profiles(company: str, warehouses: dict, price_lists: dict):
 		doc.append("payments", {"mode_of_payment": "Cash", "default": 1, "account": mop_account})
 
 		doc.insert(ignore_permissions=True)
-
-
-def _ensure_item_prices(price_lists: dict, fallback_currency: str):
-	"""Backfill Item Price rows for all selling price lists using Item.standard_rate."""
-	if not price_lists:
-		return
-
-	selling_lists = [pl_name for pl_name in price_lists.values() if pl_name]
-	if not selling_lists:
-		return
-
-	items = frappe.get_all("Item", fields=["name", "standard_rate", "stock_uom"])
-	if not items:
-		return
-
-	for pl in selling_lists:
-		price_list_currency = (
-			frappe.db.get_value("Price List", pl, "currency") if frappe.db.exists("Price List", pl) else None
-		) or fallback_currency
-
-		for item in items:
-			rate = item.standard_rate or 0
-			if float(rate) <= 0:
-				continue
-			if frappe.db.exists("Item Price", {"item_code": item.name, "price_list": pl}):
-				continue
-
-			doc = frappe.new_doc("Item Price")
-			doc.item_code = item.name
-			doc.price_list = pl
-			doc.price_list_rate = rate
-			doc.currency = price_list_currency
-			doc.selling = 1
-			doc.buying = 0
-			doc.uom = item.stock_uom
-			doc.insert(ignore_permissions=True)
+		# A new profile may change which warehouse later steps treat as the POS default
+		ctx.forget("default_pos_warehouse")
+
+
+@profiled
+def _ensure_item_prices(
+	price_lists: dict,
+	fallback_currency: str,
+	batch_size: int = 500,
+	item_names: list[str] | None = None,
+	detail_file: str | None = None,
+) -> dict:
+	"""
+	Backfill Item Price rows for all selling price lists using Item.standard_rate.
+
+	Items are read in pages of `batch_size`; returns `inserted`/`skipped` counts
+	(per price list row) and streams per-row detail to `detail_file` if given.
+	"""
+	with SyncReport("inserted", "skipped", detail_file=detail_file) as report:
+		selling_lists = [pl_name for pl_name in (price_lists or {}).values() if pl_name]
+		if not selling_lists or (item_names is not None and not item_names):
+			return report.as_dict()
+
+		currencies = {
+			row.name: row.currency
+			for row in frappe.get_all(
+				"Price List", filters={"name": ["in", selling_lists]}, fields=["name", "currency"]
+			)
+		}
+		item_filters = {"name": ["in", item_names]} if item_names is not None else None
+		fields = ["name", "item_name", "standard_rate", "stock_uom"]
+
+		for page in iter_pages("Item", fields, filters=item_filters, page_size=batch_size):
+			codes = [item.name for item in page]
+			existing = {
+				(row.price_list, row.item_code)
+				for row in frappe.get_all(
+					"Item Price",
+					filters={"price_list": ["in", selling_lists], "item_code": ["in", codes]},
+					fields=["price_list", "item_code"],
+				)
+			}
+
+			rows = []
+			for pl in selling_lists:
+				price_list_currency = currencies.get(pl) or fallback_currency
+				for item in page:
+					rate = item.standard_rate or 0
+					if float(rate) <= 0 or (pl, item.name) in existing:
+						reason = "exists" if (pl, item.name) in existing else "no rate"
+						report.record("skipped", item.name, reason, price_list=pl)
+						continue
+					rows.append(
+						{
+							"item_code": item.name,
+							"item_name": item.item_name,
+							"price_list": pl,
+							"price_list_rate": rate,
+							"currency": price_list_currency,
+							"selling": 1,
+							"buying": 0,
+							"uom": item.stock_uom,
+						}
+					)
+					report.record("inserted", item.name, price_list=pl)
+
+			bulk_insert_docs("Item Price", rows, batch_size=batch_size)
+
+		# Bulk inserts skip the Item Price hooks that would clear the price cache
+		if report.counts["inserted"]:
+			clear_price_cache(selling_lists)
+
+	return report.as_dict()
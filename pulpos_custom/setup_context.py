@@ -0,0 +1,108 @@
+"""Per-run memo of schema capabilities and site configuration for setup, sync and patches."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+import frappe
+
+DEFAULT_POS_PROFILE = "POS FerreTlap Main"
+
+
+class SetupContext:
+	"""
+	Answers schema checks and config lookups once per run.
+
+	Values are memoised for the lifetime of the context, so only use it for
+	facts that do not change while a setup run is in progress.
+	"""
+
+	def __init__(self):
+		self._memo: dict[tuple, Any] = {}
+
+	def cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+		if key not in self._memo:
+			self._memo[key] = compute()
+		return self._memo[key]
+
+	def forget(self, *key) -> None:
+		"""Drop a memoised value after the run itself changes it."""
+		self._memo.pop(key, None)
+
+	def has_column(self, doctype: str, column: str) -> bool:
+		"""Column existence, guarding against missing tables."""
+
+		def compute():
+			try:
+				return frappe.db.has_column(doctype, column)
+			except Exception:
+				return False
+
+		return self.cached(("has_column", doctype, column), compute)
+
+	def table_exists(self, doctype: str) -> bool:
+		"""Return True if the underlying table for the DocType exists."""
+
+		def compute():
+			try:
+				return frappe.db.table_exists(f"tab{doctype}")
+			except Exception:
+				return False
+
+		return self.cached(("table_exists", doctype), compute)
+
+	def doctype_exists(self, doctype: str) -> bool:
+		return self.cached(("doctype_exists", doctype), lambda: bool(frappe.db.exists("DocType", doctype)))
+
+	def doctype_ready(self, doctype: str) -> bool:
+		"""DocType is installed and its table exists (e.g. optional E Commerce/Portal settings)."""
+		return self.doctype_exists(doctype) and self.table_exists(doctype)
+
+	def get_meta(self, doctype: str):
+		return self.cached(("meta", doctype), lambda: frappe.get_meta(doctype))
+
+	def has_field(self, doctype: str, fieldname: str) -> bool:
+		return bool(self.get_meta(doctype).has_field(fieldname))
+
+	def site_config(self) -> dict:
+		return self.cached(("site_config",), frappe.get_site_config)
+
+	def default_pos_warehouse(self) -> str | None:
+		"""Return the default POS Profile warehouse if configured."""
+
+		def compute():
+			# Prefer the configured profile "POS FerreTlap Main" if it exists and has a warehouse
+			preferred = frappe.db.get_value("POS Profile", {"name": DEFAULT_POS_PROFILE}, "warehouse")
+			if preferred:
+				return preferred
+
+			pos_profiles = frappe.get_all(
+				"POS Profile",
+				fields=["warehouse"],
+				filters={"warehouse": ["is", "set"]},
+				order_by="modified desc",
+				limit_page_length=1,
+			)
+			return pos_profiles[0].warehouse if pos_profiles else None
+
+		return self.cached(("default_pos_warehouse",), compute)
+
+	def any_leaf_warehouse(self) -> str | None:
+		return self.cached(
+			("any_leaf_warehouse",), lambda: frappe.db.get_value("Warehouse", {"is_group": 0}, "name")
+		)
+
+
+def get_setup_context() -> SetupContext:
+	"""Return the context for the current request/job, creating it on first use."""
+	context = getattr(frappe.local, "pulpos_setup_context", None)
+	if context is None:
+		context = frappe.local.pulpos_setup_context = SetupContext()
+	return context
+
+
+def reset_setup_context() -> SetupContext:
+	"""Start a fresh run (e.g. after patches that ran earlier in the same migrate)."""
+	frappe.local.pulpos_setup_context = SetupContext()
+	return frappe.local.pulpos_setup_context
@@ -0,0 +1,76 @@
+"""Cheap input fingerprints so unchanged setup steps can be skipped on migrate."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+
+import frappe
+
+import pulpos_custom
+from pulpos_custom.setup_context import get_setup_context
+
+STATE_KEY = "pulpos_custom_setup_fingerprints"
+
+
+class SetupFingerprints:
+	"""
+	Row count and last `modified` of each input DocType, measured in one query.
+
+	A step's fingerprint combines those stats for its inputs with the app
+	version, so code changes and data changes both invalidate it.
+	"""
+
+	def __init__(self, step_inputs: dict[str, tuple[str, ...]]):
+		self.step_inputs = step_inputs
+		value = frappe.db.get_global(STATE_KEY)
+		self.stored: dict[str, str] = json.loads(value) if value else {}
+		self.stats = measure({doctype for inputs in step_inputs.values() for doctype in inputs})
+
+	def fingerprint(self, step: str, extra=None) -> str:
+		payload = [pulpos_custom.__version__, step, extra]
+		payload.extend([doctype, self.stats.get(doctype)] for doctype in self.step_inputs[step])
+		return hashlib.sha1(json.dumps(payload, default=str).encode()).hexdigest()
+
+	def changed(self, step: str, extra=None) -> bool:
+		return self.stored.get(step) != self.fingerprint(step, extra)
+
+	def save(self, steps: dict[str, object]):
+		"""Re-measure after the run and store fingerprints for `{step: extra}`."""
+		if not steps:
+			return
+		self.stats = measure({doctype for step in steps for doctype in self.step_inputs[step]})
+		for step, extra in steps.items():
+			self.stored[step] = self.fingerprint(step, extra)
+		frappe.db.set_global(STATE_KEY, json.dumps(self.stored))
+
+
+def measure(doctypes: set[str]) -> dict[str, list]:
+	"""Return {doctype: [row count, max modified]} for all inputs with a single query."""
+	ctx = get_setup_context()
+	tables, singles = [], []
+	for doctype in sorted(doctypes):
+		try:
+			meta = ctx.get_meta(doctype)
+		except Exception:
+			continue
+		(singles if meta.issingle else tables).append(doctype)
+
+	parts, values = [], []
+	for doctype in tables:
+		parts.append(f"select %s, count(*), max(modified) from `tab{doctype}`")
+		values.append(doctype)
+	if singles:
+		parts.append(
+			"select doctype, count(*), max(value) from `tabSingles` "
+			"where field = 'modified' and doctype in %s group by doctype"
+		)
+		values.append(tuple(singles))
+	if not parts:
+		return {}
+
+	return {
+		doctype: [count, str(modified) if modified else None]
+		for doctype, count, modified in frappe.db.sql(" union all ".join(parts), values)
+	}
+
@@ -0,0 +1,208 @@
+"""Chunked, resumable background jobs for the catalog-wide setup steps."""
+
+from __future__ import annotations
+
+import json
+
+import frappe
+from frappe.utils import now
+
+from pulpos_custom import setup
+from pulpos_custom.images import generate_website_thumbnails
+from pulpos_custom.setup_fingerprint import SetupFingerprints
+from pulpos_custom.website_sync import create_website_items
+
+STATE_KEY = "pulpos_custom_catalog_jobs"
+CHUNK_SIZE = 500
+COMPANY = "FerreTlap"
+WEBSITE_PRICE_LIST = "FerreTlap Retail"
+
+
+def _run_item_prices(names: list[str], context: dict):
+	setup._ensure_item_prices(context["price_lists"], context["currency"], item_names=names)
+
+
+def _run_website_items(names: list[str], context: dict):
+	create_website_items(price_list=WEBSITE_PRICE_LIST, publish=1, bulk=1, item_names=names)
+
+
+def _run_website_item_backfill(names: list[str], context: dict):
+	setup._backfill_website_items(names)
+
+
+def _run_thumbnails(names: list[str], context: dict):
+	generate_website_thumbnails(website_items=names)
+
+
+# Ordered steps: (name, doctype the chunks are cut from, filters on it, runner)
+CATALOG_STEPS = (
+	("item_prices", "Item", {}, _run_item_prices),
+	("website_items", "Item", {"disabled": 0}, _run_website_items),
+	("website_item_backfill", "Website Item", {"published": 1}, _run_website_item_backfill),
+	("thumbnails", "Website Item", {"website_image": ["is", "set"]}, _run_thumbnails),
+)
+
+
+def enqueue_catalog_jobs(restart: int = 0) -> dict:
+	"""
+	Queue the catalog steps, resuming an unfinished run from its last checkpoint.
+
+	A completed run (or `restart=1`) starts over from the first step.
+
+	Run with:
+	bench --site <site> execute "pulpos_custom.setup_jobs.enqueue_catalog_jobs"
+	"""
+	state = _load_state()
+	if restart or not state or state["status"] == "completed":
+		state = _new_state()
+	else:
+		state["status"] = "queued"
+		state["error"] = None
+	if not state.get("context"):
+		# Resolved once per run; a resumed run keeps the one it started with
+		state["context"] = _resolve_context()
+
+	_save_state(state)
+	_enqueue_chunk(state, state["context"])
+	return state
+
+
+def run_catalog_chunk(run_id: str, context: dict | None = None):
+	"""
+	Process one chunk of the current step, checkpoint it and queue the next chunk.
+
+	`context` (company currency and price lists) is resolved when the run starts
+	and handed from chunk to chunk.
+	"""
+	state = _load_state()
+	if not state or state["run_id"] != run_id or state["status"] == "completed":
+		return
+	context = context or state["context"]
+
+	step = _current_step(state)
+	if not step:
+		_finish(state)
+		return
+
+	name, doctype, filters, runner = step
+	progress = state["steps"][name]
+	state["status"] = "running"
+
+	chunk_filters = dict(filters)
+	if progress["last_name"]:
+		chunk_filters["name"] = [">", progress["last_name"]]
+	names = frappe.get_all(
+		doctype, filters=chunk_filters, order_by="name asc", limit_page_length=CHUNK_SIZE, pluck="name"
+	)
+
+	try:
+		if names:
+			runner(names, context)
+	except Exception as exc:
+		frappe.db.rollback()
+		state["status"] = "failed"
+		state["error"] = f"{name}: {exc}"
+		_save_state(state)
+		frappe.log_error(
+			f"Catalog step {name} failed after {progress['last_name']}: {exc}", "pulpos_custom.setup_jobs"
+		)
+		raise
+
+	if names:
+		progress["last_name"] = names[-1]
+		progress["processed"] += len(names)
+		progress["chunks"] += 1
+	if len(names) < CHUNK_SIZE:
+		progress["status"] = "completed"
+		progress["finished_at"] = now()
+	else:
+		progress["status"] = "running"
+
+	_save_state(state)
+	if _current_step(state):
+		_enqueue_chunk(state, context)
+	else:
+		_finish(state)
+
+
+@frappe.whitelist()
+def get_catalog_job_status() -> dict:
+	"""Report progress of the current catalog run per step."""
+	frappe.only_for("System Manager")
+	state = _load_state()
+	if not state:
+		return {"status": "not_started", "steps": {}}
+
+	for name, doctype, filters, _runner in CATALOG_STEPS:
+		progress = state["steps"].setdefault(name, _new_step())
+		progress["total"] = frappe.db.count(doctype, filters)
+	return state
+
+
+def _current_step(state: dict):
+	for step in CATALOG_STEPS:
+		if state["steps"].get(step[0], {}).get("status") != "completed":
+			return step
+	return None
+
+
+def _finish(state: dict):
+	state["status"] = "completed"
+	state["finished_at"] = now()
+	# The run's own writes changed its inputs; record them so the next migrate can skip it
+	SetupFingerprints(setup.SETUP_STEP_INPUTS).save({"catalog_jobs": None})
+	_save_state(state)
+
+
+def is_complete() -> bool:
+	"""True when no catalog run is pending, running or failed."""
+	state = _load_state()
+	return bool(state) and state["status"] == "completed"
+
+
+def _resolve_context() -> dict:
+	currency = setup._get_company_currency(setup._ensure_company(COMPANY))
+	return {"currency": currency, "price_lists": setup._create_price_lists(currency)}
+
+
+def _enqueue_chunk(state: dict, context: dict):
+	step = _current_step(state)
+	if not step:
+		return
+	progress = state["steps"][step[0]]
+	frappe.enqueue(
+		"pulpos_custom.setup_jobs.run_catalog_chunk",
+		queue="long",
+		run_id=state["run_id"],
+		context=context,
+		# One id per chunk so a rerun does not double-queue a chunk that is already pending
+		job_id=f"pulpos_custom_catalog:{state['run_id']}:{step[0]}:{progress['chunks']}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def _new_step() -> dict:
+	return {"status": "pending", "last_name": None, "processed": 0, "chunks": 0, "finished_at": None}
+
+
+def _new_state() -> dict:
+	return {
+		"run_id": frappe.generate_hash(length=8),
+		"status": "queued",
+		"started_at": now(),
+		"finished_at": None,
+		"error": None,
+		"steps": {step[0]: _new_step() for step in CATALOG_STEPS},
+	}
+
+
+def _load_state() -> dict | None:
+	value = frappe.db.get_global(STATE_KEY)
+	return json.loads(value) if value else None
+
+
+def _save_state(state: dict):
+	state["updated_at"] = now()
+	frappe.db.set_global(STATE_KEY, json.dumps(state))
+	frappe.db.commit()
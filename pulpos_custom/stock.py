@@ -0,0 +1,217 @@
+"""Server-side stock checks for sales documents."""
+
+from __future__ import annotations
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+STOCK_CACHE_KEY = "pulpos_custom:bin_qty"
+STOCK_CACHE_TTL = 30  # seconds
+
+
+@frappe.whitelist()
+def get_stock_shortfalls(lines) -> list[dict]:
+	"""
+	Check many (item_code, warehouse, qty) lines against available-to-sell quantity at once.
+
+	- Quantities of duplicate item/warehouse lines are summed before comparing.
+	- Available is actual less reserved and unconsolidated POS quantity, as on submit;
+	  lines with a `so_detail` may use their own Sales Order's reservation.
+
+	Returns one entry per item/warehouse that does not have enough stock.
+	"""
+	if isinstance(lines, str):
+		lines = json.loads(lines)
+	required, linked = _required_qtys(lines or [])
+	return _shortfalls(required, get_available_qty_map(list(required), linked))
+
+
+def validate_stock_on_submit(doc, method=None):
+	"""
+	before_submit handler for Sales Order, Sales Invoice and POS Invoice: stop overselling.
+
+	Lines are summed per item/warehouse and the Bins locked in one `for update` query at
+	the end of validation, so concurrent submits queue only on the SKUs they share and
+	hold the locks just until commit. Shortfalls are rejected, or only reported when
+	Stock Settings allow negative stock.
+	"""
+	if cint(doc.get("is_return")) or (doc.doctype == "Sales Invoice" and not cint(doc.get("update_stock"))):
+		return
+	# POS Merge Log submits the consolidated invoice before setting `consolidated_invoice` on its
+	# POS Invoices, whose stock was checked when they were submitted
+	if cint(doc.get("is_consolidated")):
+		return
+	lines = [
+		{
+			"item_code": row.item_code,
+			"warehouse": row.get("warehouse") or doc.get("set_warehouse"),
+			"qty": row.get("stock_qty") or flt(row.qty) * flt(row.get("conversion_factor") or 1),
+			"so_detail": row.get("so_detail"),
+		}
+		for row in doc.get("items") or []
+	]
+	required, linked = _required_qtys(lines)
+	stock_items = set(
+		frappe.get_all(
+			"Item",
+			filters={"name": ["in", list({item for item, warehouse in required})], "is_stock_item": 1},
+			pluck="name",
+		)
+		if required
+		else ()
+	)
+	required = {pair: qty for pair, qty in required.items() if pair[0] in stock_items}
+	shortfalls = _shortfalls(required, get_available_qty_map(list(required), linked, for_update=True))
+	if not shortfalls:
+		return
+
+	message = _("Not enough stock to submit {0}:").format(doc.name) + "<br>" + "<br>".join(
+		_("{0} @ {1}: need {2}, available {3}").format(
+			row["item_code"], row["warehouse"], row["required"], row["available"]
+		)
+		for row in shortfalls
+	)
+	if cint(frappe.db.get_single_value("Stock Settings", "allow_negative_stock")):
+		frappe.msgprint(message, title=_("Insufficient Stock"), indicator="orange")
+	else:
+		frappe.throw(message, title=_("Insufficient Stock"))
+
+
+def get_available_qty_map(
+	pairs: list[tuple[str, str]], linked: dict | None = None, for_update: bool = False
+) -> dict[tuple[str, str], float]:
+	"""
+	Return {(item_code, warehouse): actual - reserved - unconsolidated POS qty} from two queries.
+
+	- `linked` is stock qty per pair already reserved by the lines' own Sales Orders; that
+	  much of the reservation stays available to them.
+	- `for_update` locks the Bins (in name order, so concurrent submits do not deadlock)
+	  and reads POS Invoices with a shared lock, so both see the latest committed rows.
+	- Rows are matched on the exact pairs, so only those Bins are locked, not every
+	  item/warehouse combination of the lines.
+	"""
+	if not pairs:
+		return {}
+	linked = linked or {}
+	pairs = list(dict.fromkeys(pairs))
+	values = [value for pair in pairs for value in pair]
+	bins = frappe.db.sql(
+		f"""
+		select item_code, warehouse, actual_qty, reserved_qty
+		from `tabBin`
+		where {_pair_condition(len(pairs))}
+		order by name
+		{"for update" if for_update else ""}
+		""",
+		values,
+		as_dict=True,
+	)
+	share_lock = ""
+	if for_update:
+		share_lock = "for share" if frappe.db.db_type == "postgres" else "lock in share mode"
+	pos_reserved = {
+		(row.item_code, row.warehouse): flt(row.qty)
+		for row in frappe.db.sql(
+			f"""
+			select item.item_code, item.warehouse, sum(item.stock_qty) as qty
+			from `tabPOS Invoice Item` item
+			join `tabPOS Invoice` invoice on invoice.name = item.parent
+			where invoice.docstatus = 1 and ifnull(invoice.consolidated_invoice, '') = ''
+				and ({_pair_condition(len(pairs), "item.")})
+			group by item.item_code, item.warehouse
+			{share_lock}
+			""",
+			values,
+			as_dict=True,
+		)
+	}
+
+	result = {pair: -pos_reserved.get(pair, 0.0) for pair in pairs}
+	for row in bins:
+		pair = (row.item_code, row.warehouse)
+		if pair in result:
+			reserved = max(flt(row.reserved_qty) - linked.get(pair, 0.0), 0.0)
+			result[pair] += flt(row.actual_qty) - reserved
+	return result
+
+
+def get_actual_qty_map(pairs: list[tuple[str, str]]) -> dict[tuple[str, str], float]:
+	"""Return {(item_code, warehouse): actual_qty}, reading only uncached pairs from Bin."""
+	if not pairs:
+		return {}
+
+	cache = frappe.cache()
+	result = {}
+	missing = []
+	for pair, value in zip(pairs, cache.mget([cache.make_key(_cache_key(*pair)) for pair in pairs])):
+		if value is None:
+			missing.append(pair)
+		else:
+			result[pair] = flt(value)
+
+	if missing:
+		found = {
+			(row.item_code, row.warehouse): flt(row.actual_qty)
+			for row in frappe.get_all(
+				"Bin",
+				filters={
+					"item_code": ["in", list({item for item, _ in missing})],
+					"warehouse": ["in", list({wh for _, wh in missing})],
+				},
+				fields=["item_code", "warehouse", "actual_qty"],
+			)
+		}
+		pipe = cache.pipeline()
+		for pair in missing:
+			result[pair] = found.get(pair, 0.0)
+			pipe.setex(cache.make_key(_cache_key(*pair)), STOCK_CACHE_TTL, result[pair])
+		pipe.execute()
+
+	return result
+
+
+def clear_stock_cache(doc, method=None):
+	"""Stock change handler: drop the cached quantity for the changed item/warehouse after commit."""
+	if doc.get("item_code") and doc.get("warehouse"):
+		key = _cache_key(doc.item_code, doc.warehouse)
+		# Deleting before commit would let a concurrent read cache the old quantity again
+		frappe.db.after_commit.add(lambda: frappe.cache().delete_value(key))
+
+
+def _required_qtys(lines: list[dict]) -> tuple[dict, dict]:
+	"""Sum qty per (item_code, warehouse), and separately the part drawn from Sales Orders."""
+	required: dict[tuple[str, str], float] = {}
+	linked: dict[tuple[str, str], float] = {}
+	for line in lines:
+		item_code, warehouse, qty = line.get("item_code"), line.get("warehouse"), flt(line.get("qty"))
+		if not item_code or not warehouse or qty <= 0:
+			continue
+		required[(item_code, warehouse)] = required.get((item_code, warehouse), 0.0) + qty
+		if line.get("so_detail"):
+			linked[(item_code, warehouse)] = linked.get((item_code, warehouse), 0.0) + qty
+	return required, linked
+
+
+def _shortfalls(required: dict, available: dict) -> list[dict]:
+	return [
+		{
+			"item_code": item_code,
+			"warehouse": warehouse,
+			"required": qty,
+			"available": available[(item_code, warehouse)],
+		}
+		for (item_code, warehouse), qty in required.items()
+		if qty > available[(item_code, warehouse)]
+	]
+
+
+def _pair_condition(count: int, alias: str = "") -> str:
+	"""`(item_code = %s and warehouse = %s) or ...`: one range on the (item_code, warehouse) index per pair."""
+	return " or ".join([f"({alias}item_code = %s and {alias}warehouse = %s)"] * count)
+
+
+def _cache_key(item_code: str, warehouse: str) -> str:
+	return f"{STOCK_CACHE_KEY}:{item_code}:{warehouse}"
@@ -0,0 +1,56 @@
+"""
+Stock change fan-out to the Website Item sync, stock cache, rollups, scan entries and realtime push.
+
+ERPNext writes Bin quantities with `frappe.db.set_value` (stock_ledger's update_bin,
+Bin.update_qty, reserved and ordered quantities), which fires no Bin doc_events.
+Stock Ledger Entries announce stock moves as they post; a `Bin.modified` sweep
+catches the writes no ledger entry announces.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import now
+
+from pulpos_custom.pos_scan import on_price_or_stock_change
+from pulpos_custom.stock import clear_stock_cache
+from pulpos_custom.stock_push import queue_stock_push
+from pulpos_custom.stock_rollup import queue_rollup_refresh
+from pulpos_custom.website_events import queue_item_sync
+
+WATERMARK_KEY = "pulpos_custom_bin_watermark"
+# Each takes a doc with item_code and warehouse and defers its work until after commit
+STOCK_HANDLERS = (
+	queue_item_sync,
+	clear_stock_cache,
+	queue_stock_push,
+	queue_rollup_refresh,
+	on_price_or_stock_change,
+)
+
+
+def on_stock_change(doc, method=None):
+	"""Stock Ledger Entry doc_events handler: refresh everything derived from the item/warehouse's Bin."""
+	if not doc.get("item_code") or not doc.get("warehouse"):
+		return
+	for handler in STOCK_HANDLERS:
+		handler(doc, method)
+
+
+def sync_modified_bins():
+	"""
+	Fan out Bins modified since the last run, using a `modified` watermark.
+
+	Covers reserved/ordered quantities and reposts, which post no Stock Ledger
+	Entry. The first run only records the watermark.
+	"""
+	started_at = now()
+	watermark = frappe.db.get_global(WATERMARK_KEY)
+	if watermark:
+		for row in frappe.get_all(
+			"Bin", filters={"modified": [">", watermark]}, fields=["item_code", "warehouse"]
+		):
+			on_stock_change(frappe._dict(row, doctype="Bin"))
+
+	frappe.db.set_global(WATERMARK_KEY, started_at)
+	frappe.db.commit()
@@ -0,0 +1,106 @@
+"""In-memory item x warehouse stock snapshot for bulk warehouse selection."""
+
+from __future__ import annotations
+
+import frappe
+
+from pulpos_custom.setup_context import get_setup_context
+
+
+class StockMatrix:
+	"""
+	Positive Bin quantities loaded in one streamed query.
+
+	Warehouses are interned to small integers so each item only holds a
+	`{warehouse_index: qty}` dict of the warehouses that actually have stock.
+	"""
+
+	def __init__(self):
+		self._warehouses: list[str] = []
+		self._warehouse_index: dict[str, int] = {}
+		self._stock: dict[str, dict[int, float]] = {}
+		self._default_warehouses: dict[str, str] = {}
+
+	@classmethod
+	def load(cls, item_codes: list[str] | None = None) -> StockMatrix:
+		"""Read stocked Bins (and Item default warehouses when that column exists)."""
+		matrix = cls()
+		conditions = "actual_qty > 0"
+		values = {}
+		if item_codes is not None:
+			if not item_codes:
+				return matrix
+			conditions += " and item_code in %(item_codes)s"
+			values["item_codes"] = tuple(item_codes)
+
+		with frappe.db.unbuffered_cursor():
+			for item_code, warehouse, qty in frappe.db.sql(
+				f"select item_code, warehouse, actual_qty from `tabBin` where {conditions}",
+				values,
+				as_iterator=True,
+			):
+				matrix.add(item_code, warehouse, qty)
+
+		if get_setup_context().has_column("Item", "default_warehouse"):
+			item_filter = "and name in %(item_codes)s" if item_codes is not None else ""
+			matrix._default_warehouses = dict(
+				frappe.db.sql(
+					f"""
+					select name, default_warehouse
+					from `tabItem`
+					where ifnull(default_warehouse, '') != '' {item_filter}
+					""",
+					values,
+				)
+			)
+		return matrix
+
+	def add(self, item_code: str, warehouse: str, qty) -> None:
+		try:
+			qty = float(qty or 0)
+		except Exception:
+			return
+		if not item_code or not warehouse or qty <= 0:
+			return
+		index = self._warehouse_index.get(warehouse)
+		if index is None:
+			index = self._warehouse_index[warehouse] = len(self._warehouses)
+			self._warehouses.append(warehouse)
+		row = self._stock.setdefault(item_code, {})
+		row[index] = row.get(index, 0.0) + qty
+
+	def qty(self, item_code: str, warehouse: str) -> float:
+		index = self._warehouse_index.get(warehouse)
+		if index is None:
+			return 0.0
+		return self._stock.get(item_code, {}).get(index, 0.0)
+
+	def has_stock(self, item_code: str, warehouse: str | None) -> bool:
+		if not item_code or not warehouse:
+			return False
+		return self.qty(item_code, warehouse) > 0
+
+	def best_warehouse(self, item_code: str) -> str | None:
+		"""Warehouse holding the most stock for the item, if any."""
+		row = self._stock.get(item_code)
+		if not row:
+			return None
+		return self._warehouses[max(row, key=row.get)]
+
+	def default_warehouse(self, item_code: str) -> str | None:
+		return self._default_warehouses.get(item_code)
+
+	def pick_warehouse(
+		self, item_code: str, current_wh: str | None, pos_wh: str | None, fallback: str | None
+	) -> str | None:
+		"""Pick a warehouse that actually has stock, preferring current -> POS -> default -> any stocked -> fallback."""
+		if not item_code:
+			return current_wh or pos_wh or fallback
+
+		default_wh = self.default_warehouse(item_code)
+		for wh in (current_wh, pos_wh, default_wh, self.best_warehouse(item_code), fallback):
+			if self.has_stock(item_code, wh):
+				return wh
+
+		# No stock anywhere, keep existing or fallback for consistency
+		return current_wh or pos_wh or default_wh or fallback
@@ -0,0 +1,120 @@
+"""
+Coalesced realtime stock updates, published per warehouse.
+
+Messages go to the Warehouse's document room, which only sessions with read
+permission on that Warehouse can join (POS terminals, desk forms). Shop and
+product pages are not subscribed: guests cannot join those rooms, and their
+stock comes from the website catalog table, refreshed by the sync queue.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+
+import frappe
+from frappe.utils import flt
+
+STOCK_EVENT = "pulpos_stock_update"
+BUFFER_KEY = "pulpos_custom:stock_push"
+FLUSH_JOB_ID = "pulpos_custom_stock_push"
+# Changes within this window are merged into one message per warehouse
+FLUSH_WINDOW = 1.0  # seconds
+FIRST_CHANGE_FIELD = "__first_change"
+
+
+def queue_stock_push(doc, method=None):
+	"""
+	Stock change handler: buffer the item/warehouse once the transaction commits.
+
+	Quantities are read from Bin when the buffer drains, since ERPNext writes them
+	after the Stock Ledger Entry is submitted.
+	"""
+	if not doc.get("item_code") or not doc.get("warehouse"):
+		return
+	field = json.dumps([doc.warehouse, doc.item_code])
+	frappe.db.after_commit.add(lambda: _buffer_change(field))
+
+
+def flush_stock_push():
+	"""
+	Publish buffered Bin changes, one realtime message per warehouse.
+
+	Drains once the oldest buffered change is `FLUSH_WINDOW` old so a burst (e.g.
+	a large Stock Entry) goes out as one message. A job waits for at most the rest
+	of its own window (frappe.enqueue has no delayed start); changes that arrive
+	after the drain queue the next window's job instead of keeping this one busy.
+	"""
+	cache = frappe.cache()
+	key = cache.make_key(BUFFER_KEY)
+	(first_change,) = cache.pipeline().hget(key, FIRST_CHANGE_FIELD).execute()
+	if not first_change:
+		return
+	wait = FLUSH_WINDOW - (time.time() - float(first_change))
+	if wait > 0:
+		time.sleep(min(wait, FLUSH_WINDOW))
+
+	changes, _ = cache.pipeline().hgetall(key).delete(key).execute()
+	publish_stock_changes(changes)
+
+	(first_change,) = cache.pipeline().hget(key, FIRST_CHANGE_FIELD).execute()
+	if first_change:
+		# Buffered after the drain; their own enqueue may have been deduplicated against this job
+		_enqueue_flush(window_offset=1)
+
+
+def publish_stock_changes(changes: dict) -> dict[str, dict]:
+	"""Read the current Bin quantities for raw buffer entries and publish them per Warehouse room."""
+	pairs = set()
+	for field in changes or {}:
+		field = field.decode() if isinstance(field, bytes) else field
+		if field != FIRST_CHANGE_FIELD:
+			pairs.add(tuple(json.loads(field)))
+	if not pairs:
+		return {}
+
+	# One read for the whole window; rows outside the buffered pairs are dropped below
+	bins = frappe.get_all(
+		"Bin",
+		filters={
+			"warehouse": ["in", list({warehouse for warehouse, _ in pairs})],
+			"item_code": ["in", list({item_code for _, item_code in pairs})],
+		},
+		fields=["warehouse", "item_code", "actual_qty", "projected_qty"],
+	)
+	qtys = {(row.warehouse, row.item_code): row for row in bins}
+	by_warehouse: dict[str, dict] = {}
+	for warehouse, item_code in pairs:
+		row = qtys.get((warehouse, item_code)) or {}
+		by_warehouse.setdefault(warehouse, {})[item_code] = {
+			"actual_qty": flt(row.get("actual_qty")),
+			"projected_qty": flt(row.get("projected_qty")),
+		}
+
+	for warehouse, items in by_warehouse.items():
+		# Only sessions subscribed to this Warehouse (POS terminals, open forms) receive it
+		frappe.publish_realtime(
+			STOCK_EVENT,
+			{"warehouse": warehouse, "items": items},
+			doctype="Warehouse",
+			docname=warehouse,
+		)
+	return by_warehouse
+
+
+def _buffer_change(field: str):
+	cache = frappe.cache()
+	key = cache.make_key(BUFFER_KEY)
+	# Repeated changes share one field, so each item/warehouse is sent once per window
+	cache.pipeline().hset(key, field, 1).hsetnx(key, FIRST_CHANGE_FIELD, time.time()).execute()
+	_enqueue_flush()
+
+
+def _enqueue_flush(window_offset: int = 0):
+	frappe.enqueue(
+		"pulpos_custom.stock_push.flush_stock_push",
+		queue="short",
+		# One job per window: a change that lands while a flush is finishing still gets its own job
+		job_id=f"{FLUSH_JOB_ID}:{int(time.time() // FLUSH_WINDOW) + window_offset}",
+		deduplicate=True,
+	)
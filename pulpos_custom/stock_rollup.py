@@ -0,0 +1,222 @@
+"""Stock per item rolled up to every group node of the warehouse tree."""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import flt
+
+from pulpos_custom.stock import get_actual_qty_map
+
+ROLLUP_KEY = "pulpos_custom:stock_rollup"
+BUILT_KEY = "pulpos_custom:stock_rollup_built"
+TREE_KEY = "pulpos_custom:warehouse_tree"
+PENDING_KEY = "pulpos_custom:stock_rollup_pending"
+REFRESH_JOB_ID = "pulpos_custom_stock_rollup"
+REFRESH_BATCH_SIZE = 500
+WRITE_BATCH_SIZE = 5000
+
+
+def get_rollup_qtys(pairs: list[tuple[str, str]]) -> dict[tuple[str, str], float]:
+	"""
+	Return {(item_code, warehouse): qty} where group warehouses include their whole subtree.
+
+	Group lookups are one Redis hash read each (pipelined); leaves use the Bin cache.
+	"""
+	tree = get_warehouse_tree()
+	groups = [pair for pair in pairs if tree["groups"].get(pair[1])]
+	leaves = [pair for pair in pairs if not tree["groups"].get(pair[1])]
+	result = get_actual_qty_map(leaves) if leaves else {}
+	if not groups:
+		return result
+
+	cache = frappe.cache()
+	if not cache.get_value(BUILT_KEY):
+		# Not built yet (or Redis was flushed): answer from Bin and rebuild in the background
+		_enqueue_rebuild()
+		result.update(_sum_from_bins(groups, tree))
+		return result
+
+	pipe = cache.pipeline()
+	for item_code, warehouse in groups:
+		pipe.hget(_node_key(warehouse), item_code)
+	for pair, value in zip(groups, pipe.execute()):
+		result[pair] = flt(value)
+	return result
+
+
+@frappe.whitelist()
+def get_stock_availability(item_codes, warehouse: str) -> dict[str, float]:
+	"""Qty per item in `warehouse`, a leaf or any group such as a company root or branch."""
+	item_codes = frappe.parse_json(item_codes) if isinstance(item_codes, str) else item_codes
+	qtys = get_rollup_qtys([(code, warehouse) for code in item_codes or []])
+	return {code: qtys.get((code, warehouse), 0.0) for code in item_codes or []}
+
+
+@frappe.whitelist()
+def get_item_availability(item_code: str) -> dict[str, float]:
+	"""Qty of one item at every warehouse node that has it, for the warehouse picker."""
+	tree = get_warehouse_tree()
+	leaves = {
+		row.warehouse: flt(row.actual_qty)
+		for row in frappe.get_all(
+			"Bin", filters={"item_code": item_code, "actual_qty": ["!=", 0]}, fields=["warehouse", "actual_qty"]
+		)
+	}
+	groups = get_rollup_qtys([(item_code, group) for group in tree["groups"]])
+	return {**leaves, **{group: qty for (_, group), qty in groups.items() if qty}}
+
+
+def get_warehouse_tree() -> dict:
+	"""`{"groups": {group: 1}, "ancestors": {warehouse: [group, ...]}}` from lft/rgt, cached."""
+	return frappe.cache().get_value(TREE_KEY, generator=_build_warehouse_tree)
+
+
+def rebuild_stock_rollup() -> int:
+	"""
+	Recompute every group node from one streamed Bin read; returns the nodes written.
+
+	Each node is written to a temporary key and renamed into place, so lookups
+	never see a half-built node.
+
+	Run with:
+	bench --site <site> execute "pulpos_custom.stock_rollup.rebuild_stock_rollup"
+	"""
+	frappe.cache().delete_value(TREE_KEY)
+	tree = get_warehouse_tree()
+	totals: dict[str, dict[str, float]] = {group: {} for group in tree["groups"]}
+	with frappe.db.unbuffered_cursor():
+		for item_code, warehouse, qty in frappe.db.sql(
+			"select item_code, warehouse, actual_qty from `tabBin` where actual_qty != 0", as_iterator=True
+		):
+			for group in tree["ancestors"].get(warehouse, ()):
+				node = totals[group]
+				node[item_code] = node.get(item_code, 0.0) + flt(qty)
+
+	cache = frappe.cache()
+	for group, items in totals.items():
+		key = _node_key(group)
+		temp_key = f"{key}:rebuilding"
+		pipe = cache.pipeline()
+		pipe.delete(temp_key)
+		fields = [(code, qty) for code, qty in items.items() if qty]
+		for start in range(0, len(fields), WRITE_BATCH_SIZE):
+			pipe.hset(temp_key, mapping=dict(fields[start : start + WRITE_BATCH_SIZE]))
+		if fields:
+			pipe.rename(temp_key, key)
+		else:
+			pipe.delete(key)
+		pipe.execute()
+
+	cache.set_value(BUILT_KEY, 1)
+	return len(totals)
+
+
+def queue_rollup_refresh(doc, method=None):
+	"""Stock change handler: recompute the item's group totals after commit."""
+	if doc.get("item_code"):
+		item_code = doc.item_code
+		frappe.db.after_commit.add(lambda: _queue_item(item_code))
+
+
+def refresh_pending_rollups():
+	"""Drain pending item codes in batches; repeated changes to one item are recomputed once."""
+	cache = frappe.cache()
+	key = cache.make_key(PENDING_KEY)
+	while True:
+		(batch,) = cache.pipeline().spop(key, REFRESH_BATCH_SIZE).execute()
+		if not batch:
+			break
+		refresh_item_rollups([code.decode() if isinstance(code, bytes) else code for code in batch])
+
+
+def refresh_item_rollups(item_codes: list[str]):
+	"""Recompute the group totals of these items from their Bins (one query), no drift from deltas."""
+	if not item_codes:
+		return
+	tree = get_warehouse_tree()
+	totals = {code: {} for code in item_codes}
+	for row in frappe.get_all(
+		"Bin",
+		filters={"item_code": ["in", item_codes], "actual_qty": ["!=", 0]},
+		fields=["item_code", "warehouse", "actual_qty"],
+	):
+		for group in tree["ancestors"].get(row.warehouse, ()):
+			totals[row.item_code][group] = totals[row.item_code].get(group, 0.0) + flt(row.actual_qty)
+
+	pipe = frappe.cache().pipeline()
+	for item_code, by_group in totals.items():
+		for group in tree["groups"]:
+			qty = by_group.get(group)
+			if qty:
+				pipe.hset(_node_key(group), item_code, qty)
+			else:
+				pipe.hdel(_node_key(group), item_code)
+	pipe.execute()
+
+	# Scan entries hold group totals too; imported here as pos_scan reads this module
+	from pulpos_custom.pos_scan import forget_items
+
+	forget_items(item_codes)
+
+
+def on_warehouse_change(doc, method=None):
+	"""Warehouse doc_events handler: rebuild every node when the tree shape changes."""
+	if method == "on_update" and doc.get_doc_before_save():
+		if not (doc.has_value_changed("parent_warehouse") or doc.has_value_changed("is_group")):
+			return
+	frappe.cache().delete_value(TREE_KEY)
+	_enqueue_rebuild()
+
+
+def _build_warehouse_tree() -> dict:
+	warehouses = frappe.get_all(
+		"Warehouse",
+		filters={"lft": ["is", "set"], "rgt": ["is", "set"]},
+		fields=["name", "is_group", "lft", "rgt"],
+		order_by="lft asc",
+	)
+	groups = [row for row in warehouses if row.is_group]
+	ancestors = {
+		row.name: [group.name for group in groups if group.lft <= row.lft and group.rgt >= row.rgt]
+		for row in warehouses
+	}
+	return {"groups": {group.name: 1 for group in groups}, "ancestors": ancestors}
+
+
+def _sum_from_bins(pairs: list[tuple[str, str]], tree: dict) -> dict[tuple[str, str], float]:
+	wanted = {pair: 0.0 for pair in pairs}
+	for row in frappe.get_all(
+		"Bin",
+		filters={"item_code": ["in", list({code for code, _ in pairs})], "actual_qty": ["!=", 0]},
+		fields=["item_code", "warehouse", "actual_qty"],
+	):
+		for group in tree["ancestors"].get(row.warehouse, ()):
+			if (row.item_code, group) in wanted:
+				wanted[(row.item_code, group)] += flt(row.actual_qty)
+	return wanted
+
+
+def _queue_item(item_code: str):
+	cache = frappe.cache()
+	# Raw set commands take the site-prefixed key, as `refresh_pending_rollups` reads it
+	cache.pipeline().sadd(cache.make_key(PENDING_KEY), item_code).execute()
+	frappe.enqueue(
+		"pulpos_custom.stock_rollup.refresh_pending_rollups",
+		queue="short",
+		job_id=REFRESH_JOB_ID,
+		deduplicate=True,
+	)
+
+
+def _enqueue_rebuild():
+	frappe.enqueue(
+		"pulpos_custom.stock_rollup.rebuild_stock_rollup",
+		queue="long",
+		job_id=f"{REFRESH_JOB_ID}_rebuild",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def _node_key(warehouse: str) -> str:
+	return frappe.cache().make_key(f"{ROLLUP_KEY}:{warehouse}")
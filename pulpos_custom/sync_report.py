@@ -0,0 +1,53 @@
+"""Aggregate outcome counts for catalog sync runs, with optional per-item detail on disk."""
+
+from __future__ import annotations
+
+import json
+import os
+
+import frappe
+
+
+class SyncReport:
+	"""
+	Count outcomes (`created`, `skipped`, ...) and skip reasons per run.
+
+	Memory stays constant however many items are processed: per-item detail is
+	only kept when `detail_file` is given, and then streamed to it as JSON lines
+	(`{"item_code", "outcome", "reason"}`). Relative paths are inside the site folder.
+	"""
+
+	def __init__(self, *outcomes: str, detail_file: str | None = None):
+		self.counts = dict.fromkeys(outcomes, 0)
+		self.reasons: dict[str, int] = {}
+		self.detail_file = None
+		self._file = None
+		if detail_file:
+			self.detail_file = detail_file if os.path.isabs(detail_file) else frappe.get_site_path(detail_file)
+			self._file = open(self.detail_file, "w")
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
+
+	def record(self, outcome: str, item_code: str, reason: str | None = None, **detail):
+		"""Count one item's outcome; `detail` fields only go to the detail file."""
+		self.counts[outcome] = self.counts.get(outcome, 0) + 1
+		if reason:
+			self.reasons[reason] = self.reasons.get(reason, 0) + 1
+		if self._file:
+			line = {"item_code": item_code, "outcome": outcome, "reason": reason, **detail}
+			self._file.write(json.dumps(line, default=str) + "\n")
+
+	def close(self):
+		if self._file:
+			self._file.close()
+			self._file = None
+
+	def as_dict(self) -> dict:
+		result = {**self.counts, "reasons": self.reasons}
+		if self.detail_file:
+			result["detail_file"] = self.detail_file
+		return result
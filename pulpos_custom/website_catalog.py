@@ -0,0 +1,426 @@
+"""Denormalised price and stock per published Website Item for the shop listing."""
+
+from __future__ import annotations
+
+import json
+
+import frappe
+from frappe.utils import cint, flt, fmt_money, now
+
+from pulpos_custom.images import get_listing_images
+from pulpos_custom.pricing import get_item_prices, select_price
+from pulpos_custom.search_index import get_search_index
+from pulpos_custom.stock_rollup import get_rollup_qtys, get_warehouse_tree
+
+CATALOG_TABLE = "__pulpos_website_catalog"
+# Holds the SCHEMA_VERSION of the last full build; bump it when the columns change
+BUILT_KEY = "pulpos_custom_website_catalog_built"
+SCHEMA_VERSION = "2"
+WEBSITE_PRICE_LIST = "FerreTlap Retail"
+REFRESH_BATCH_SIZE = 500
+CATALOG_COLUMNS = (
+	"website_item",
+	"item_code",
+	"item_name",
+	"item_group",
+	"brand",
+	"route",
+	"website_image",
+	"thumbnail",
+	"short_description",
+	"ranking",
+	"website_warehouse",
+	"is_stock_item",
+	"on_backorder",
+	"show_price",
+	"show_stock_availability",
+	"price_list_rate",
+	"currency",
+	"stock_qty",
+	"in_stock",
+	"modified",
+)
+# Columns the guest-facing listing returns; warehouse and quantity stay internal
+LISTING_COLUMNS = (
+	"website_item",
+	"item_code",
+	"item_name",
+	"item_group",
+	"brand",
+	"route",
+	"website_image",
+	"thumbnail",
+	"short_description",
+	"ranking",
+	"is_stock_item",
+	"on_backorder",
+	"show_price",
+	"show_stock_availability",
+	"price_list_rate",
+	"currency",
+	"in_stock",
+)
+# Field filters the listing can answer from the table; anything else goes to ERPNext
+LISTING_FILTERS = ("item_group", "brand")
+
+
+def ensure_catalog_table():
+	"""
+	Create the catalog table if missing and queue its first build (after_migrate).
+
+	Plain SQL table rather than a DocType: it is a derived cache, never edited, so a
+	table built with an older SCHEMA_VERSION is dropped and rebuilt instead of altered.
+	"""
+	built = frappe.db.get_global(BUILT_KEY)
+	if built and built != SCHEMA_VERSION:
+		frappe.db.sql(f"drop table if exists `{CATALOG_TABLE}`")
+		frappe.db.set_global(BUILT_KEY, None)
+		frappe.cache().delete_value("db_tables")
+
+	if CATALOG_TABLE not in frappe.db.get_tables():
+		frappe.db.sql(
+			f"""
+			create table if not exists `{CATALOG_TABLE}` (
+				website_item varchar(140) not null primary key,
+				item_code varchar(140) not null,
+				item_name varchar(140),
+				item_group varchar(140),
+				brand varchar(140),
+				route text,
+				website_image text,
+				thumbnail text,
+				short_description text,
+				ranking int not null default 0,
+				website_warehouse varchar(140),
+				is_stock_item tinyint not null default 0,
+				on_backorder tinyint not null default 0,
+				show_price tinyint not null default 1,
+				show_stock_availability tinyint not null default 1,
+				price_list_rate decimal(21,9) not null default 0,
+				currency varchar(3),
+				stock_qty decimal(21,9) not null default 0,
+				in_stock tinyint not null default 0,
+				modified datetime(6)
+			)"""
+		)
+		for index, columns in (
+			("item_code", "item_code"),
+			("group_listing", "item_group, ranking, website_item"),
+			("brand_listing", "brand, ranking, website_item"),
+			("listing", "ranking, website_item"),
+		):
+			frappe.db.sql(
+				f"create index if not exists `{CATALOG_TABLE}_{index}` on `{CATALOG_TABLE}` ({columns})"
+			)
+		frappe.cache().delete_value("db_tables")
+
+	if not frappe.db.get_global(BUILT_KEY):
+		frappe.enqueue(
+			"pulpos_custom.website_catalog.rebuild_website_catalog",
+			queue="long",
+			job_id="pulpos_custom_website_catalog_rebuild",
+			deduplicate=True,
+			enqueue_after_commit=True,
+		)
+
+
+def rebuild_website_catalog(batch_size: int = REFRESH_BATCH_SIZE) -> int:
+	"""
+	Refresh every published Website Item in keyset batches, then drop stale rows.
+
+	The listing keeps serving the previous rows while this runs.
+
+	Run with:
+	bench --site <site> execute "pulpos_custom.website_catalog.rebuild_website_catalog"
+	"""
+	ensure_catalog_table()
+	started_at = now()
+	refreshed = 0
+	last_code = None
+	while True:
+		filters = {"published": 1}
+		if last_code:
+			filters["item_code"] = [">", last_code]
+		codes = frappe.get_all(
+			"Website Item",
+			filters=filters,
+			order_by="item_code asc",
+			limit_page_length=batch_size,
+			pluck="item_code",
+		)
+		if not codes:
+			break
+		refreshed += refresh_website_catalog(codes)
+		last_code = codes[-1]
+		frappe.db.commit()
+
+	# Rows not touched by this run belong to unpublished or deleted Website Items
+	frappe.db.sql(f"delete from `{CATALOG_TABLE}` where modified < %s", (started_at,))
+	frappe.db.set_global(BUILT_KEY, SCHEMA_VERSION)
+	frappe.db.commit()
+	return refreshed
+
+
+def refresh_website_catalog(item_codes: list[str]) -> int:
+	"""Recompute the rows for these item codes with a constant number of queries; returns rows written."""
+	item_codes = list({code for code in item_codes if code})
+	if not item_codes or CATALOG_TABLE not in frappe.db.get_tables():
+		return 0
+
+	web_items = frappe.get_all(
+		"Website Item",
+		filters={"item_code": ["in", item_codes], "published": 1},
+		fields=[
+			"name",
+			"item_code",
+			"item_name",
+			"item_group",
+			"brand",
+			"route",
+			"website_image",
+			"thumbnail",
+			"short_description",
+			"ranking",
+			"website_warehouse",
+			"on_backorder",
+			"show_price",
+			"show_stock_availability",
+		],
+	)
+	items = {
+		row.name: row
+		for row in frappe.get_all(
+			"Item", filters={"name": ["in", item_codes]}, fields=["name", "stock_uom", "is_stock_item"]
+		)
+	}
+	price_list = frappe.db.get_single_value("E Commerce Settings", "price_list") or WEBSITE_PRICE_LIST
+	prices = get_item_prices(item_codes, price_list)
+	group_warehouses = get_warehouse_tree()["groups"]
+	warehouses = list(
+		{row.website_warehouse for row in web_items if row.website_warehouse} - set(group_warehouses)
+	)
+	stock = {}
+	if warehouses:
+		stock = {
+			(row.item_code, row.warehouse): flt(row.actual_qty)
+			for row in frappe.get_all(
+				"Bin",
+				filters={"item_code": ["in", item_codes], "warehouse": ["in", warehouses]},
+				fields=["item_code", "warehouse", "actual_qty"],
+			)
+		}
+	# A group website_warehouse (e.g. the company root) shows stock anywhere below it
+	stock.update(
+		get_rollup_qtys(
+			[
+				(row.item_code, row.website_warehouse)
+				for row in web_items
+				if row.website_warehouse in group_warehouses
+			]
+		)
+	)
+
+	timestamp = now()
+	rows = []
+	for row in web_items:
+		item = items.get(row.item_code) or frappe._dict()
+		rate, currency = select_price(prices.get(row.item_code, {}), stock_uom=item.stock_uom)
+		is_stock_item = bool(item.is_stock_item)
+		stock_qty = stock.get((row.item_code, row.website_warehouse), 0.0)
+		rows.append(
+			(
+				row.name,
+				row.item_code,
+				row.item_name,
+				row.item_group,
+				row.brand,
+				row.route,
+				row.website_image,
+				row.thumbnail,
+				row.short_description,
+				cint(row.ranking),
+				row.website_warehouse,
+				int(is_stock_item),
+				cint(row.on_backorder),
+				cint(row.show_price),
+				cint(row.show_stock_availability),
+				rate,
+				currency,
+				stock_qty,
+				int(not is_stock_item or stock_qty > 0),
+				timestamp,
+			)
+		)
+
+	frappe.db.sql(f"delete from `{CATALOG_TABLE}` where item_code in %s", (tuple(item_codes),))
+	placeholders = f"({', '.join(['%s'] * len(CATALOG_COLUMNS))})"
+	for start in range(0, len(rows), REFRESH_BATCH_SIZE):
+		chunk = rows[start : start + REFRESH_BATCH_SIZE]
+		frappe.db.sql(
+			f"insert into `{CATALOG_TABLE}` ({', '.join(CATALOG_COLUMNS)}) "
+			f"values {', '.join([placeholders] * len(chunk))}",
+			[value for row in chunk for value in row],
+		)
+	return len(rows)
+
+
+def refresh_catalog_row(doc, method=None):
+	"""Website Item doc_events handler: its own edits (publish, route, ranking) skip the sync queue."""
+	if method == "on_trash":
+		if CATALOG_TABLE in frappe.db.get_tables():
+			frappe.db.sql(f"delete from `{CATALOG_TABLE}` where website_item = %s", (doc.name,))
+	elif doc.get("item_code"):
+		refresh_website_catalog([doc.item_code])
+
+
+@frappe.whitelist(allow_guest=True)
+def get_catalog_listing(
+	item_group: str | None = None,
+	brand: str | None = None,
+	in_stock: int = 0,
+	start: int = 0,
+	page_length: int = 20,
+	search: str | None = None,
+) -> dict:
+	"""
+	One page of published Website Items with price and stock, from one indexed query.
+
+	`search` ranks published Website Items (item code and name, website name, barcodes,
+	group) with the in-memory search index and keeps its order. Price
+	and stock follow E Commerce Settings and each Website Item's `show_price` and
+	`show_stock_availability`; `stock_qty` is only returned with "Show Quantity in Website".
+	"""
+	settings = _display_settings()
+	columns = ", ".join(LISTING_COLUMNS + (("stock_qty",) if settings.show_quantity_in_website else ()))
+	conditions, values = [], {"start": cint(start), "page_length": min(max(cint(page_length), 1), 100)}
+	ranked = None
+	if search:
+		ranked = get_search_index().search(search, limit=None, published_only=True)
+		if not ranked:
+			return {"items": [], "items_count": 0}
+		conditions.append("item_code in %(item_codes)s")
+		values["item_codes"] = tuple(ranked)
+	if item_group:
+		conditions.append("item_group = %(item_group)s")
+		values["item_group"] = item_group
+	if brand:
+		conditions.append("brand = %(brand)s")
+		values["brand"] = brand
+	if cint(in_stock):
+		conditions.append("in_stock = 1")
+	where = f"where {' and '.join(conditions)}" if conditions else ""
+
+	if ranked is not None:
+		rank = {code: position for position, code in enumerate(ranked)}
+		items = frappe.db.sql(f"select {columns} from `{CATALOG_TABLE}` {where}", values, as_dict=True)
+		items.sort(key=lambda item: rank[item.item_code])
+		page = items[values["start"] : values["start"] + values["page_length"]]
+		return {"items": _apply_display_settings(page, settings), "items_count": len(items)}
+
+	# Both keys descending so the (…, ranking, website_item) indexes are read backwards without a sort
+	items = frappe.db.sql(
+		f"""
+		select {columns} from `{CATALOG_TABLE}` {where}
+		order by ranking desc, website_item desc
+		limit %(page_length)s offset %(start)s
+		""",
+		values,
+		as_dict=True,
+	)
+	count = frappe.db.sql(f"select count(*) from `{CATALOG_TABLE}` {where}", values)[0][0]
+	return {"items": _apply_display_settings(items, settings), "items_count": count}
+
+
+def _display_settings() -> frappe._dict:
+	return frappe._dict(
+		{
+			field: cint(frappe.db.get_single_value("E Commerce Settings", field))
+			for field in ("show_price", "show_stock_availability", "show_quantity_in_website")
+		}
+	)
+
+
+def _apply_display_settings(items: list[dict], settings: frappe._dict) -> list[dict]:
+	"""Blank out price and stock the site or the Website Item hides, as ERPNext's listing does."""
+	for item in items:
+		if not (settings.show_price and item.show_price):
+			item.price_list_rate = item.currency = None
+		if not (settings.show_stock_availability and item.show_stock_availability):
+			item.in_stock = None
+			item.pop("stock_qty", None)
+	return items
+
+
+@frappe.whitelist(allow_guest=True)
+def get_product_filter_data(query_args=None):
+	"""
+	Serve ERPNext's `/all-products` listing from the catalog table.
+
+	Searches are ranked by the in-memory search index. Attribute filters, other
+	field filters, Item Groups that list descendants or Website Item Group members,
+	sites with active selling Pricing Rules (discounts) and sites whose table is not
+	built yet fall through to ERPNext's own product query.
+	"""
+	from erpnext.e_commerce.api import get_product_filter_data as erpnext_product_filter_data
+
+	args = frappe._dict(json.loads(query_args) if isinstance(query_args, str) else (query_args or {}))
+	field_filters = args.get("field_filters") or {}
+
+	def first(value):
+		return value[0] if isinstance(value, list) else value
+
+	item_group = args.get("item_group") or first(field_filters.get("item_group"))
+	if (
+		args.get("attribute_filters")
+		or set(field_filters) - set(LISTING_FILTERS)
+		or any(len(values) > 1 for values in field_filters.values() if isinstance(values, list))
+		or frappe.db.get_global(BUILT_KEY) != SCHEMA_VERSION
+		or (item_group and _group_needs_erpnext(item_group))
+		or frappe.db.exists("Pricing Rule", {"disabled": 0, "selling": 1})
+	):
+		return erpnext_product_filter_data(query_args)
+
+	from erpnext.e_commerce.product_data_engine.query import ProductQuery
+	from erpnext.setup.doctype.item_group.item_group import get_child_groups_for_website
+
+	engine = ProductQuery()
+	settings = engine.settings
+	result = get_catalog_listing(
+		item_group=item_group,
+		brand=first(field_filters.get("brand")),
+		start=0 if args.get("from_filters") else cint(args.get("start")),
+		page_length=cint(settings.products_per_page) or 20,
+		search=args.get("search"),
+	)
+
+	cart_items = set(engine.get_cart_items()) if frappe.session.user != "Guest" else set()
+	wishlist = set()
+	if frappe.session.user != "Guest" and settings.enable_wishlist:
+		wishlist = set(frappe.get_all("Wishlist Item", filters={"parent": frappe.session.user}, pluck="item_code"))
+
+	images = get_listing_images(item.website_image for item in result["items"])
+	for item in result["items"]:
+		item.website_image = images.get(item.website_image, item.website_image)
+		item.web_item_name = item.item_name
+		item.name = item.website_item
+		if item.currency:
+			item.price_list_rate = flt(item.price_list_rate)
+			item.formatted_price = fmt_money(item.price_list_rate, currency=item.currency)
+		item.in_cart = item.item_code in cart_items
+		item.wished = item.item_code in wishlist
+
+	return {
+		"items": result["items"],
+		"filters": {},
+		"settings": settings,
+		"sub_categories": get_child_groups_for_website(item_group, immediate=True) if args.get("item_group") else [],
+		"items_count": result["items_count"],
+	}
+
+
+def _group_needs_erpnext(item_group: str) -> bool:
+	"""The table keys items by their own Item Group; descendants and extra Website Item Groups are not in it."""
+	return bool(
+		frappe.get_cached_value("Item Group", item_group, "include_descendants")
+		or frappe.db.exists("Website Item Group", {"item_group": item_group, "parenttype": "Website Item"})
+	)
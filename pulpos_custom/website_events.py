@@ -0,0 +1,226 @@
+"""Incremental Website Item and website catalog sync driven by Item, Item Price and Bin changes."""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import now
+
+from pulpos_custom.pricing import get_item_prices, select_price
+from pulpos_custom.profiling import profiled
+from pulpos_custom.setup_context import get_setup_context
+from pulpos_custom.website_catalog import refresh_website_catalog
+from pulpos_custom.website_sync import _website_item_values, item_sync_fields
+
+WEBSITE_PRICE_LIST = "FerreTlap Retail"
+PENDING_KEY = "pulpos_custom:website_sync_pending"
+# Website Items this sync unpublished, so only those are published again when they qualify
+AUTO_UNPUBLISHED_KEY = "pulpos_custom:website_auto_unpublished"
+WATERMARK_KEY = "pulpos_custom_website_sync_watermark"
+SYNC_JOB_ID = "pulpos_custom_website_sync"
+SYNC_BATCH_SIZE = 500
+
+
+def queue_item_sync(doc, method=None):
+	"""doc_events handler: remember the changed item code and schedule the worker."""
+	item_code = doc.name if doc.doctype == "Item" else doc.get("item_code")
+	if not item_code:
+		return
+	if doc.doctype == "Item Price" and doc.get("price_list") != WEBSITE_PRICE_LIST:
+		return
+
+	cache = frappe.cache()
+	# Raw set commands take the site-prefixed key, as `process_pending_item_sync` reads it
+	cache.pipeline().sadd(cache.make_key(PENDING_KEY), item_code).execute()
+	frappe.enqueue(
+		"pulpos_custom.website_events.process_pending_item_sync",
+		queue="short",
+		job_id=SYNC_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def process_pending_item_sync():
+	"""Drain the pending set in batches so repeated changes to one item are applied once."""
+	cache = frappe.cache()
+	key = cache.make_key(PENDING_KEY)
+	while True:
+		(batch,) = cache.pipeline().spop(key, SYNC_BATCH_SIZE).execute()
+		if not batch:
+			break
+		item_codes = [code.decode() if isinstance(code, bytes) else code for code in batch]
+		try:
+			_refresh_thumbnails(sync_website_items(item_codes))
+			refresh_website_catalog(item_codes)
+			frappe.db.commit()
+		except Exception:
+			# Put the batch back so the next run retries it instead of waiting for the hourly sweep
+			frappe.db.rollback()
+			cache.pipeline().sadd(key, *item_codes).execute()
+			raise
+
+
+def sync_modified_items():
+	"""
+	Catch up on changes the event path missed using a `modified` watermark.
+
+	The first run only records the watermark; the full catalog is covered by
+	`pulpos_custom.website_sync.create_website_items`.
+	"""
+	started_at = now()
+	watermark = frappe.db.get_global(WATERMARK_KEY)
+	if watermark:
+		changed = set(frappe.get_all("Item", filters={"modified": [">", watermark]}, pluck="name"))
+		changed.update(
+			frappe.get_all(
+				"Item Price",
+				filters={"modified": [">", watermark], "price_list": WEBSITE_PRICE_LIST},
+				pluck="item_code",
+			)
+		)
+		changed.update(frappe.get_all("Bin", filters={"modified": [">", watermark]}, pluck="item_code"))
+
+		item_codes = sorted(code for code in changed if code)
+		for start in range(0, len(item_codes), SYNC_BATCH_SIZE):
+			batch = item_codes[start : start + SYNC_BATCH_SIZE]
+			_refresh_thumbnails(sync_website_items(batch))
+			refresh_website_catalog(batch)
+			frappe.db.commit()
+
+	frappe.db.set_global(WATERMARK_KEY, started_at)
+	frappe.db.commit()
+
+
+@profiled
+def sync_website_items(item_codes: list[str], price_list: str = WEBSITE_PRICE_LIST) -> dict:
+	"""
+	Apply Item changes to Website Items for the given item codes only.
+
+	- Creates a Website Item for enabled, priced Items that lack one.
+	- Unpublishes Website Items whose Item is disabled, deleted or has no price, and
+	  publishes them again once it qualifies; Website Items unpublished by hand stay so.
+	- Refreshes image, warehouse and price/stock flags on the rest.
+	- Reports Website Items with a new image under `new_images` for thumbnail generation.
+
+	Uses a constant number of reads for the whole batch.
+	"""
+	item_codes = list({code for code in item_codes if code})
+	if not item_codes:
+		return {"created": [], "updated": [], "unpublished": [], "new_images": []}
+
+	items = {
+		row.name: row
+		for row in frappe.get_all("Item", filters={"name": ["in", item_codes]}, fields=item_sync_fields())
+	}
+	web_items = {
+		row.item_code: row
+		for row in frappe.get_all(
+			"Website Item",
+			filters={"item_code": ["in", item_codes]},
+			fields=[
+				"name",
+				"item_code",
+				"published",
+				"website_image",
+				"thumbnail",
+				"website_warehouse",
+				"show_price",
+				"show_stock_availability",
+			],
+		)
+	}
+	prices = get_item_prices(item_codes, price_list)
+	stock = {}
+	for row in frappe.get_all(
+		"Bin",
+		filters={"item_code": ["in", item_codes], "actual_qty": [">", 0]},
+		fields=["item_code", "warehouse", "actual_qty"],
+		order_by="actual_qty desc",
+	):
+		stock.setdefault(row.item_code, []).append(row.warehouse)
+
+	cache = frappe.cache()
+	auto_key = cache.make_key(AUTO_UNPUBLISHED_KEY)
+	hidden = [row.name for row in web_items.values() if not row.published]
+	pipe = cache.pipeline()
+	for name in hidden:
+		pipe.sismember(auto_key, name)
+	auto_unpublished = {name for name, member in zip(hidden, pipe.execute()) if member}
+
+	pos_wh = get_setup_context().default_pos_warehouse()
+	created, updated, unpublished, new_images, republished, auto_hidden = [], [], [], [], [], []
+
+	for code in item_codes:
+		item = items.get(code)
+		web_item = web_items.get(code)
+		price = 0.0
+		if item:
+			price = select_price(prices.get(code, {}))[0] or float(item.standard_rate or 0)
+
+		if not item or item.disabled or price <= 0:
+			if web_item and web_item.published:
+				frappe.db.set_value("Website Item", web_item.name, "published", 0, update_modified=False)
+				auto_hidden.append(web_item.name)
+				unpublished.append(code)
+			continue
+
+		if not web_item:
+			doc = frappe.new_doc("Website Item")
+			doc.update(_website_item_values(item, None, 1))
+			doc.website_warehouse = _pick_warehouse(doc.website_warehouse, pos_wh, stock.get(code))
+			doc.save(ignore_permissions=True)
+			created.append(code)
+			if doc.website_image:
+				new_images.append(doc.name)
+			continue
+
+		if not web_item.published and web_item.name not in auto_unpublished:
+			continue
+		updates = {}
+		if not web_item.published:
+			updates["published"] = 1
+		if web_item.show_price != 1:
+			updates["show_price"] = 1
+		if web_item.show_stock_availability != 1:
+			updates["show_stock_availability"] = 1
+		image = item.get("website_image") or item.image
+		if image and web_item.website_image != image:
+			updates["website_image"] = image
+			updates["thumbnail"] = image
+			new_images.append(web_item.name)
+		warehouse = _pick_warehouse(web_item.website_warehouse, pos_wh, stock.get(code))
+		if warehouse and warehouse != web_item.website_warehouse:
+			updates["website_warehouse"] = warehouse
+		if updates:
+			frappe.db.set_value("Website Item", web_item.name, updates, update_modified=False)
+			updated.append(code)
+		if updates.get("published"):
+			republished.append(web_item.name)
+
+	if auto_hidden:
+		cache.pipeline().sadd(auto_key, *auto_hidden).execute()
+	if republished:
+		# Forgotten only once published for good, so a rolled back batch can still republish them
+		frappe.db.after_commit.add(lambda: frappe.cache().pipeline().srem(auto_key, *republished).execute())
+	return {"created": created, "updated": updated, "unpublished": unpublished, "new_images": new_images}
+
+
+def _refresh_thumbnails(result: dict):
+	"""Queue derivative generation for Website Items whose image changed."""
+	if result.get("new_images"):
+		frappe.enqueue(
+			"pulpos_custom.images.generate_website_thumbnails",
+			queue="long",
+			website_items=result["new_images"],
+			enqueue_after_commit=True,
+		)
+
+
+def _pick_warehouse(current: str | None, pos_wh: str | None, stocked: list[str] | None) -> str | None:
+	"""Prefer the POS warehouse (as the setup backfill does), else keep a stocked current, else the best stocked."""
+	if pos_wh:
+		return pos_wh
+	stocked = stocked or []
+	if current and current in stocked:
+		return current
+	return stocked[0] if stocked else current
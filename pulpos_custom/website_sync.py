@@ -3,12 +3,25 @@
 from __future__ import annotations
 
 import frappe
+from frappe.utils import random_string
+from frappe.website.utils import cleanup_page_name
 
+from pulpos_custom.bulk import BulkUpdater, bulk_insert_docs, iter_pages
+from pulpos_custom.pricing import get_item_prices, select_price
+from pulpos_custom.profiling import profiled
+from pulpos_custom.setup_context import get_setup_context
+from pulpos_custom.sync_report import SyncReport
 
+
+@profiled
 def create_website_items(
 	price_list: str = "FerreTlap Retail",
 	default_warehouse: str | None = None,
 	publish: int = 1,
+	bulk: int = 0,
+	batch_size: int = 500,
+	item_names: list[str] | None = None,
+	detail_file: str | None = None,
 ) -> dict:
 	"""
 	Create Website Items for Items that don't already have one.
@@ -17,61 +30,123 @@ def create_website_items(
 	- Falls back to Item.standard_rate if no Item Price is found.
 	- Skips Items with no price to avoid publishing zero-priced products.
 	- Sets website image from Item.website_image or Item.image.
+	- Reads Items in pages of `batch_size` with their prices and existing Website
+	  Items, so memory does not grow with the catalog.
+	- With `bulk=1`, inserts each page's new rows in one batch and commits.
+	- `item_names` limits the run to those Items (used by the chunked setup jobs).
+
+	Returns counts (`created`, `skipped`, skip `reasons`); pass `detail_file` to
+	also stream one JSON line per Item to that file.
 
 	Run with:
 	bench --site <site> execute "pulpos_custom.website_sync.create_website_items"
 	"""
-	# Build price map from Item Price for the chosen price list
-	price_list_rates = frappe.get_all(
-		"Item Price",
-		filters={"price_list": price_list, "selling": 1},
-		fields=["item_code", "price_list_rate"],
-	)
-	price_map = {row.item_code: float(row.price_list_rate or 0) for row in price_list_rates}
-
-	meta = frappe.get_meta("Item")
+	with SyncReport("created", "skipped", detail_file=detail_file) as report:
+		if item_names is not None and not item_names:
+			return report.as_dict()
+
+		item_filters = {"name": ["in", item_names]} if item_names is not None else None
+		group_routes = {}
+		if bulk:
+			group_routes = {row.name: row.route for row in frappe.get_all("Item Group", fields=["name", "route"])}
+		# Descriptions can be long, so they are only read for the Items being published
+		fields = [field for field in item_sync_fields() if field != "description"]
+
+		for page in iter_pages("Item", fields, filters=item_filters, page_size=batch_size):
+			codes = [item.name for item in page]
+			prices = get_item_prices(codes, price_list)
+			existing = set(frappe.get_all("Website Item", filters={"item_code": ["in", codes]}, pluck="item_code"))
+
+			new_items = []
+			for item in page:
+				if item.disabled:
+					report.record("skipped", item.name, "disabled")
+					continue
+
+				if item.name in existing:
+					report.record("skipped", item.name, "exists")
+					continue
+
+				price = select_price(prices.get(item.name, {}))[0] or float(getattr(item, "standard_rate", 0) or 0)
+				if price <= 0:
+					report.record("skipped", item.name, "no price")
+					continue
+				new_items.append(item)
+
+			if not new_items:
+				continue
+			descriptions = {
+				row.name: row.description
+				for row in frappe.get_all(
+					"Item", filters={"name": ["in", [item.name for item in new_items]]}, fields=["name", "description"]
+				)
+			}
+			for item in new_items:
+				item.description = descriptions.get(item.name)
+
+			if bulk:
+				_insert_website_items_bulk(new_items, group_routes, default_warehouse, publish)
+			else:
+				for item in new_items:
+					doc = frappe.new_doc("Website Item")
+					doc.update(_website_item_values(item, default_warehouse, publish))
+					doc.save(ignore_permissions=True)
+			for item in new_items:
+				report.record("created", item.name)
+
+	return report.as_dict()
+
+
+def item_sync_fields() -> list[str]:
+	"""Item columns needed to build a Website Item, limited to what this schema has."""
+	ctx = get_setup_context()
 	fields = ["name", "item_name", "item_group", "image", "description", "standard_rate", "disabled"]
-	if meta.has_field("website_image"):
+	if ctx.has_field("Item", "website_image"):
 		fields.append("website_image")
-
-	has_default_warehouse_col = frappe.db.has_column("Item", "default_warehouse")
-	if has_default_warehouse_col:
+	if ctx.has_column("Item", "default_warehouse"):
 		fields.append("default_warehouse")
+	return fields
 
-	items = frappe.get_all("Item", fields=fields)
-
-	created = []
-	skipped = []
 
+def _insert_website_items_bulk(
+	items: list,
+	group_routes: dict,
+	default_warehouse: str | None,
+	publish: int,
+) -> int:
+	"""Set-based insert of new Website Items for one page of Items, then commit."""
+	rows = []
 	for item in items:
-		if item.disabled:
-			skipped.append((item.name, "disabled"))
-			continue
-
-		if frappe.db.exists("Website Item", {"item_code": item.name}):
-			skipped.append((item.name, "exists"))
-			continue
-
-		price = price_map.get(item.name) or float(getattr(item, "standard_rate", 0) or 0)
-		if price <= 0:
-			skipped.append((item.name, "no price"))
-			continue
-
-		doc = frappe.new_doc("Website Item")
-		doc.item_code = item.name
-		doc.item_name = item.item_name
-		doc.item_group = item.item_group
-		doc.published = publish
-		doc.show_price = 1
-		doc.show_stock_availability = 1
-		doc.website_warehouse = default_warehouse or (
-			getattr(item, "default_warehouse", None) if has_default_warehouse_col else None
-		)
-		website_img = getattr(item, "website_image", None) or item.image
-		doc.website_image = website_img
-		doc.thumbnail = website_img
-		doc.description = item.description
-		doc.save(ignore_permissions=True)
-		created.append(item.name)
-
-	return {"created": created, "skipped": skipped}
+		row = _website_item_values(item, default_warehouse, publish)
+		# Controller hooks are bypassed, so set what Website Item's validate would
+		row["route"] = _make_route(item, group_routes.get(item.item_group))
+		row["web_item_name"] = item.item_name
+		rows.append(row)
+	if publish:
+		# Website Item.on_update flags its Item; one grouped UPDATE for the page instead
+		with BulkUpdater("Item", update_modified=False) as updater:
+			for item in items:
+				updater.add(item.name, {"published_in_website": 1})
+	return bulk_insert_docs("Website Item", rows, batch_size=len(rows))
+
+
+def _website_item_values(item, default_warehouse: str | None, publish: int) -> dict:
+	"""Field values for a new Website Item built from an Item row."""
+	website_img = getattr(item, "website_image", None) or item.image
+	return {
+		"item_code": item.name,
+		"item_name": item.item_name,
+		"item_group": item.item_group,
+		"published": publish,
+		"show_price": 1,
+		"show_stock_availability": 1,
+		"website_warehouse": default_warehouse or getattr(item, "default_warehouse", None),
+		"website_image": website_img,
+		"thumbnail": website_img,
+		"description": item.description,
+	}
+
+
+def _make_route(item, group_route: str | None) -> str:
+	slug = cleanup_page_name(f"{item.item_name or item.name}-{random_string(5)}")
+	return f"{group_route}/{slug}" if group_route else slug